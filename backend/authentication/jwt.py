@@ -0,0 +1,92 @@
+"""
+JWT authentication backed by the object cache.
+
+simplejwt's ``JWTAuthentication`` loads the ``User`` row on every
+request, and serializers then load ``user.profile`` lazily.
+``CachedJWTAuthentication`` takes the user, with its profile already
+joined, from ``auth_user_cache`` (see caching/objects.py), keyed by the
+token's user ID. Saving or deleting the user or its profile invalidates
+the entry, so deactivating an account takes effect on the next request.
+The short TTL bounds anything changed with ``QuerySet.update()``. The
+cached user holds a digest of its password hash, not the hash, for the
+``CHECK_REVOKE_TOKEN`` comparison.
+
+Views that only need the caller's ID can set ``trust_token_claims =
+True``. With ``AUTH_TRUST_TOKEN_CLAIMS`` on, their safe (read-only)
+requests skip the lookup entirely and get a ``User`` carrying only the
+ID from the signed token. An account deactivated meanwhile keeps that
+read access until its access token expires.
+
+Settings:
+    AUTH_TRUST_TOKEN_CLAIMS          allow ``trust_token_claims`` views
+    OBJECT_CACHE_TIMEOUTS["auth_user"]  TTL of cached users (default 60s)
+"""
+
+from caching.objects import auth_user_cache
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+
+def claims_user(user_id):
+    """An unsaved-looking but persisted ``User`` that only knows its ID"""
+    user = User(pk=user_id, is_active=True)
+    user._state.adding = False
+    user._state.db = DEFAULT_DB_ALIAS
+    return user
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that reads users from ``auth_user_cache``"""
+
+    def authenticate(self, request):
+        self.request = request
+        return super().authenticate(request)
+
+    def trusts_claims(self):
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return False
+        if not getattr(settings, "AUTH_TRUST_TOKEN_CLAIMS", False):
+            return False
+        view = request.parser_context.get("view")
+        return getattr(view, "trust_token_claims", False)
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            ) from e
+
+        if self.trusts_claims():
+            return claims_user(user_id)
+
+        user = auth_user_cache.get_or_load(user_id)
+        if user is None:
+            raise AuthenticationFailed(
+                _("User not found"), code="user_not_found"
+            )
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        if (
+            api_settings.CHECK_REVOKE_TOKEN
+            and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+            != user.password_digest
+        ):
+            raise AuthenticationFailed(
+                _("The user's password has been changed."),
+                code="password_changed",
+            )
+        return user
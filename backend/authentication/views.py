@@ -4,6 +4,7 @@ import os
 from urllib.parse import urlencode
 
 import requests
+from caching.objects import auth_user_cache
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.mail import send_mail
@@ -83,6 +84,9 @@ class LoginView(generics.GenericAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data["user"]
+        # Loads the profile with the user and warms the cache that
+        # authenticates the requests made with the new token
+        user = auth_user_cache.get_or_load(user.pk) or user
         refresh = RefreshToken.for_user(user)
         data = {
             "refresh": str(refresh),
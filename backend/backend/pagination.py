@@ -0,0 +1,216 @@
+"""
+Keyset (cursor) pagination.
+
+LimitOffsetPagination makes the database walk and discard ``offset`` rows,
+so deep pages get slower the further a user scrolls. KeysetPagination
+instead remembers the position of the last row on the page, as
+``(ordering value, id)``, and the next page starts with a
+``WHERE (value, id) < (last_value, last_id)`` range that the
+``(…, created_at)`` indexes can answer directly. Rows inserted while a
+client is paging never shift later pages, so there are no duplicates or
+gaps.
+"""
+
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over ``(ordering field, tiebreaker)``.
+
+    The ordering field is taken from the queryset (so DRF's OrderingFilter
+    keeps working) and falls back to ``ordering``. ``tiebreaker`` must be
+    unique and follows the same direction as the ordering field.
+    """
+
+    page_size = api_settings.PAGE_SIZE or 20
+    max_page_size = 100
+    page_size_query_param = "limit"
+    cursor_query_param = "cursor"
+    ordering = "-created_at"
+    tiebreaker = "id"
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self):
+        self.request = None
+        self.field = None
+        self.descending = True
+        self.next_position = None
+
+    # -----------------------------------
+    # Cursor encoding
+    # -----------------------------------
+
+    def encode_cursor(self, position):
+        raw = json.dumps(position, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        """Return the ``[value, tiebreaker]`` position in the request"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            position = json.loads(base64.urlsafe_b64decode(padded))
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != 2:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    # -----------------------------------
+    # Ordering
+    # -----------------------------------
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """Pick the keyset field from the queryset's ordering"""
+        model = queryset.model
+        ordering = list(queryset.query.order_by) or list(model._meta.ordering)
+        for term in ordering[:1]:
+            if not isinstance(term, str):
+                break
+            name = term.lstrip("-")
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                break
+            if not field.concrete or field.is_relation:
+                break
+            return name, term.startswith("-")
+        return self.ordering.lstrip("-"), self.ordering.startswith("-")
+
+    def set_ordering(self, field, descending=True):
+        self.field = field
+        self.descending = descending
+
+    def get_position(self, request, model):
+        """Typed ``(value, tiebreaker)`` position of the request cursor"""
+        position = self.decode_cursor(request)
+        if position is None:
+            return None
+        value, tiebreak = position
+        try:
+            value = model._meta.get_field(self.field).to_python(value)
+            tiebreak = model._meta.get_field(self.tiebreaker).to_python(
+                tiebreak
+            )
+        except (ValidationError, FieldDoesNotExist, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None or tiebreak is None:
+            raise NotFound(self.invalid_cursor_message)
+        return value, tiebreak
+
+    def position_filter(self, position):
+        """``Q`` selecting rows strictly after ``position``"""
+        value, tiebreak = position
+        op = "lt" if self.descending else "gt"
+        return Q(**{f"{self.field}__{op}": value}) | Q(
+            **{self.field: value, f"{self.tiebreaker}__{op}": tiebreak}
+        )
+
+    def position_of(self, obj):
+        value = getattr(obj, self.field)
+        if hasattr(value, "isoformat"):
+            value = value.isoformat()
+        tiebreak = getattr(obj, self.tiebreaker)
+        return [value, tiebreak]
+
+    # -----------------------------------
+    # Paging
+    # -----------------------------------
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.set_ordering(*self.get_ordering(queryset))
+
+        position = self.get_position(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.position_filter(position))
+
+        prefix = "-" if self.descending else ""
+        queryset = queryset.order_by(
+            f"{prefix}{self.field}", f"{prefix}{self.tiebreaker}"
+        )
+        page_size = self.get_page_size(request)
+        return self.build_page(list(queryset[: page_size + 1]), page_size)
+
+    def build_page(self, rows, page_size):
+        """Trim a ``page_size + 1`` fetch to a page and remember the cursor"""
+        page = rows[:page_size]
+        self.next_position = None
+        if len(rows) > page_size and page:
+            self.next_position = self.position_of(page[-1])
+        return page
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position),
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {
+                    "type": "string",
+                    "nullable": True,
+                    "format": "uri",
+                },
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Opaque cursor returned in `next`",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Number of results to return per page",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -119,6 +119,8 @@ INSTALLED_APPS = [
     "hashtags",
     "blocks",
     "reports",
+    "caching",
+    "observability",
 ]
 
 SOCIALACCOUNT_PROVIDERS = {
@@ -155,7 +157,7 @@ SOCIAL_AUTH_GITHUB_CALLBACK_URL = os.getenv("GITHUB_REDIRECT_URI")
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "authentication.jwt.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -166,7 +168,126 @@ REST_FRAMEWORK = {
     "PAGE_SIZE": 20,
 }
 
+# Cache backend: "locmem" (per process), "file" (shared by the workers of
+# one host) or "redis" (networked, needs the redis package)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+_CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+}
+_CACHE_LOCATIONS = {
+    "locmem": "nexus",
+    "file": str(BASE_DIR / ".cache"),
+    "redis": "redis://127.0.0.1:6379/1",
+}
+CACHES = {
+    "default": {
+        "BACKEND": _CACHE_BACKENDS[CACHE_BACKEND],
+        "LOCATION": os.getenv(
+            "CACHE_LOCATION", _CACHE_LOCATIONS[CACHE_BACKEND]
+        ),
+        "TIMEOUT": int(os.getenv("CACHE_TIMEOUT", 300)),
+        "KEY_PREFIX": "nexus",
+    }
+}
+
+# Object cache timeouts in seconds (see caching/objects.py)
+OBJECT_CACHE_TIMEOUTS = {
+    "post": int(os.getenv("POST_CACHE_TIMEOUT", 300)),
+    "user": int(os.getenv("USER_CACHE_TIMEOUT", 300)),
+    "auth_user": int(os.getenv("AUTH_USER_CACHE_TIMEOUT", 60)),
+    "blocks": int(os.getenv("BLOCK_CACHE_TIMEOUT", 300)),
+}
+
+# Buffer post like/retweet/quote/reply counter changes and apply them in
+# batches (see posts/counters.py). Only enable this together with a
+# worker running ``flush_post_counters --interval N``; nothing else
+# folds the buffered changes into the posts.
+POST_COUNTER_WRITE_BEHIND = os.getenv(
+    "POST_COUNTER_WRITE_BEHIND", "False"
+).lower() in ["true", "1", "yes"]
+
+# Home timeline store (see posts/timeline.py)
+# Authors with more followers than this are merged in at read time
+TIMELINE_FANOUT_MAX_FOLLOWERS = int(
+    os.getenv("TIMELINE_FANOUT_MAX_FOLLOWERS", 5000)
+)
+TIMELINE_MAX_ENTRIES = int(os.getenv("TIMELINE_MAX_ENTRIES", 800))
+TIMELINE_BACKFILL_POSTS = int(os.getenv("TIMELINE_BACKFILL_POSTS", 100))
+
+# Post search ranking (see search/engine.py)
+SEARCH_HASHTAG_BOOST = float(os.getenv("SEARCH_HASHTAG_BOOST", 2.0))
+SEARCH_MENTION_BOOST = float(os.getenv("SEARCH_MENTION_BOOST", 1.5))
+# The last query term matches as a prefix once it is this long, expanding
+# to at most SEARCH_MAX_PREFIX_TERMS indexed terms
+SEARCH_MIN_PREFIX_LENGTH = int(os.getenv("SEARCH_MIN_PREFIX_LENGTH", 3))
+SEARCH_MAX_PREFIX_TERMS = int(os.getenv("SEARCH_MAX_PREFIX_TERMS", 50))
+
+# Trending hashtags (see posts/trending.py)
+TRENDING_CANDIDATES = int(os.getenv("TRENDING_CANDIDATES", 100))
+TRENDING_REFRESH_SECONDS = int(os.getenv("TRENDING_REFRESH_SECONDS", 60))
+
+# Notification streaming (see notifications/streaming.py). Use
+# notifications.streaming.DatabasePollingBackend when several processes
+# serve streams.
+NOTIFICATION_STREAM_BACKEND = os.getenv(
+    "NOTIFICATION_STREAM_BACKEND", "notifications.streaming.LocalBackend"
+)
+NOTIFICATION_STREAM_HEARTBEAT = int(
+    os.getenv("NOTIFICATION_STREAM_HEARTBEAT", 15)
+)
+NOTIFICATION_STREAM_POLL_INTERVAL = float(
+    os.getenv("NOTIFICATION_STREAM_POLL_INTERVAL", 1.0)
+)
+# Seconds a ticket from /api/notifications/stream/ticket/ opens a stream
+NOTIFICATION_STREAM_TICKET_MAX_AGE = int(
+    os.getenv("NOTIFICATION_STREAM_TICKET_MAX_AGE", 60)
+)
+
+# Notification outbox (see notifications/outbox.py). When async is off,
+# queued notifications are delivered inline by the request.
+NOTIFICATION_OUTBOX_ASYNC = os.getenv(
+    "NOTIFICATION_OUTBOX_ASYNC", str(IS_PRODUCTION)
+).lower() in ["true", "1", "yes"]
+NOTIFICATION_OUTBOX_WORKERS = int(os.getenv("NOTIFICATION_OUTBOX_WORKERS", 1))
+NOTIFICATION_OUTBOX_BATCH_SIZE = int(
+    os.getenv("NOTIFICATION_OUTBOX_BATCH_SIZE", 500)
+)
+NOTIFICATION_COALESCE_SECONDS = int(
+    os.getenv("NOTIFICATION_COALESCE_SECONDS", 86400)
+)
+
+# Thread pages (see posts/threads.py)
+THREAD_PAGE_SIZE = int(os.getenv("THREAD_PAGE_SIZE", 50))
+THREAD_MAX_PAGE_SIZE = int(os.getenv("THREAD_MAX_PAGE_SIZE", 200))
+THREAD_DEFAULT_DEPTH = int(os.getenv("THREAD_DEFAULT_DEPTH", 5))
+
+# Request instrumentation (see observability/recorder.py)
+OBSERVABILITY_ENABLED = os.getenv("OBSERVABILITY_ENABLED", "True").lower() in [
+    "true",
+    "1",
+    "yes",
+]
+OBSERVABILITY_SERVER_TIMING = os.getenv(
+    "OBSERVABILITY_SERVER_TIMING", "True"
+).lower() in ["true", "1", "yes"]
+OBSERVABILITY_SLOW_REQUEST_MS = int(
+    os.getenv("OBSERVABILITY_SLOW_REQUEST_MS", 1000)
+)
+OBSERVABILITY_DUPLICATE_QUERIES = int(
+    os.getenv("OBSERVABILITY_DUPLICATE_QUERIES", 2)
+)
+
+# Username/hashtag typeahead (see search/autocomplete.py)
+AUTOCOMPLETE_TOP_K = int(os.getenv("AUTOCOMPLETE_TOP_K", 10))
+AUTOCOMPLETE_REFRESH_SECONDS = int(
+    os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", 300)
+)
+
 MIDDLEWARE = [
+    # First, so its timings cover the rest of the stack
+    "observability.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
@@ -341,12 +462,21 @@ LOGGING = {
             "format": "{levelname} {asctime} {module} {message}",
             "style": "{",
         },
+        # Request records are already JSON (see observability/middleware.py)
+        "structured": {
+            "format": "{message}",
+            "style": "{",
+        },
     },
     "handlers": {
         "console": {
             "class": "logging.StreamHandler",
             "formatter": "verbose",
         },
+        "requests": {
+            "class": "logging.StreamHandler",
+            "formatter": "structured",
+        },
     },
     "root": {
         "handlers": ["console"],
@@ -363,6 +493,15 @@ LOGGING = {
             "level": "ERROR",
             "propagate": False,
         },
+        "nexus.requests": {
+            "handlers": ["requests"],
+            "level": (
+                os.getenv("REQUEST_LOG_LEVEL", "INFO")
+                if IS_PRODUCTION
+                else "WARNING"
+            ),
+            "propagate": False,
+        },
     },
 }
 
@@ -396,3 +535,9 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=1),  # 1hr for social platforms
     "REFRESH_TOKEN_LIFETIME": timedelta(days=30),  # 30d for persistent login
 }
+
+# Let views marked trust_token_claims serve safe requests from the token
+# alone, without loading the user (see authentication/jwt.py)
+AUTH_TRUST_TOKEN_CLAIMS = os.getenv(
+    "AUTH_TRUST_TOKEN_CLAIMS", "False"
+).lower() in ["true", "1", "yes"]
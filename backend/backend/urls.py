@@ -28,9 +28,12 @@ urlpatterns = [
     path("api/auth/", include("authentication.urls")),
     path("api/", include("bookmarks.urls")),
     path("api/", include("notifications.urls")),
+    path("api/", include("blocks.urls")),
     path("api/search/", include("search.urls")),
     path("api/messages/", include("usermessages.urls")),
     path("api/communities/", include("communities.urls")),
     path("api/", include("account.urls")),
     path("api/users/", include("users.urls")),
+    path("api/cache/", include("caching.urls")),
+    path("api/metrics/", include("observability.urls")),
 ]
@@ -0,0 +1,152 @@
+"""
+API benchmarks: latency and SQL query budgets per endpoint.
+
+Skipped unless ``NEXUS_BENCHMARK=1``, so the normal test run is not
+slowed down. The dataset is generated once per database with
+``seed_data --scale``; with ``--reuse-db`` against a local PostgreSQL it
+is kept between runs.
+
+    NEXUS_BENCHMARK=1 pytest benchmarks
+    DATABASE_URL=postgres://localhost/nexus NEXUS_BENCHMARK=1 \\
+        pytest benchmarks --reuse-db
+
+Environment:
+    NEXUS_BENCHMARK          set to 1 to run the benchmarks
+    NEXUS_BENCHMARK_USERS    synthetic users (default 2000)
+    NEXUS_BENCHMARK_POSTS    synthetic posts (default 20000)
+    NEXUS_BENCHMARK_LIKES    synthetic likes (default 100000)
+    NEXUS_BENCHMARK_WORKERS  seeding processes (default 1)
+    NEXUS_BENCHMARK_ROUNDS   timed requests per endpoint (default 20)
+    NEXUS_BENCHMARK_BUDGETS  budget file (default benchmarks/budgets.json)
+    NEXUS_BENCHMARK_REPORT   write the measurements to this JSON file
+"""
+
+import io
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# backend/benchmarks/.. = backend
+sys.path.insert(0, str(Path(__file__).parent.parent.resolve()))
+
+ENABLED = os.getenv("NEXUS_BENCHMARK") == "1"
+BENCHMARK_DIR = Path(__file__).parent
+
+_results = {}
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def pytest_collection_modifyitems(config, items):
+    if ENABLED:
+        return
+    skip = pytest.mark.skip(reason="set NEXUS_BENCHMARK=1 to run")
+    for item in items:
+        if BENCHMARK_DIR in Path(str(item.fspath)).parents:
+            item.add_marker(skip)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _results:
+        return
+    terminalreporter.section("API benchmarks")
+    terminalreporter.write_line(
+        f"{'endpoint':<24}{'p50 ms':>10}{'p95 ms':>10}{'queries':>10}"
+    )
+    for name, result in _results.items():
+        terminalreporter.write_line(
+            f"{name:<24}{result['p50_ms']:>10.1f}"
+            f"{result['p95_ms']:>10.1f}{result['queries']:>10}"
+        )
+    report = os.getenv("NEXUS_BENCHMARK_REPORT")
+    if report:
+        Path(report).write_text(json.dumps(_results, indent=2) + "\n")
+
+
+@pytest.fixture(scope="session")
+def budgets():
+    path = os.getenv(
+        "NEXUS_BENCHMARK_BUDGETS", str(BENCHMARK_DIR / "budgets.json")
+    )
+    return json.loads(Path(path).read_text())
+
+
+@pytest.fixture(scope="session")
+def results():
+    return _results
+
+
+@pytest.fixture(scope="session")
+def dataset(django_db_setup, django_db_blocker):
+    """Seed the benchmark database once and pick the viewing user"""
+    from django.core.management import call_command
+    from posts.models import Post
+
+    with django_db_blocker.unblock():
+        if not Post.objects.exists():
+            call_command(
+                "seed_data",
+                scale=True,
+                users=_env_int("NEXUS_BENCHMARK_USERS", 2000),
+                posts=_env_int("NEXUS_BENCHMARK_POSTS", 20000),
+                likes=_env_int("NEXUS_BENCHMARK_LIKES", 100000),
+                workers=_env_int("NEXUS_BENCHMARK_WORKERS", 1),
+                stdout=io.StringIO(),
+            )
+        return _viewer_data()
+
+
+def _viewer_data():
+    """The most-following user, with bookmarks and notifications"""
+    from bookmarks.models import Bookmark
+    from notifications.models import Notification
+    from notifications.unread import count_new
+    from posts.models import Hashtag, Post
+    from users.models import UserProfile
+
+    viewer = (
+        UserProfile.objects.select_related("user")
+        .order_by("-following_count", "user_id")
+        .first()
+        .user
+    )
+    popular = list(
+        Post.objects.filter(parent_post__isnull=True)
+        .order_by("-like_count", "-id")
+        .values_list("id", flat=True)[:100]
+    )
+    if not Bookmark.objects.filter(user=viewer).exists():
+        Bookmark.objects.bulk_create(
+            [Bookmark(user=viewer, post_id=pk) for pk in popular]
+        )
+    if not Notification.objects.filter(user=viewer).exists():
+        count_new(
+            Notification.objects.bulk_create(
+                [
+                    Notification(
+                        user=viewer,
+                        actor_id=actor_id,
+                        verb="liked your post",
+                        target_type="post",
+                        target_id=popular[i % 10],
+                    )
+                    for i, actor_id in enumerate(
+                        UserProfile.objects.exclude(user=viewer)
+                        .order_by("user_id")
+                        .values_list("user_id", flat=True)[:200]
+                    )
+                ]
+            )
+        )
+    thread = (
+        Post.objects.filter(parent_post__isnull=True)
+        .order_by("-reply_count", "id")
+        .first()
+    )
+    tag = Hashtag.objects.order_by("-use_count", "id").first().tag
+    return {"viewer": viewer, "thread_id": thread.pk, "tag": tag}
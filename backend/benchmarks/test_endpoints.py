@@ -0,0 +1,79 @@
+"""
+Latency and query-count budgets of the hot read endpoints.
+
+Each endpoint is requested a few times untimed (to fill the caches a
+production process would have warm), then ``NEXUS_BENCHMARK_ROUNDS``
+times while recording wall time and SQL queries. The test fails when
+the p95 latency or the largest query count exceeds the endpoint's
+entry in the budget file.
+"""
+
+import os
+import statistics
+import time
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+WARMUP = 2
+
+ENDPOINTS = {
+    "home": lambda data: "/api/posts/home/",
+    "list": lambda data: "/api/posts/",
+    "list_top": lambda data: "/api/posts/?ordering=-like_count",
+    "list_hashtag": lambda data: f"/api/posts/?hashtag={data['tag']}",
+    "thread": lambda data: f"/api/posts/{data['thread_id']}/thread/",
+    "trending_hashtags": lambda data: "/api/posts/trending_hashtags/",
+    "search": lambda data: "/api/search/?q=code",
+    "notifications": lambda data: "/api/notifications/",
+    "notifications_grouped": lambda data: "/api/notifications/?grouped=1",
+    "bookmarks": lambda data: "/api/bookmarks/",
+}
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    index = max(0, round(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def measure(client, url, rounds):
+    for _ in range(WARMUP):
+        assert client.get(url).status_code == 200
+    timings, queries = [], []
+    for _ in range(rounds):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.content[:200]
+        queries.append(len(ctx.captured_queries))
+    return {
+        "rounds": rounds,
+        "p50_ms": statistics.median(timings),
+        "p95_ms": _percentile(timings, 95),
+        "queries": max(queries),
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", list(ENDPOINTS))
+def test_endpoint_within_budget(name, dataset, budgets, results):
+    client = APIClient()
+    client.force_authenticate(user=dataset["viewer"])
+    rounds = int(os.getenv("NEXUS_BENCHMARK_ROUNDS", 20))
+
+    result = measure(client, ENDPOINTS[name](dataset), rounds)
+    results[name] = result
+
+    budget = budgets[name]
+    assert result["queries"] <= budget["max_queries"], (
+        f"{name}: {result['queries']} queries, "
+        f"budget {budget['max_queries']}"
+    )
+    assert result["p95_ms"] <= budget["p95_ms"], (
+        f"{name}: p95 {result['p95_ms']:.1f} ms, "
+        f"budget {budget['p95_ms']} ms"
+    )
@@ -0,0 +1,28 @@
+"""
+Query plans of the hot post queries on the benchmark dataset.
+
+Fails when a feed query stops using its partial index over live posts
+(see ``Post.Meta``), e.g. after an index change or on a database whose
+planner prefers a scan. ``manage.py explain_post_indexes`` prints the
+same plans with timings and index sizes.
+"""
+
+import pytest
+from posts.explain import HOT_QUERIES, explain, samples, used_indexes
+
+EXPECTED = {
+    "list": {"post_live_created_idx"},
+    "user_timeline": {"post_live_user_idx"},
+    "home_fanout_on_read": {"post_live_user_idx", "post_live_created_idx"},
+    "replies": {"post_live_reply_idx"},
+    "hashtag": {"posthashtag_timeline_idx"},
+    "viewer_retweets": {"post_live_user_idx", "post_live_retweet_idx"},
+    "purge_scan": {"post_deleted_idx"},
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_query_uses_live_index(name, dataset):
+    plan = explain(HOT_QUERIES[name](samples()))
+    assert EXPECTED[name] & set(used_indexes(plan)), plan
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BlocksConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "blocks"
+
+    def ready(self):
+        # Connect signal receivers
+        from . import service  # noqa: F401
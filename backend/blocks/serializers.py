@@ -8,3 +8,8 @@ class BlockSerializer(serializers.ModelSerializer):
         model = Block
         fields = ["id", "blocker", "blocked", "created_at"]
         read_only_fields = ["blocker", "created_at"]
+
+    def validate_blocked(self, value):
+        if value == self.context["request"].user:
+            raise serializers.ValidationError("You cannot block yourself.")
+        return value
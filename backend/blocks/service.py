@@ -0,0 +1,125 @@
+"""
+Per-viewer block sets.
+
+A block hides both accounts from each other, so every read path needs
+the set of users on either side of the viewer's blocks. ``blocked_ids()``
+loads it with one query and keeps it in the ``blocks`` object cache
+(empty sets included, so most viewers cost one cache read); saving or
+deleting a ``Block`` invalidates both users' entries.
+
+The set is applied as a plain ``NOT IN (...)`` on the author columns
+(``exclude_blocked()``), which the existing indexes answer without a
+join, or as a mask over rows that were already fetched (``mask()``,
+``visible()``), e.g. IDs from the timeline store or the search index.
+Block sets are small, so both are cheap; an empty set adds nothing.
+
+Settings:
+    OBJECT_CACHE_TIMEOUTS["blocks"]  TTL of cached block sets
+                                     (default 300s)
+"""
+
+from caching.store import ObjectCache
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Block
+
+EMPTY = frozenset()
+
+
+def _load(user_id):
+    pairs = Block.objects.filter(
+        Q(blocker_id=user_id) | Q(blocked_id=user_id)
+    ).values_list("blocker_id", "blocked_id")
+    return frozenset(
+        blocked if blocker == user_id else blocker
+        for blocker, blocked in pairs
+    )
+
+
+block_cache = ObjectCache(
+    "blocks",
+    _load,
+    timeout=getattr(settings, "OBJECT_CACHE_TIMEOUTS", {}).get("blocks", 300),
+)
+
+
+def blocked_ids(user):
+    """IDs of the users ``user`` blocked or was blocked by"""
+    if user is None or not user.is_authenticated:
+        return EMPTY
+    return block_cache.get_or_load(user.pk)
+
+
+def is_blocked(user, other_id):
+    """True if a block exists between ``user`` and ``other_id``"""
+    return other_id in blocked_ids(user)
+
+
+def exclude_blocked(queryset, user, *fields):
+    """``queryset`` without rows whose ``fields`` point at blocked users"""
+    ids = blocked_ids(user)
+    if not ids:
+        return queryset
+    for field in fields:
+        queryset = queryset.exclude(**{f"{field}__in": ids})
+    return queryset
+
+
+def visible(post, ids):
+    """False for posts by, or retweeting, a user in ``ids``"""
+    if post.user_id in ids:
+        return False
+    original = post.retweet_of
+    return original is None or original.user_id not in ids
+
+
+def mask(items, user, key=None):
+    """
+    Drop already-fetched items hidden from ``user``.
+
+    ``key`` maps an item to its author ID; posts are checked with
+    ``visible()``.
+    """
+    ids = blocked_ids(user)
+    if not ids:
+        return list(items)
+    if key is None:
+        return [item for item in items if visible(item, ids)]
+    return [item for item in items if key(item) not in ids]
+
+
+def block(blocker, blocked_id):
+    """Block ``blocked_id`` and remove the follows in both directions"""
+    from posts.models import Follow
+
+    with transaction.atomic():
+        instance = Block.objects.get_or_create(
+            blocker=blocker, blocked_id=blocked_id
+        )[0]
+        # post_delete still fires per row: counts and timelines follow
+        Follow.objects.filter(
+            Q(follower=blocker, following_id=blocked_id)
+            | Q(follower_id=blocked_id, following=blocker)
+        ).delete()
+    return instance
+
+
+# =============================================================================
+# SIGNALS
+# =============================================================================
+
+
+def invalidate(*user_ids):
+    block_cache.invalidate(*user_ids)
+    # Again after commit, in case a request cached the old set meanwhile
+    transaction.on_commit(lambda: block_cache.invalidate(*user_ids))
+
+
+@receiver(post_save, sender=Block)
+@receiver(post_delete, sender=Block)
+def invalidate_on_block(sender, instance, **kwargs):
+    invalidate(instance.blocker_id, instance.blocked_id)
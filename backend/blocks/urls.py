@@ -0,0 +1,12 @@
+from django.urls import path
+
+from .views import BlockDeleteView, BlockListCreateView
+
+urlpatterns = [
+    path("blocks/", BlockListCreateView.as_view(), name="block-list"),
+    path(
+        "blocks/<int:user_id>/",
+        BlockDeleteView.as_view(),
+        name="block-delete",
+    ),
+]
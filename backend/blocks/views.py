@@ -1,11 +1,41 @@
-from rest_framework import generics, permissions
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
 
+from . import service
+from .models import Block
 from .serializers import BlockSerializer
 
 
-class BlockCreateView(generics.CreateAPIView):
+class BlockListCreateView(generics.ListCreateAPIView):
+    """The users the caller blocked; POST blocks one more"""
+
+    serializer_class = BlockSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Block.objects.filter(blocker=self.request.user).order_by(
+            "-created_at"
+        )
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        block = service.block(
+            request.user, serializer.validated_data["blocked"].pk
+        )
+        return Response(
+            self.get_serializer(block).data, status=status.HTTP_201_CREATED
+        )
+
+
+class BlockDeleteView(generics.DestroyAPIView):
+    """Unblock the user in the URL"""
+
     serializer_class = BlockSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-    def perform_create(self, serializer):
-        serializer.save(blocker=self.request.user)
+    def get_object(self):
+        return get_object_or_404(
+            Block, blocker=self.request.user, blocked_id=self.kwargs["user_id"]
+        )
@@ -0,0 +1,41 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def recount_bookmarks(apps, schema_editor):
+    """
+    Fill ``Post.bookmark_count`` from the bookmark rows, as
+    ``reconcile_post_counts`` does; the signals only keep it in step
+    from here on.
+    """
+    Bookmark = apps.get_model("bookmarks", "Bookmark")
+    Post = apps.get_model("posts", "Post")
+    Post.objects.update(
+        bookmark_count=Coalesce(
+            Subquery(
+                Bookmark.objects.filter(post=OuterRef("pk"))
+                .order_by()
+                .values("post")
+                .annotate(n=Count("pk"))
+                .values("n"),
+                output_field=IntegerField(),
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("bookmarks", "0001_initial"),
+        (
+            "posts",
+            "0004_hashtag_mention_posthashtag_alter_post_options_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_bookmarks, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from posts.counters import increment
 from posts.models import Post
 
 
@@ -20,3 +23,21 @@ class Bookmark(models.Model):
 
     def __str__(self):
         return f"{self.user.username} bookmarked Post {self.post.id}"
+
+
+# =============================================================================
+# SIGNALS FOR DENORMALIZED COUNT UPDATES
+# =============================================================================
+
+
+@receiver(post_save, sender=Bookmark)
+def update_bookmark_count_on_create(sender, instance, created, **kwargs):
+    """Update post's bookmark_count when a bookmark is created"""
+    if created:
+        increment(instance.post_id, "bookmark_count", 1)
+
+
+@receiver(post_delete, sender=Bookmark)
+def update_bookmark_count_on_delete(sender, instance, **kwargs):
+    """Update post's bookmark_count when a bookmark is deleted"""
+    increment(instance.post_id, "bookmark_count", -1)
@@ -6,6 +6,20 @@ from rest_framework import serializers
 from .models import Bookmark
 
 
+class BookmarkListSerializer(serializers.ListSerializer):
+    """Resolve viewer state for every bookmarked post on the page at once"""
+
+    def to_representation(self, data):
+        from posts.counters import resolve_pending_into_context
+        from posts.viewer_state import resolve_into_context
+
+        bookmarks = list(data.all() if hasattr(data, "all") else data)
+        post_ids = [bookmark.post_id for bookmark in bookmarks]
+        resolve_into_context(self.context, post_ids)
+        resolve_pending_into_context(self.context, post_ids)
+        return super().to_representation(bookmarks)
+
+
 class BookmarkSerializer(serializers.ModelSerializer):
     """
     Serializer for creating and listing bookmarks.
@@ -18,6 +32,7 @@ class BookmarkSerializer(serializers.ModelSerializer):
     class Meta:
         model = Bookmark
         fields = ["id", "post", "post_id", "created_at"]
+        list_serializer_class = BookmarkListSerializer
         read_only_fields = ["id", "created_at"]
 
     # -----------------------------------
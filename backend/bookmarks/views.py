@@ -3,6 +3,8 @@ from rest_framework import status, viewsets
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from backend.pagination import KeysetPagination
+
 from .models import Bookmark
 from .serializers import BookmarkSerializer
 
@@ -27,12 +29,17 @@ from .serializers import BookmarkSerializer
 class BookmarkViewSet(viewsets.ModelViewSet):
     serializer_class = BookmarkSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
     http_method_names = ["get", "post", "delete"]  # No PUT/PATCH
     lookup_field = "id"
 
     def get_queryset(self):
         """Return only current user's bookmarks"""
-        return Bookmark.objects.filter(user=self.request.user)
+        from posts.views import with_post_relations
+
+        return with_post_relations(
+            Bookmark.objects.filter(user=self.request.user), prefix="post__"
+        )
 
     def create(self, request, *args, **kwargs):
         """Create bookmark with current user and return the bookmark data"""
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class CachingConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "caching"
+
+    def ready(self):
+        # Connect signal receivers
+        from . import objects  # noqa: F401
@@ -0,0 +1,170 @@
+"""
+Caches for the hot read endpoints and the signals that invalidate them.
+
+    post       Post detail: the ``Post`` instance with the relations that
+               PostSerializer reads (viewer-specific flags are resolved
+               per request on top of it)
+    user       Public profile payload (User + UserProfile) by username
+    auth_user  ``User`` with its profile by ID, for authenticating requests
+               (see authentication/jwt.py); the password hash and the
+               profile's tokens are left out (the cache may be files on
+               disk) and load from the database if read
+    trending   Precomputed trending lists by window (see posts.trending)
+
+Counter columns are bumped with ``UPDATE ... F()`` statements that fire
+no ``post_save``, so the receivers below invalidate the affected posts
+from the signals that trigger those updates. Code that changes cached
+rows with ``QuerySet.update()`` must call ``invalidate()`` itself.
+"""
+
+from bookmarks.models import Bookmark
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from posts.models import Like, Post, post_soft_deleted
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from users.models import UserProfile
+
+from .store import ObjectCache
+
+
+def _timeout(name, default):
+    return getattr(settings, "OBJECT_CACHE_TIMEOUTS", {}).get(name, default)
+
+
+def _load_post(pk):
+    from posts.views import with_post_relations
+
+    return (
+        with_post_relations(Post.objects.filter(is_deleted=False))
+        .filter(pk=pk)
+        .first()
+    )
+
+
+def _load_user(username):
+    from users.serializers import PublicUserSerializer
+
+    user = (
+        User.objects.filter(username=username)
+        .select_related("profile")
+        .first()
+    )
+    if user is None:
+        return None
+    return PublicUserSerializer(user).data
+
+
+PROFILE_SECRETS = ("reset_token", "email_verification_key")
+
+
+def _load_auth_user(pk):
+    user = (
+        User.objects.select_related("profile")
+        .defer(*(f"profile__{name}" for name in PROFILE_SECRETS))
+        .filter(pk=pk)
+        .first()
+    )
+    if user is None:
+        return None
+    # Token revocation only compares this digest. Deleting the loaded
+    # value defers the field again, so saving the user never writes it.
+    user.password_digest = get_md5_hash_password(user.password)
+    del user.password
+    return user
+
+
+post_cache = ObjectCache(
+    "post", _load_post, timeout=_timeout("post", 300), version=2
+)
+user_cache = ObjectCache("user", _load_user, timeout=_timeout("user", 300))
+auth_user_cache = ObjectCache(
+    "auth_user", _load_auth_user, timeout=_timeout("auth_user", 60), version=2
+)
+trending_cache = ObjectCache("trending", timeout=None)
+
+
+# =============================================================================
+# SIGNALS
+# =============================================================================
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_on_save(sender, instance, **kwargs):
+    # Creating a reply, retweet or quote bumps a counter on its target
+    post_cache.invalidate(
+        instance.pk, instance.parent_post_id, instance.retweet_of_id
+    )
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_soft_deleted, sender=Post)
+def invalidate_post_on_delete(sender, instance, **kwargs):
+    post_cache.invalidate(
+        instance.pk, instance.parent_post_id, instance.retweet_of_id
+    )
+
+
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+@receiver(post_save, sender=Bookmark)
+@receiver(post_delete, sender=Bookmark)
+def invalidate_post_on_like(sender, instance, **kwargs):
+    post_cache.invalidate(instance.post_id)
+
+
+@receiver(pre_save, sender=User)
+def invalidate_user_on_rename(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None:
+        return
+    if update_fields is not None and "username" not in update_fields:
+        return  # e.g. last_login updates
+    previous = (
+        User.objects.filter(pk=instance.pk)
+        .values_list("username", flat=True)
+        .first()
+    )
+    if previous != instance.username:
+        user_cache.invalidate(previous)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and "username" not in update_fields:
+        return
+    user_cache.invalidate(instance.username)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_user_on_profile_change(sender, instance, **kwargs):
+    if UserProfile.user.is_cached(instance):
+        username = instance.user.username
+    else:
+        username = (
+            User.objects.filter(pk=instance.user_id)
+            .values_list("username", flat=True)
+            .first()
+        )
+    user_cache.invalidate(username)
+
+
+def invalidate_auth_user(*user_ids):
+    auth_user_cache.invalidate(*user_ids)
+    # Again after commit, in case a request cached the old row meanwhile
+    transaction.on_commit(lambda: auth_user_cache.invalidate(*user_ids))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_user_on_change(sender, instance, **kwargs):
+    invalidate_auth_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_auth_user_on_profile_change(sender, instance, **kwargs):
+    invalidate_auth_user(instance.user_id)
@@ -0,0 +1,114 @@
+"""
+Object caches on top of Django's cache framework.
+
+An ``ObjectCache`` is a named namespace of cached objects (model
+snapshots, serialized payloads, precomputed lists) addressed by an
+identifier. Keys are versioned: bumping ``version`` when the shape of a
+cached payload changes makes old entries unreachable, so a deploy never
+reads objects written by the previous code.
+
+The backend is whatever ``CACHES["default"]`` points to (local memory,
+file-based or a networked cache), so the caches themselves never change
+when the backend does. Hits, misses, writes and invalidations are
+counted per cache and process and reported by ``stats()``.
+"""
+
+import threading
+from collections import Counter
+
+from django.core.cache import cache
+
+_registry = {}
+_counters = {}
+_counters_lock = threading.Lock()
+
+_MISSING = object()
+
+
+class ObjectCache:
+    """Named, versioned cache of objects loaded by ``loader(ident)``"""
+
+    def __init__(self, name, loader=None, timeout=300, version=1):
+        self.name = name
+        self.loader = loader
+        self.timeout = timeout
+        self.version = version
+        _registry[name] = self
+        _counters.setdefault(name, Counter())
+
+    def key(self, ident):
+        return f"obj:{self.name}:v{self.version}:{ident}"
+
+    def _count(self, event, amount=1):
+        with _counters_lock:
+            _counters[self.name][event] += amount
+
+    def get(self, ident, default=None):
+        value = cache.get(self.key(ident), _MISSING)
+        if value is _MISSING:
+            self._count("misses")
+            return default
+        self._count("hits")
+        return value
+
+    def get_many(self, idents):
+        """``{ident: value}`` for the idents that are cached"""
+        keys = {self.key(ident): ident for ident in idents}
+        found = cache.get_many(keys)
+        self._count("hits", len(found))
+        self._count("misses", len(keys) - len(found))
+        return {keys[key]: value for key, value in found.items()}
+
+    def set(self, ident, value, timeout=_MISSING):
+        timeout = self.timeout if timeout is _MISSING else timeout
+        cache.set(self.key(ident), value, timeout)
+        self._count("sets")
+
+    def get_or_load(self, ident):
+        """
+        Return the cached object, loading and caching it on a miss.
+
+        ``None`` from the loader (e.g. a missing row) is returned but
+        not cached.
+        """
+        value = self.get(ident, _MISSING)
+        if value is _MISSING:
+            value = self.loader(ident)
+            if value is not None:
+                self.set(ident, value)
+        return value
+
+    def invalidate(self, *idents):
+        idents = [ident for ident in idents if ident is not None]
+        if idents:
+            cache.delete_many([self.key(ident) for ident in idents])
+            self._count("invalidations", len(idents))
+
+
+def stats():
+    """Per-cache counters for this process, with the hit rate"""
+    with _counters_lock:
+        snapshot = {name: dict(counter) for name, counter in _counters.items()}
+    report = {}
+    for name, counter in sorted(snapshot.items()):
+        hits = counter.get("hits", 0)
+        misses = counter.get("misses", 0)
+        lookups = hits + misses
+        report[name] = {
+            "hits": hits,
+            "misses": misses,
+            "sets": counter.get("sets", 0),
+            "invalidations": counter.get("invalidations", 0),
+            "hit_rate": round(hits / lookups, 4) if lookups else None,
+        }
+    return report
+
+
+def reset_stats():
+    with _counters_lock:
+        for counter in _counters.values():
+            counter.clear()
+
+
+def get_cache(name):
+    return _registry[name]
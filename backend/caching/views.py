@@ -0,0 +1,20 @@
+from django.conf import settings
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .store import stats
+
+
+class CacheStatsView(APIView):
+    """Hit/miss counters of the object caches (this worker process)"""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {
+                "backend": settings.CACHES["default"]["BACKEND"],
+                "caches": stats(),
+            }
+        )
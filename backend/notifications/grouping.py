@@ -0,0 +1,70 @@
+"""
+Grouped notification listing.
+
+Notifications sharing a recipient, verb and target ("liked your post" on
+post 7) are shown as one entry: the newest row of the group stands for
+it, so the list pages over real rows with the usual keyset cursor. The
+size, actor total and unread state of the groups on a page are then
+loaded with one aggregate query. Both only look at the rows of the
+queryset they are given, so rows the list hides (e.g. from blocked
+actors) neither hide their group nor count towards it.
+"""
+
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+
+from .models import Notification
+
+
+def group_key(notification):
+    return (
+        notification.verb,
+        notification.target_type,
+        notification.target_id,
+    )
+
+
+def newest_of_groups(queryset):
+    """Rows of ``queryset`` with no newer row of their group in it"""
+    newer = queryset.filter(
+        user_id=OuterRef("user_id"),
+        target_id=OuterRef("target_id"),
+        verb=OuterRef("verb"),
+        target_type=OuterRef("target_type"),
+        id__gt=OuterRef("id"),
+    )
+    # Rows without a target never match (NULL = NULL is not true), so
+    # each of them is its own group
+    return queryset.exclude(Exists(newer))
+
+
+def group_stats(notifications, queryset=None):
+    """
+    ``{group_key: stats}`` for the groups of a page of notifications,
+    counting the rows of ``queryset`` (all notifications by default).
+    """
+    if queryset is None:
+        queryset = Notification.objects.all()
+    grouped = [n for n in notifications if n.target_id is not None]
+    if not grouped:
+        return {}
+    keys = Q()
+    for notification in grouped:
+        keys |= Q(
+            verb=notification.verb,
+            target_type=notification.target_type,
+            target_id=notification.target_id,
+        )
+    rows = (
+        queryset.filter(keys, user_id=grouped[0].user_id)
+        .values("verb", "target_type", "target_id")
+        .annotate(
+            size=Count("id"),
+            actors=Sum("actor_count"),
+            unread=Count("id", filter=Q(is_read=False)),
+        )
+        .order_by()
+    )
+    return {
+        (row["verb"], row["target_type"], row["target_id"]): row
+        for row in rows
+    }
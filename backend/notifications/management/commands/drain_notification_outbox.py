@@ -0,0 +1,50 @@
+"""
+Deliver queued notification events (see notifications/outbox.py).
+
+Request processes drain the outbox themselves; run this to deliver
+events left behind by a process that stopped before draining, or as a
+dedicated worker with --interval.
+
+Run with: python manage.py drain_notification_outbox [--batch-size N]
+          [--interval SECONDS]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from notifications.outbox import drain
+
+
+class Command(BaseCommand):
+    help = "Turn queued notification events into notifications."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Events delivered per transaction (default: 500)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Keep running, draining every INTERVAL seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            delivered = self.drain(options["batch_size"])
+            if options["interval"] is None:
+                break
+            if delivered:
+                self.stdout.write(f"Delivered {delivered} events.")
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Delivered {delivered} events."))
+
+    def drain(self, batch_size):
+        delivered = 0
+        while True:
+            drained = drain(batch_size)
+            delivered += drained
+            if drained < batch_size:
+                return delivered
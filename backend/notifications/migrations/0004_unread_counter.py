@@ -0,0 +1,68 @@
+# Generated by Django 5.2.8 on 2026-10-17 05:04
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_unread_counters(apps, schema_editor):
+    """One counter row per user with unread notifications"""
+    Notification = apps.get_model("notifications", "Notification")
+    Counter = apps.get_model("notifications", "UnreadNotificationCounter")
+
+    rows = (
+        Notification.objects.filter(is_read=False)
+        .values("user_id")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    Counter.objects.bulk_create(
+        (Counter(user_id=row["user_id"], count=row["n"]) for row in rows),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("notifications", "0003_notification_outbox"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UnreadNotificationCounter",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="unread_notifications",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "is_read", "created_at"],
+                name="notificatio_user_id_8a7c6b_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "target_id", "verb"],
+                name="notificatio_user_id_e5b983_idx",
+            ),
+        ),
+        migrations.RunPython(
+            backfill_unread_counters, migrations.RunPython.noop
+        ),
+    ]
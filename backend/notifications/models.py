@@ -6,6 +6,12 @@ from django.db import models
 class Notification(models.Model):
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Unread listing and mark-read range updates
+            models.Index(fields=["user", "is_read", "created_at"]),
+            # Grouped listing: rows sharing a verb and target
+            models.Index(fields=["user", "target_id", "verb"]),
+        ]
 
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="notifications"
@@ -21,5 +27,48 @@ class Notification(models.Model):
     )  # "liked your post" / "followed you"
     target_id = models.IntegerField(null=True, blank=True)
     target_type = models.CharField(max_length=50, null=True, blank=True)
+    # Distinct actors folded into this row ("actor and N others ...")
+    actor_count = models.PositiveIntegerField(default=1)
     is_read = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+
+
+class UnreadNotificationCounter(models.Model):
+    """
+    Denormalized number of unread notifications of a user.
+
+    Maintained by ``notifications.unread``; change ``is_read`` through its
+    functions so the counter stays in step.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="unread_notifications",
+    )
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.count} unread"
+
+
+class NotificationEvent(models.Model):
+    """
+    Outbox row for a notification that has not been delivered yet.
+
+    Written in the request's transaction and turned into ``Notification``
+    rows in batches by ``notifications.outbox``.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    actor = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, related_name="+"
+    )
+    verb = models.CharField(max_length=255)
+    target_id = models.IntegerField(null=True, blank=True)
+    target_type = models.CharField(max_length=50, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.actor_id} {self.verb} -> {self.user_id}"
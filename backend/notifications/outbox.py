@@ -0,0 +1,228 @@
+"""
+Asynchronous notification delivery through a database outbox.
+
+Request handlers call ``enqueue()``, which only INSERTs a
+``NotificationEvent`` row in the request's transaction. Once it commits, a
+small in-process thread pool drains the outbox: events are claimed in
+batches (``SELECT ... FOR UPDATE SKIP LOCKED`` where supported), turned
+into ``Notification`` rows with one ``bulk_create`` and pushed to open
+streams. No external broker is needed, and events left behind by a
+crashed process are picked up by the next drain in any process or by the
+``drain_notification_outbox`` command.
+
+Events with the same recipient, verb and target are coalesced: within a
+batch they become one notification, and they are folded into an unread
+notification created less than ``NOTIFICATION_COALESCE_SECONDS`` ago
+("X and 12 others liked your post"). The folded row keeps its ID but
+moves to the top of the list with a new ``created_at``, is unread again
+and is re-sent to open streams, which replace the older version.
+``actor_count`` counts distinct
+actors within a batch; across batches a repeat by the latest actor is
+not counted twice, older repeats are.
+
+Settings:
+    NOTIFICATION_OUTBOX_ASYNC       drain in background threads; when off,
+                                    events are delivered inline
+    NOTIFICATION_OUTBOX_WORKERS     drain threads per process
+    NOTIFICATION_OUTBOX_BATCH_SIZE  events claimed per transaction
+    NOTIFICATION_COALESCE_SECONDS   age up to which unread rows absorb
+                                    new events
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from blocks.service import is_blocked
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Notification, NotificationEvent
+from .streaming import publish
+from .unread import count_new, increment
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _key(row):
+    return (row.user_id, row.verb, row.target_type, row.target_id)
+
+
+# =============================================================================
+# ENQUEUE
+# =============================================================================
+
+
+def enqueue(user, actor, verb, target_type=None, target_id=None):
+    """Queue one notification for ``user``"""
+    enqueue_many(
+        [
+            NotificationEvent(
+                user=user,
+                actor=actor,
+                verb=verb,
+                target_type=target_type,
+                target_id=target_id,
+            )
+        ]
+    )
+
+
+def enqueue_many(events):
+    """Queue unsaved ``NotificationEvent`` instances with one INSERT"""
+    # Blocks are mutual, so the actor's block set covers both directions
+    events = [
+        event for event in events if not is_blocked(event.actor, event.user_id)
+    ]
+    if not events:
+        return
+    NotificationEvent.objects.bulk_create(events)
+    if _setting("NOTIFICATION_OUTBOX_ASYNC", False):
+        transaction.on_commit(schedule)
+    else:
+        drain_all()
+
+
+# =============================================================================
+# DRAIN
+# =============================================================================
+
+
+def drain(batch_size=None):
+    """Deliver up to ``batch_size`` queued events; returns how many"""
+    batch_size = batch_size or _setting("NOTIFICATION_OUTBOX_BATCH_SIZE", 500)
+    with transaction.atomic():
+        events = list(
+            NotificationEvent.objects.select_for_update(
+                skip_locked=True, of=("self",)
+            )
+            .select_related("actor")
+            .order_by("id")[:batch_size]
+        )
+        if not events:
+            return 0
+        users = {event.actor_id: event.actor for event in events}
+
+        groups = {}
+        for event in events:
+            actors = groups.setdefault(_key(event), [])
+            if event.actor_id in actors:
+                actors.remove(event.actor_id)
+            actors.append(event.actor_id)  # latest actor last
+
+        cutoff = timezone.now() - timedelta(
+            seconds=_setting("NOTIFICATION_COALESCE_SECONDS", 86400)
+        )
+        unread = Notification.objects.filter(
+            user_id__in={key[0] for key in groups},
+            verb__in={key[1] for key in groups},
+            is_read=False,
+            created_at__gte=cutoff,
+        ).order_by("id")
+        existing = {_key(row): row for row in unread}  # newest wins
+
+        now = timezone.now()
+        new, folded, reopened = [], [], {}
+        for key, actors in groups.items():
+            user_id, verb, target_type, target_id = key
+            current = existing.get(key)
+            if current is None:
+                new.append(
+                    Notification(
+                        user_id=user_id,
+                        actor=users[actors[-1]],
+                        verb=verb,
+                        target_type=target_type,
+                        target_id=target_id,
+                        actor_count=len(actors),
+                    )
+                )
+                continue
+            actors = [pk for pk in actors if pk != current.actor_id]
+            if not actors:
+                continue
+            rows = Notification.objects.filter(pk=current.pk)
+            rows.update(
+                actor_id=actors[-1],
+                actor_count=F("actor_count") + len(actors),
+                created_at=now,
+            )
+            # Marked read since it was loaded: unread again, count it
+            if rows.filter(is_read=True).update(is_read=False):
+                reopened[user_id] = reopened.get(user_id, 0) + 1
+            current.actor = users[actors[-1]]
+            current.actor_count += len(actors)
+            current.created_at = now
+            current.is_read = False
+            folded.append(current)
+
+        created = Notification.objects.bulk_create(new)
+        count_new(created)
+        increment(reopened)
+        NotificationEvent.objects.filter(
+            id__in=[event.id for event in events]
+        ).delete()
+        publish(created + folded)
+    return len(events)
+
+
+def drain_all():
+    """Deliver queued events until the outbox is empty"""
+    batch_size = _setting("NOTIFICATION_OUTBOX_BATCH_SIZE", 500)
+    delivered = 0
+    while True:
+        drained = drain(batch_size)
+        delivered += drained
+        if drained < batch_size:
+            return delivered
+
+
+# =============================================================================
+# WORKER POOL
+# =============================================================================
+
+
+_executor = None
+_scheduled = False
+_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_setting("NOTIFICATION_OUTBOX_WORKERS", 1),
+                thread_name_prefix="notification-outbox",
+            )
+    return _executor
+
+
+def schedule():
+    """Drain the outbox in the background (at most one queued run)"""
+    global _scheduled
+    with _lock:
+        if _scheduled:
+            return
+        _scheduled = True
+    get_executor().submit(_run)
+
+
+def _run():
+    global _scheduled
+    with _lock:
+        # Events enqueued from now on schedule another run
+        _scheduled = False
+    try:
+        drain_all()
+    except Exception:  # the rows stay queued for the next drain
+        logger.exception("Notification outbox drain failed")
+    finally:
+        close_old_connections()
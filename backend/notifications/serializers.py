@@ -11,10 +11,58 @@ class NotificationSerializer(serializers.ModelSerializer):
         fields = [
             "id",
             "actor_username",
+            "actor_count",
             "verb",
             "target_id",
             "target_type",
             "is_read",
             "created_at",
         ]
-        read_only_fields = ["actor_username", "created_at"]
+        read_only_fields = ["actor_username", "actor_count", "created_at"]
+
+
+class MarkAllReadSerializer(serializers.Serializer):
+    up_to = serializers.IntegerField(required=False, min_value=1)
+
+
+class GroupedNotificationListSerializer(serializers.ListSerializer):
+    """Load the stats of every group on the page at once"""
+
+    def to_representation(self, data):
+        from .grouping import group_stats
+
+        notifications = list(data.all() if hasattr(data, "all") else data)
+        self.context["groups"] = group_stats(
+            notifications, self.context.get("group_queryset")
+        )
+        return super().to_representation(notifications)
+
+
+class GroupedNotificationSerializer(NotificationSerializer):
+    """
+    The newest notification of a group, with ``group_size`` rows folded
+    in; ``actor_count`` and ``is_read`` describe the whole group.
+    """
+
+    group_size = serializers.SerializerMethodField()
+
+    class Meta(NotificationSerializer.Meta):
+        fields = NotificationSerializer.Meta.fields + ["group_size"]
+        list_serializer_class = GroupedNotificationListSerializer
+
+    def _stats(self, obj):
+        from .grouping import group_key
+
+        return self.context.get("groups", {}).get(group_key(obj))
+
+    def get_group_size(self, obj) -> int:
+        stats = self._stats(obj)
+        return stats["size"] if stats else 1
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        stats = self._stats(instance)
+        if stats:
+            data["actor_count"] = stats["actors"]
+            data["is_read"] = not stats["unread"]
+        return data
@@ -0,0 +1,354 @@
+"""
+Real-time notification delivery (Server-Sent Events).
+
+Clients open ``GET /api/notifications/stream/`` with an ``EventSource``
+and receive every new notification as an SSE event instead of polling
+the list endpoint. An idle connection is an ``asyncio.Queue`` parked in
+the in-process ``Hub``; it costs no database queries and, when served by
+an ASGI server, no thread.
+
+Delivery across worker processes goes through a pluggable backend
+(``NOTIFICATION_STREAM_BACKEND``):
+
+    LocalBackend            publishes straight into this process's hub;
+                            enough when a single process serves streams
+    DatabasePollingBackend  one thread per process polls the
+                            notification table for the users that have
+                            a stream open, so notifications created by
+                            any process reach every process (one query
+                            per interval, however many connections)
+
+A networked pub/sub (e.g. Redis) only needs ``publish()`` and
+``start()``.
+
+``EventSource`` cannot send an ``Authorization`` header, so browsers
+first ``POST /api/notifications/stream/ticket/`` with their access token
+and open the stream with ``?ticket=``. A ticket is signed, only opens a
+stream and expires after ``NOTIFICATION_STREAM_TICKET_MAX_AGE`` seconds,
+so the URLs that end up in access logs carry no usable credentials.
+
+Events carry the notification ID as the SSE ``id``. When a client
+reconnects, the browser sends it back as ``Last-Event-ID`` and missed
+notifications are replayed from the database; a client that falls too
+far behind is disconnected so that it catches up the same way.
+
+Settings:
+    NOTIFICATION_STREAM_BACKEND        dotted path of the backend class
+    NOTIFICATION_STREAM_HEARTBEAT      seconds between keep-alive comments
+    NOTIFICATION_STREAM_POLL_INTERVAL  seconds between polls (DB backend)
+    NOTIFICATION_STREAM_QUEUE_SIZE     events buffered per connection
+    NOTIFICATION_STREAM_TICKET_MAX_AGE seconds a stream ticket is valid
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.db import close_old_connections, transaction
+from django.db.models import Max
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import Notification
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+REPLAY_LIMIT = 100
+TICKET_SALT = "notifications.stream"
+
+_CLOSE = object()
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def serialize(notification):
+    """SSE payload for a notification"""
+    data = dict(NotificationSerializer(notification).data)
+    data["user_id"] = notification.user_id
+    return data
+
+
+def format_event(event):
+    payload = json.dumps(event, separators=(",", ":"), default=str)
+    return f"id: {event['id']}\nevent: notification\ndata: {payload}\n\n"
+
+
+# =============================================================================
+# HUB
+# =============================================================================
+
+
+class Subscription:
+    """One open stream: a bounded queue owned by an event loop"""
+
+    def __init__(self, user_id, loop, maxsize):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.sent = set()
+
+    def push(self, event):
+        # Runs on the subscription's event loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too far behind: end the stream, the client replays what it
+            # missed when it reconnects
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_CLOSE)
+
+    async def next(self, timeout):
+        """The next new event, or None after ``timeout`` seconds"""
+        while True:
+            try:
+                event = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return None
+            if event is _CLOSE:
+                return event
+            if self.mark_sent(event):
+                return event
+
+    def mark_sent(self, event):
+        """
+        Remember a delivered event; False if it was delivered before (by
+        the replay, or by a backend that re-reads recent rows). A
+        notification folded into since (see notifications.outbox) has a
+        new ``created_at`` and is delivered again.
+        """
+        version = (event["id"], event["created_at"])
+        if version in self.sent:
+            return False
+        self.sent.add(version)
+        if len(self.sent) > 1000:
+            newest = sorted(self.sent)[-500:]
+            self.sent = set(newest)
+        return True
+
+
+class Hub:
+    """In-process fan-out of events to the open streams of each user"""
+
+    def __init__(self):
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+
+    def subscribe(self, user_id):
+        subscription = Subscription(
+            user_id,
+            asyncio.get_running_loop(),
+            _setting("NOTIFICATION_STREAM_QUEUE_SIZE", 100),
+        )
+        with self.lock:
+            self.subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.user_id]
+
+    def user_ids(self):
+        with self.lock:
+            return set(self.subscriptions)
+
+    def connection_count(self):
+        with self.lock:
+            return sum(len(subs) for subs in self.subscriptions.values())
+
+    def dispatch(self, event):
+        """Deliver ``event`` to the user's streams; callable from any thread"""
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(event["user_id"], ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.push, event
+                )
+            except RuntimeError:
+                self.unsubscribe(subscription)  # its loop has closed
+
+
+hub = Hub()
+
+
+# =============================================================================
+# BACKENDS
+# =============================================================================
+
+
+class LocalBackend:
+    """Delivers to streams held by the publishing process only"""
+
+    def start(self, hub):
+        self.hub = hub
+
+    def publish(self, event):
+        self.hub.dispatch(event)
+
+
+class DatabasePollingBackend(LocalBackend):
+    """
+    Cross-process delivery by polling the notification table.
+
+    Local publishes are still dispatched immediately; the poller picks up
+    notifications created by other processes. Each poll re-reads a small
+    ID overlap so rows committed out of ID order are not missed, and
+    subscriptions drop the duplicates.
+    """
+
+    overlap = 50
+
+    def start(self, hub):
+        super().start(hub)
+        self.interval = _setting("NOTIFICATION_STREAM_POLL_INTERVAL", 1.0)
+        self.high_water = None
+        self.thread = threading.Thread(
+            target=self.run, name="notification-stream-poller", daemon=True
+        )
+        self.thread.start()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.poll()
+            except Exception:  # keep polling through transient DB errors
+                logger.exception("Notification stream poll failed")
+            finally:
+                close_old_connections()
+
+    def poll(self):
+        if self.high_water is None:
+            self.high_water = (
+                Notification.objects.aggregate(last=Max("id"))["last"] or 0
+            )
+        user_ids = self.hub.user_ids()
+        if not user_ids:
+            return
+        rows = (
+            Notification.objects.filter(
+                id__gt=self.high_water - self.overlap, user_id__in=user_ids
+            )
+            .select_related("actor")
+            .order_by("id")
+        )
+        for notification in rows:
+            self.hub.dispatch(serialize(notification))
+            self.high_water = max(self.high_water, notification.id)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = _setting(
+                    "NOTIFICATION_STREAM_BACKEND",
+                    "notifications.streaming.LocalBackend",
+                )
+                backend = import_string(path)()
+                backend.start(hub)
+                _backend = backend
+    return _backend
+
+
+def publish(notifications):
+    """Push notifications to open streams once the transaction commits"""
+    events = [serialize(notification) for notification in notifications]
+    if not events:
+        return
+
+    def send():
+        backend = get_backend()
+        for event in events:
+            backend.publish(event)
+
+    transaction.on_commit(send)
+
+
+# =============================================================================
+# STREAM
+# =============================================================================
+
+
+def ticket_max_age():
+    return _setting("NOTIFICATION_STREAM_TICKET_MAX_AGE", 60)
+
+
+def issue_ticket(user_id):
+    """A short-lived ticket that opens ``user_id``'s stream"""
+    return signing.TimestampSigner(salt=TICKET_SALT).sign(str(user_id))
+
+
+def redeem_ticket(ticket):
+    """The user ID a ticket was issued for, or None if invalid or expired"""
+    try:
+        user_id = signing.TimestampSigner(salt=TICKET_SALT).unsign(
+            ticket, max_age=ticket_max_age()
+        )
+    except signing.BadSignature:
+        return None
+    return int(user_id)
+
+
+def replay(user_id, after_id):
+    """Notifications the client missed since ``after_id``"""
+    rows = (
+        Notification.objects.filter(user_id=user_id, id__gt=after_id)
+        .select_related("actor")
+        .order_by("id")[:REPLAY_LIMIT]
+    )
+    return [serialize(notification) for notification in rows]
+
+
+async def event_stream(user_id, last_event_id=None):
+    """Async iterator of SSE chunks for one connection"""
+    get_backend()
+    subscription = hub.subscribe(user_id)
+    heartbeat = _setting("NOTIFICATION_STREAM_HEARTBEAT", 15)
+    try:
+        yield "retry: 3000\n: connected\n\n"
+        if last_event_id is not None:
+            for event in await sync_to_async(replay)(user_id, last_event_id):
+                subscription.mark_sent(event)
+                yield format_event(event)
+        while True:
+            event = await subscription.next(heartbeat)
+            if event is _CLOSE:
+                return
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield format_event(event)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+# =============================================================================
+# SIGNALS
+# =============================================================================
+
+
+@receiver(post_save, sender=Notification)
+def publish_on_create(sender, instance, created, **kwargs):
+    # bulk_create() skips this; callers use publish() themselves
+    if created:
+        publish([instance])
@@ -0,0 +1,94 @@
+"""
+Per-user unread notification counts.
+
+``UnreadNotificationCounter`` holds the number of unread notifications of
+each user, so the badge endpoint reads one row instead of counting the
+notification table. New notifications bump it (from ``post_save``, or
+explicitly after ``bulk_create``), and marking notifications read is a
+single conditional ``UPDATE ... WHERE is_read = false`` whose row count
+is subtracted, so concurrent requests cannot count a notification twice.
+"""
+
+from django.db.models import Case, F, When
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Notification, UnreadNotificationCounter
+
+
+def increment(counts):
+    """Add ``{user_id: n}`` to the users' unread counters"""
+    counts = {user_id: n for user_id, n in counts.items() if n}
+    if not counts:
+        return
+    UnreadNotificationCounter.objects.bulk_create(
+        [UnreadNotificationCounter(user_id=user_id) for user_id in counts],
+        ignore_conflicts=True,
+    )
+    UnreadNotificationCounter.objects.filter(user_id__in=counts).update(
+        count=F("count")
+        + Case(
+            *[When(user_id=user_id, then=n) for user_id, n in counts.items()],
+            default=0,
+        )
+    )
+
+
+def count_new(notifications):
+    """Count freshly created (e.g. bulk-created) notifications as unread"""
+    counts = {}
+    for notification in notifications:
+        if not notification.is_read:
+            user_id = notification.user_id
+            counts[user_id] = counts.get(user_id, 0) + 1
+    increment(counts)
+
+
+def unread_count(user):
+    return (
+        UnreadNotificationCounter.objects.filter(user=user)
+        .values_list("count", flat=True)
+        .first()
+        or 0
+    )
+
+
+def mark_read(user, ids=None, up_to=None):
+    """
+    Mark the user's unread notifications read; returns how many changed.
+
+    ``ids`` limits the update to those notifications and ``up_to`` to
+    notifications with an ID no greater than it (the newest one a client
+    has seen), so later arrivals stay unread.
+    """
+    rows = Notification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        rows = rows.filter(pk__in=ids)
+    if up_to is not None:
+        rows = rows.filter(pk__lte=up_to)
+    marked = rows.update(is_read=True)
+    if marked:
+        UnreadNotificationCounter.objects.filter(user=user).update(
+            count=F("count") - marked
+        )
+    return marked
+
+
+# =============================================================================
+# SIGNALS
+# =============================================================================
+
+
+@receiver(post_save, sender=Notification)
+def count_on_create(sender, instance, created, **kwargs):
+    # bulk_create() skips this; callers use count_new() themselves
+    if created and not instance.is_read:
+        increment({instance.user_id: 1})
+
+
+@receiver(post_delete, sender=Notification)
+def uncount_on_delete(sender, instance, **kwargs):
+    if not instance.is_read:
+        UnreadNotificationCounter.objects.filter(
+            user_id=instance.user_id
+        ).update(count=F("count") - 1)
@@ -1,6 +1,13 @@
 from django.urls import path
 
-from .views import NotificationListView, NotificationMarkReadView
+from .views import (
+    NotificationListView,
+    NotificationMarkAllReadView,
+    NotificationMarkReadView,
+    NotificationStreamTicketView,
+    NotificationUnreadCountView,
+    notification_stream,
+)
 
 urlpatterns = [
     path(
@@ -8,9 +15,29 @@ urlpatterns = [
         NotificationListView.as_view(),
         name="notification-list",
     ),
+    path(
+        "notifications/stream/",
+        notification_stream,
+        name="notification-stream",
+    ),
+    path(
+        "notifications/stream/ticket/",
+        NotificationStreamTicketView.as_view(),
+        name="notification-stream-ticket",
+    ),
     path(
         "notifications/mark-read/<int:pk>/",
         NotificationMarkReadView.as_view(),
         name="notification-mark-read",
     ),
+    path(
+        "notifications/mark-all-read/",
+        NotificationMarkAllReadView.as_view(),
+        name="notification-mark-all-read",
+    ),
+    path(
+        "notifications/unread-count/",
+        NotificationUnreadCountView.as_view(),
+        name="notification-unread-count",
+    ),
 ]
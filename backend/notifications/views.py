@@ -1,21 +1,76 @@
+from asgiref.sync import sync_to_async
+from blocks.service import exclude_blocked
+from django.contrib.auth.models import User
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
 
+from backend.pagination import KeysetPagination
+
+from .grouping import newest_of_groups
 from .models import Notification
-from .serializers import NotificationSerializer
+from .serializers import (
+    GroupedNotificationSerializer,
+    MarkAllReadSerializer,
+    NotificationSerializer,
+)
+from .streaming import (
+    event_stream,
+    issue_ticket,
+    redeem_ticket,
+    ticket_max_age,
+)
+from .unread import mark_read, unread_count
 
 
 class NotificationListView(generics.ListAPIView):
+    """
+    The user's notifications, newest first.
+
+    With ``?grouped=1`` notifications sharing a verb and target are
+    collapsed into their newest one (see notifications.grouping).
+    """
+
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    trust_token_claims = True  # only reads request.user.pk
 
-    def get_queryset(self):
-        return Notification.objects.filter(user=self.request.user).order_by(
-            "-created_at"
+    def is_grouped(self):
+        return self.request.query_params.get("grouped") in ("1", "true")
+
+    def get_serializer_class(self):
+        if self.is_grouped():
+            return GroupedNotificationSerializer
+        return NotificationSerializer
+
+    def visible_notifications(self):
+        return exclude_blocked(
+            Notification.objects.filter(user=self.request.user),
+            self.request.user,
+            "actor",
         )
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.is_grouped():
+            # Group stats count the same rows the list shows
+            context["group_queryset"] = self.visible_notifications()
+        return context
+
+    def get_queryset(self):
+        queryset = self.visible_notifications().select_related("actor")
+        if self.is_grouped():
+            queryset = newest_of_groups(queryset)
+        return queryset.order_by("-created_at")
 
-class NotificationMarkReadView(generics.UpdateAPIView):
+
+class NotificationMarkReadView(generics.GenericAPIView):
 
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
@@ -26,11 +81,121 @@ class NotificationMarkReadView(generics.UpdateAPIView):
         return self.patch(request, *args, **kwargs)
 
     def patch(self, request, *args, **kwargs):
-        obj = self.get_object()
-        if obj.user != request.user:
-            return Response(status=status.HTTP_403_FORBIDDEN)
-        obj.is_read = True
-        obj.save()
+        # One conditional UPDATE; the owner is only looked up on a miss
+        pk = kwargs["pk"]
+        if not mark_read(request.user, ids=[pk]):
+            owner_id = (
+                Notification.objects.filter(pk=pk)
+                .values_list("user_id", flat=True)
+                .first()
+            )
+            if owner_id is None:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+            if owner_id != request.user.pk:
+                return Response(status=status.HTTP_403_FORBIDDEN)
         return Response(
             {"message": "Marked as read"}, status=status.HTTP_200_OK
         )
+
+
+class NotificationMarkAllReadView(generics.GenericAPIView):
+    """
+    Mark all unread notifications read with one UPDATE.
+
+    ``up_to`` (a notification ID, usually the newest one the client has
+    shown) limits the update so notifications that arrived since stay
+    unread.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = MarkAllReadSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        marked = mark_read(
+            request.user, up_to=serializer.validated_data.get("up_to")
+        )
+        return Response(
+            {"marked": marked, "unread_count": unread_count(request.user)},
+            status=status.HTTP_200_OK,
+        )
+
+
+class NotificationUnreadCountView(generics.GenericAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+    trust_token_claims = True  # only reads request.user.pk
+
+    def get(self, request, *args, **kwargs):
+        return Response({"unread_count": unread_count(request.user)})
+
+
+class NotificationStreamTicketView(generics.GenericAPIView):
+    """
+    Ticket for opening the notification stream from an ``EventSource``,
+    which cannot send the access token in a header. Pass it as
+    ``?ticket=``; it expires after ``expires_in`` seconds.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    trust_token_claims = True  # only reads request.user.pk
+
+    def post(self, request, *args, **kwargs):
+        return Response(
+            {
+                "ticket": issue_ticket(request.user.pk),
+                "expires_in": ticket_max_age(),
+            }
+        )
+
+
+def _stream_user(request):
+    """
+    Authenticate a stream request by ``?ticket=`` (see
+    NotificationStreamTicketView) or by a JWT in the Authorization header.
+    """
+    ticket = request.GET.get("ticket")
+    if ticket:
+        user_id = redeem_ticket(ticket)
+        return User.objects.filter(pk=user_id).first() if user_id else None
+
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = header and auth.get_raw_token(header)
+    if not raw_token:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events stream of the user's new notifications.
+
+    Reconnecting clients send ``Last-Event-ID`` (or ``?last_event_id=``)
+    and get the notifications they missed first.
+    """
+    user = await sync_to_async(_stream_user)(request)
+    if user is None or not user.is_active:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    last_event_id = request.headers.get(
+        "Last-Event-ID", request.GET.get("last_event_id")
+    )
+    try:
+        last_event_id = int(last_event_id)
+    except (TypeError, ValueError):
+        last_event_id = None
+
+    response = StreamingHttpResponse(
+        event_stream(user.pk, last_event_id),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # no proxy buffering
+    return response
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class ObservabilityConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "observability"
+
+    def ready(self):
+        from .recorder import instrument_serializers
+
+        instrument_serializers()
@@ -0,0 +1,95 @@
+import json
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import recorder
+
+logger = logging.getLogger("nexus.requests")
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match.route
+
+
+class RequestMetricsMiddleware:
+    """
+    Record SQL count, DB time and serializer time per request.
+
+    Adds a ``Server-Timing`` header (shown in browser dev tools), logs one
+    JSON line per request to the ``nexus.requests`` logger and feeds the
+    per-view histograms served by the metrics endpoint.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, "OBSERVABILITY_ENABLED", True):
+            return self.get_response(request)
+
+        stats, token = recorder.start()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(
+                            recorder.record_query
+                        )
+                    )
+                response = self.get_response(request)
+        finally:
+            recorder.finish(token)
+
+        duration_ms = stats.elapsed() * 1000
+        view = _view_name(request)
+        recorder.metrics.observe(
+            view, stats, duration_ms, response.status_code
+        )
+        if getattr(settings, "OBSERVABILITY_SERVER_TIMING", True):
+            response["Server-Timing"] = self.server_timing(stats, duration_ms)
+        self.log(request, response, view, stats, duration_ms)
+        return response
+
+    @staticmethod
+    def server_timing(stats, duration_ms):
+        return ", ".join(
+            [
+                f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} '
+                'queries"',
+                f"serialize;dur={stats.serializer_time * 1000:.1f}",
+                f"total;dur={duration_ms:.1f}",
+            ]
+        )
+
+    @staticmethod
+    def log(request, response, view, stats, duration_ms):
+        slow_ms = getattr(settings, "OBSERVABILITY_SLOW_REQUEST_MS", 1000)
+        level = logging.WARNING if duration_ms > slow_ms else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        duplicates = stats.duplicates()
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "view": view,
+            "status": response.status_code,
+            "duration_ms": round(duration_ms, 1),
+            "queries": stats.queries,
+            "db_ms": round(stats.db_time * 1000, 1),
+            "serializer_ms": round(stats.serializer_time * 1000, 1),
+            "duplicate_queries": sum(duplicates.values()),
+        }
+        if duplicates:
+            record["duplicates"] = [
+                {"sql": sql[:200], "count": count}
+                for sql, count in sorted(
+                    duplicates.items(), key=lambda item: -item[1]
+                )[:3]
+            ]
+        logger.log(level, json.dumps(record, separators=(",", ":")))
@@ -0,0 +1,257 @@
+"""
+Per-request SQL and timing instrumentation.
+
+``RequestMetricsMiddleware`` opens a ``RequestStats`` for every request
+and installs ``record_query`` with ``connection.execute_wrapper()``, so
+every SQL statement the request runs is counted, timed and fingerprinted
+(literals and ``IN`` lists collapsed). A fingerprint seen several times in
+one request is usually an N+1. Time spent producing ``serializer.data``
+is measured by wrapping the DRF ``data`` properties (outermost call
+only, so nested serializers are not counted twice).
+
+Finished requests are folded into ``metrics``: per view, fixed-bucket
+histograms of latency and query count plus the most frequent duplicate
+fingerprints. The numbers are per worker process.
+
+Settings:
+    OBSERVABILITY_ENABLED             record requests at all
+    OBSERVABILITY_SERVER_TIMING       add the Server-Timing header
+    OBSERVABILITY_SLOW_REQUEST_MS     log requests slower than this at
+                                      WARNING instead of INFO
+    OBSERVABILITY_DUPLICATE_QUERIES   repeats of one fingerprint that
+                                      count as a duplicate
+"""
+
+import contextvars
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+TOP_DUPLICATES = 10
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def duplicate_threshold():
+    return _setting("OBSERVABILITY_DUPLICATE_QUERIES", 2)
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+
+
+def fingerprint(sql):
+    """``sql`` with literals and ``IN (...)`` lists collapsed"""
+    sql = _STRING.sub("%s", sql)
+    sql = _NUMBER.sub("%s", sql)
+    return _IN_LIST.sub("(%s...)", sql)
+
+
+class RequestStats:
+    """SQL and timing totals of one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.fingerprints = Counter()
+        self.in_serializer = False
+
+    def duplicates(self):
+        threshold = duplicate_threshold()
+        return {
+            sql: count
+            for sql, count in self.fingerprints.items()
+            if count >= threshold
+        }
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+def current():
+    """Stats of the request being handled, or None"""
+    return _current.get()
+
+
+def start():
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def finish(token):
+    _current.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` hook"""
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_time += time.perf_counter() - started
+        stats.queries += 1
+        stats.fingerprints[fingerprint(sql)] += 1
+
+
+# =============================================================================
+# SERIALIZERS
+# =============================================================================
+
+
+def _timed(prop):
+    def data(self):
+        stats = _current.get()
+        if stats is None or stats.in_serializer:
+            return prop.fget(self)
+        stats.in_serializer = True
+        started = time.perf_counter()
+        try:
+            return prop.fget(self)
+        finally:
+            stats.serializer_time += time.perf_counter() - started
+            stats.in_serializer = False
+
+    data.instrumented = True
+    return property(data, doc=prop.__doc__)
+
+
+def instrument_serializers():
+    from rest_framework.serializers import ListSerializer, Serializer
+
+    for cls in (Serializer, ListSerializer):
+        prop = cls.__dict__["data"]
+        if not getattr(prop.fget, "instrumented", False):
+            cls.data = _timed(prop)
+
+
+# =============================================================================
+# AGGREGATION
+# =============================================================================
+
+
+class Histogram:
+    """Counts per upper bound, plus a final overflow bucket"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile"""
+        if not self.total:
+            return None
+        rank = q * self.total
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None  # in the overflow bucket
+
+    def snapshot(self):
+        labels = [str(bound) for bound in self.bounds] + ["+Inf"]
+        return {
+            "buckets": dict(zip(labels, self.counts)),
+            "count": self.total,
+            "sum": round(self.sum, 3),
+            "mean": round(self.sum / self.total, 3) if self.total else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+        }
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.errors = 0
+        self.latency = Histogram(LATENCY_BUCKETS_MS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_ms = 0.0
+        self.serializer_ms = 0.0
+        self.duplicates = Counter()
+
+    def observe(self, stats, duration_ms, status_code):
+        if status_code >= 500:
+            self.errors += 1
+        self.latency.observe(duration_ms)
+        self.queries.observe(stats.queries)
+        self.db_ms += stats.db_time * 1000
+        self.serializer_ms += stats.serializer_time * 1000
+        duplicates = stats.duplicates()
+        if duplicates:
+            self.duplicates.update(duplicates)
+            if len(self.duplicates) > TOP_DUPLICATES * 5:
+                self.duplicates = Counter(
+                    dict(self.duplicates.most_common(TOP_DUPLICATES))
+                )
+
+    def snapshot(self):
+        requests = self.latency.total
+        return {
+            "requests": requests,
+            "errors": self.errors,
+            "latency_ms": self.latency.snapshot(),
+            "queries": self.queries.snapshot(),
+            "db_ms_mean": round(self.db_ms / requests, 3),
+            "serializer_ms_mean": round(self.serializer_ms / requests, 3),
+            "duplicate_queries": [
+                {"sql": sql, "count": count}
+                for sql, count in self.duplicates.most_common(TOP_DUPLICATES)
+            ],
+        }
+
+
+class Metrics:
+    """Thread-safe per-view aggregates for this process"""
+
+    def __init__(self):
+        self.views = {}
+        self.lock = threading.Lock()
+
+    def observe(self, view, stats, duration_ms, status_code):
+        with self.lock:
+            metrics = self.views.get(view)
+            if metrics is None:
+                metrics = self.views[view] = ViewMetrics()
+            metrics.observe(stats, duration_ms, status_code)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                view: metrics.snapshot()
+                for view, metrics in sorted(self.views.items())
+            }
+
+    def reset(self):
+        with self.lock:
+            self.views.clear()
+
+
+metrics = Metrics()
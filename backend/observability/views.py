@@ -0,0 +1,22 @@
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .recorder import metrics
+
+
+class RequestMetricsView(APIView):
+    """
+    Per-view latency and query histograms (this worker process).
+
+    ``DELETE`` clears them, e.g. before a load test.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({"views": metrics.snapshot()})
+
+    def delete(self, request):
+        metrics.reset()
+        return Response(status=204)
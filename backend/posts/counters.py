@@ -0,0 +1,236 @@
+"""
+Post engagement counters (likes, bookmarks, retweets, quotes, replies).
+
+By default every change is applied immediately with
+``UPDATE posts_post SET like_count = like_count + 1``. That serializes all
+writers of a viral post on one row lock, so with
+``POST_COUNTER_WRITE_BEHIND`` enabled changes are appended to
+``PostCounterDelta`` instead (an INSERT that takes no lock on the post)
+and ``flush()`` folds them into the post rows in batches, one UPDATE per
+post however many changes it received.
+
+Serializers add the pending deltas of the posts on a page (one query per
+page), so API counts stay exact between flushes. Sorting by a counter
+uses the stored column and may lag by one flush interval.
+
+Write-behind is off by default: enabling it requires running
+``flush_post_counters`` every few seconds (or with ``--interval`` as a
+long-running worker). ``reconcile_post_counts`` recomputes every counter
+from the ``Like``, ``Bookmark`` and ``Post`` rows.
+
+Settings:
+    POST_COUNTER_WRITE_BEHIND   buffer changes in PostCounterDelta
+"""
+
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Count,
+    Exists,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce
+
+from .models import Like, Post, PostCounterDelta
+
+COUNTERS = (
+    "like_count",
+    "bookmark_count",
+    "retweet_count",
+    "quote_count",
+    "reply_count",
+)
+
+
+def write_behind():
+    return getattr(settings, "POST_COUNTER_WRITE_BEHIND", False)
+
+
+def _invalidate(post_ids):
+    from caching.objects import post_cache
+
+    post_cache.invalidate(*post_ids)
+
+
+def increment(post_id, field, delta=1):
+    """Change ``field`` of a post by ``delta``"""
+    if field not in COUNTERS:
+        raise ValueError(f"Unknown post counter: {field}")
+    if write_behind():
+        PostCounterDelta.objects.create(
+            post_id=post_id, field=field, delta=delta
+        )
+    else:
+        Post.objects.filter(pk=post_id).update(**{field: F(field) + delta})
+
+
+# =============================================================================
+# READS
+# =============================================================================
+
+
+class PendingCounts:
+    """Unflushed deltas for a set of posts"""
+
+    def __init__(self):
+        self.post_ids = set()
+        self.deltas = defaultdict(dict)
+
+    def covers(self, post_id):
+        return post_id in self.post_ids
+
+    def load(self, post_ids):
+        post_ids = set(post_ids) - self.post_ids
+        if not post_ids:
+            return self
+        rows = (
+            PostCounterDelta.objects.filter(post_id__in=post_ids)
+            .values("post_id", "field")
+            .annotate(total=Sum("delta"))
+        )
+        for row in rows:
+            self.deltas[row["post_id"]][row["field"]] = row["total"]
+        self.post_ids |= post_ids
+        return self
+
+    def apply(self, post_id, data):
+        """Add the pending deltas of ``post_id`` to serialized ``data``"""
+        for field, delta in self.deltas.get(post_id, {}).items():
+            if field in data:
+                data[field] += delta
+        return data
+
+
+def resolve_pending_into_context(context, post_ids):
+    """Load pending deltas for ``post_ids`` into a serializer context"""
+    if not write_behind():
+        return None
+    pending = context.setdefault("pending_counts", PendingCounts())
+    return pending.load(pk for pk in post_ids if pk is not None)
+
+
+def apply_pending(context, post_id, data):
+    """Serialized ``data`` of a post with its pending deltas added"""
+    if not write_behind():
+        return data
+    pending = context.get("pending_counts")
+    if pending is None or not pending.covers(post_id):
+        pending = resolve_pending_into_context(context, [post_id])
+    return pending.apply(post_id, data)
+
+
+# =============================================================================
+# FLUSH / RECONCILE
+# =============================================================================
+
+
+def flush(batch_size=5000):
+    """
+    Fold up to ``batch_size`` pending deltas into the post rows.
+
+    Rows are claimed with ``SELECT ... FOR UPDATE SKIP LOCKED`` (where the
+    database supports it) so concurrent flushers never apply the same
+    delta twice. Returns the number of deltas applied.
+    """
+    with transaction.atomic():
+        ids = list(
+            PostCounterDelta.objects.select_for_update(skip_locked=True)
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0
+
+        totals = defaultdict(dict)
+        rows = (
+            PostCounterDelta.objects.filter(id__in=ids)
+            .values("post_id", "field")
+            .annotate(total=Sum("delta"))
+        )
+        for row in rows:
+            if row["total"]:
+                totals[row["post_id"]][row["field"]] = row["total"]
+
+        for post_id, fields in totals.items():
+            Post.objects.filter(pk=post_id).update(
+                **{field: F(field) + delta for field, delta in fields.items()}
+            )
+        PostCounterDelta.objects.filter(id__in=ids).delete()
+        transaction.on_commit(lambda: _invalidate(totals))
+    return len(ids)
+
+
+def _count(queryset, field):
+    """Correlated ``COUNT`` of ``queryset`` rows whose ``field`` is the post"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(n=Count("pk"))
+            .values("n"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def true_counts():
+    """Expressions computing each counter from the source rows"""
+    from bookmarks.models import Bookmark
+
+    live = Post.objects.filter(is_deleted=False)
+    return {
+        "like_count": _count(Like.objects.all(), "post"),
+        "bookmark_count": _count(Bookmark.objects.all(), "post"),
+        "reply_count": _count(live, "parent_post"),
+        "retweet_count": _count(
+            live.filter(is_quote_tweet=False), "retweet_of"
+        ),
+        "quote_count": _count(live.filter(is_quote_tweet=True), "retweet_of"),
+    }
+
+
+def recount(post_ids):
+    """Recompute the counters of ``post_ids``, dropping their pending deltas"""
+    post_ids = list(post_ids)
+    with transaction.atomic():
+        PostCounterDelta.objects.filter(post_id__in=post_ids).delete()
+        Post.objects.filter(pk__in=post_ids).update(**true_counts())
+        transaction.on_commit(lambda: _invalidate(post_ids))
+
+
+def reconcile(chunk_size=1000):
+    """
+    Recompute every counter from the ``Like``, ``Bookmark`` and ``Post`` rows.
+
+    Posts whose stored counts disagree, or that have pending deltas, are
+    passed to ``recount()`` ``chunk_size`` at a time, so a chunk's deltas
+    are dropped in the transaction that rewrites its counts and deltas
+    recorded meanwhile for other posts are left to ``flush()``. Returns
+    the number of posts recounted.
+    """
+    counts = true_counts()
+    drift = Q(pending=True)
+    for field in counts:
+        drift |= ~Q(**{field: F(f"true_{field}")})
+    wrong = list(
+        Post.objects.annotate(
+            pending=Exists(
+                PostCounterDelta.objects.filter(post_id=OuterRef("pk"))
+            ),
+            **{f"true_{field}": expr for field, expr in counts.items()},
+        )
+        .filter(drift)
+        .values_list("pk", flat=True)
+    )
+    for start in range(0, len(wrong), chunk_size):
+        recount(wrong[start : start + chunk_size])
+    return len(wrong)
@@ -0,0 +1,160 @@
+"""
+Query plans and index sizes of the hot post queries.
+
+``HOT_QUERIES`` mirrors the queries behind the feed endpoints (see
+posts/views.py and posts/timeline.py) with sample arguments taken from
+the data, so their plans can be checked against the partial indexes in
+``Post.Meta`` on whichever database is configured. Used by the
+``explain_post_indexes`` command and the index benchmark.
+"""
+
+import re
+import statistics
+import time
+
+from django.db import DatabaseError, connection
+from django.db.models import Count, Subquery
+
+from .models import Follow, Hashtag, Post, PostHashtag
+
+PAGE = 20
+
+TABLES = (Post._meta.db_table, PostHashtag._meta.db_table)
+
+
+def _live():
+    return Post.objects.filter(is_deleted=False)
+
+
+def samples():
+    """Busy user, post, hashtag and follower to run the queries with"""
+    user_id = (
+        _live()
+        .values("user_id")
+        .annotate(n=Count("id"))
+        .order_by("-n")
+        .values_list("user_id", flat=True)
+        .first()
+    )
+    follower_id = (
+        Follow.objects.values("follower_id")
+        .annotate(n=Count("id"))
+        .order_by("-n")
+        .values_list("follower_id", flat=True)
+        .first()
+    )
+    return {
+        "user_id": user_id,
+        "post_id": _live()
+        .order_by("-reply_count", "id")
+        .values_list("id", flat=True)
+        .first(),
+        "tag": Hashtag.objects.order_by("-use_count", "id")
+        .values_list("tag", flat=True)
+        .first(),
+        "follower_id": follower_id,
+        "followed": list(
+            Follow.objects.filter(follower_id=follower_id).values_list(
+                "following_id", flat=True
+            )
+        ),
+    }
+
+
+HOT_QUERIES = {
+    "list": lambda s: _live().order_by("-created_at", "-id")[:PAGE],
+    "user_timeline": lambda s: _live()
+    .filter(user_id=s["user_id"])
+    .order_by("-created_at", "-id")[:PAGE],
+    "home_fanout_on_read": lambda s: _live()
+    .filter(user_id__in=s["followed"])
+    .order_by("-created_at", "-id")
+    .values_list("created_at", "id")[:PAGE],
+    "replies": lambda s: _live()
+    .filter(parent_post_id=s["post_id"])
+    .order_by("created_at")[:PAGE],
+    "hashtag": lambda s: PostHashtag.objects.filter(
+        hashtag_id=Subquery(Hashtag.objects.filter(tag=s["tag"]).values("id")),
+        is_deleted=False,
+    )
+    .order_by("-created_at", "-post_id")
+    .values_list("post_id", flat=True)[:PAGE],
+    "viewer_retweets": lambda s: _live()
+    .filter(
+        user_id=s["follower_id"],
+        retweet_of_id__in=list(
+            _live().order_by("-created_at").values_list("id", flat=True)[:PAGE]
+        ),
+        is_quote_tweet=False,
+    )
+    .values_list("retweet_of_id", flat=True),
+    "purge_scan": lambda s: Post.objects.filter(is_deleted=True, pk__gt=0)
+    .order_by("pk")
+    .values_list("pk", flat=True)[:1000],
+}
+
+
+def index_names():
+    """Names of the indexes on the post tables"""
+    with connection.cursor() as cursor:
+        return sorted(
+            name
+            for table in TABLES
+            for name, info in connection.introspection.get_constraints(
+                cursor, table
+            ).items()
+            if info["index"] or info["unique"]
+        )
+
+
+def used_indexes(plan, names=None):
+    """Indexes of the post tables that ``plan`` mentions"""
+    names = index_names() if names is None else names
+    return [
+        name for name in names if re.search(rf"\b{re.escape(name)}\b", plan)
+    ]
+
+
+def explain(queryset, analyze=False):
+    """The database's plan for ``queryset``"""
+    if analyze and connection.vendor == "postgresql":
+        return queryset.explain(analyze=True, buffers=True)
+    return queryset.explain()
+
+
+def timing(queryset, rounds=5):
+    """Median milliseconds to fetch ``queryset``"""
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        list(queryset.all())
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def index_sizes():
+    """{index name: size in bytes} for the post tables, where available"""
+    with connection.cursor() as cursor:
+        try:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT indexrelname, pg_relation_size(indexrelid) "
+                    "FROM pg_stat_user_indexes WHERE relname = ANY(%s)",
+                    [list(TABLES)],
+                )
+            elif connection.vendor == "sqlite":
+                # Needs SQLite built with SQLITE_ENABLE_DBSTAT_VTAB
+                cursor.execute(
+                    "SELECT dbstat.name, SUM(dbstat.pgsize) FROM dbstat "
+                    "JOIN sqlite_master ON sqlite_master.name = dbstat.name "
+                    "WHERE sqlite_master.type = 'index' "
+                    f"AND sqlite_master.tbl_name IN "
+                    f"({', '.join(['%s'] * len(TABLES))}) "
+                    "GROUP BY dbstat.name",
+                    list(TABLES),
+                )
+            else:
+                return {}
+        except DatabaseError:
+            return {}
+        return dict(cursor.fetchall())
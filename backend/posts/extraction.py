@@ -0,0 +1,152 @@
+"""
+Hashtag and mention extraction for new posts.
+
+Both steps work on the whole post at once: tags are upserted with one
+``INSERT ... ON CONFLICT DO NOTHING``, usernames are resolved with one
+``IN`` query, and the link rows, queued notifications and counter bumps
+are each a single statement, so the cost of a post no longer grows with
+the number of tags and mentions in it. A tag or username repeated within a
+post is only linked once, at its first position.
+
+Bulk operations skip model signals, so anything listening for new
+hashtags or notifications is told explicitly.
+
+``backfill_links()`` copies the post's ``created_at`` and ``is_deleted``
+into ``PostHashtag`` rows written before those columns existed (or by
+anything that bypassed them).
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Hashtag, Mention, Post, PostHashtag
+from .trending import record_uses
+
+User = get_user_model()
+
+
+def _first_positions(values):
+    """``{value: position}`` for the first occurrence of each value"""
+    positions = {}
+    for position, value in enumerate(values):
+        if value and value not in positions:
+            positions[value] = position
+    return positions
+
+
+def attach_hashtags(post, content):
+    """Create the hashtags and ``PostHashtag`` rows for ``post``"""
+    positions = _first_positions(
+        Hashtag.normalize_tag(tag)
+        for tag in Hashtag.extract_from_content(content)
+    )
+    if not positions:
+        return []
+
+    with transaction.atomic():
+        Hashtag.objects.bulk_create(
+            [Hashtag(tag=tag) for tag in positions], ignore_conflicts=True
+        )
+        hashtags = Hashtag.objects.filter(tag__in=positions)
+        hashtags.update(
+            use_count=F("use_count") + 1, last_used_at=timezone.now()
+        )
+        hashtags = list(hashtags.only("id", "tag", "use_count"))
+        PostHashtag.objects.bulk_create(
+            [
+                PostHashtag(
+                    post=post,
+                    hashtag=hashtag,
+                    position=positions[hashtag.tag],
+                    created_at=post.created_at,
+                    is_deleted=post.is_deleted,
+                )
+                for hashtag in hashtags
+            ]
+        )
+
+    from search.autocomplete import note_hashtag
+
+    record_uses(hashtags, post.created_at)
+    for hashtag in hashtags:
+        note_hashtag(hashtag.pk, hashtag.tag, hashtag.use_count)
+    return hashtags
+
+
+def attach_mentions(post, content, author):
+    """Create ``Mention`` rows and notify every mentioned user"""
+    positions = _first_positions(Mention.extract_from_content(content))
+    if not positions:
+        return []
+
+    from notifications.models import NotificationEvent
+    from notifications.outbox import enqueue_many
+
+    # Unknown usernames are not mentions and are skipped
+    mentioned = list(
+        User.objects.filter(username__in=positions).only("id", "username")
+    )
+    with transaction.atomic():
+        Mention.objects.bulk_create(
+            [
+                Mention(
+                    post=post,
+                    mentioned_user=user,
+                    mentioner_user=author,
+                    position=positions[user.username],
+                )
+                for user in mentioned
+            ]
+        )
+        enqueue_many(
+            [
+                NotificationEvent(
+                    user=user,
+                    actor=author,
+                    verb="mentioned you in a post",
+                    target_type="post",
+                    target_id=post.id,
+                )
+                for user in mentioned
+            ]
+        )
+    return mentioned
+
+
+# =============================================================================
+# BACKFILL
+# =============================================================================
+
+
+def backfill_links(chunk_size=1000, stdout=None):
+    """
+    Re-sync the denormalized post fields of ``PostHashtag`` rows.
+
+    Only rows that disagree with their post are written, ``chunk_size``
+    at a time in ID order, each chunk in its own transaction. Returns the
+    number of rows updated.
+    """
+    post = Post.objects.filter(pk=OuterRef("post_id"))
+    stale = PostHashtag.objects.exclude(
+        created_at=F("post__created_at"), is_deleted=F("post__is_deleted")
+    ).order_by("pk")
+
+    updated, last_id = 0, 0
+    while True:
+        ids = list(
+            stale.filter(pk__gt=last_id).values_list("pk", flat=True)[
+                :chunk_size
+            ]
+        )
+        if not ids:
+            return updated
+        with transaction.atomic():
+            updated += PostHashtag.objects.filter(pk__in=ids).update(
+                created_at=Subquery(post.values("created_at")[:1]),
+                is_deleted=Subquery(post.values("is_deleted")[:1]),
+            )
+        last_id = ids[-1]
+        if stdout:
+            stdout.write(f"  updated {updated} links (up to id {last_id})")
@@ -0,0 +1,33 @@
+"""
+Copy each post's created_at and is_deleted into its PostHashtag rows.
+
+Hashtag timelines page over these columns. New links get them when they
+are written; run this after adding them (or after importing links in
+bulk) to fill in existing rows. Rows already in sync are skipped, so it
+is safe to re-run and resumes where an interrupted run stopped.
+
+Run with: python manage.py backfill_post_hashtags [--chunk-size N]
+"""
+
+from django.core.management.base import BaseCommand
+from posts.extraction import backfill_links
+
+
+class Command(BaseCommand):
+    help = "Backfill the denormalized post fields of hashtag links."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Links updated per transaction (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        updated = backfill_links(
+            chunk_size=options["chunk_size"], stdout=self.stdout
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Backfilled {updated} hashtag links.")
+        )
@@ -0,0 +1,80 @@
+"""
+Show which indexes the hot post queries use and how big they are.
+
+Prints, for each query in ``posts.explain.HOT_QUERIES``, its median
+run time and the post indexes its plan uses (``-v 2`` prints the whole
+plan), then the size of every index on the post tables. Run it on a
+seeded database before and after an index change to compare.
+
+Run with: python manage.py explain_post_indexes [--analyze] [--query NAME]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from posts.explain import (
+    HOT_QUERIES,
+    explain,
+    index_names,
+    index_sizes,
+    samples,
+    timing,
+    used_indexes,
+)
+
+
+def _size(size):
+    for unit in ("B", "kB", "MB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class Command(BaseCommand):
+    help = "Explain the hot post queries and report post index sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--analyze",
+            action="store_true",
+            help="Run EXPLAIN ANALYZE (PostgreSQL only)",
+        )
+        parser.add_argument(
+            "--query",
+            action="append",
+            choices=sorted(HOT_QUERIES),
+            help="Only explain this query (repeatable)",
+        )
+
+    def handle(self, *args, **options):
+        sample = samples()
+        if sample["user_id"] is None:
+            raise CommandError("No posts to explain; run seed_data first.")
+
+        names = index_names()
+        for name in options["query"] or HOT_QUERIES:
+            queryset = HOT_QUERIES[name](sample)
+            plan = explain(queryset, options["analyze"])
+            used = used_indexes(plan, names)
+            self.stdout.write(
+                f"{name:<22}{timing(queryset):>8.2f} ms  "
+                f"{', '.join(used) or 'no post index'}"
+            )
+            if options["verbosity"] > 1:
+                for line in plan.splitlines():
+                    self.stdout.write(f"    {line}")
+
+        sizes = index_sizes()
+        if not sizes:
+            self.stdout.write(
+                "Index sizes are not available on this database."
+            )
+            return
+        width = max(len(name) for name in sizes) + 2
+        self.stdout.write("")
+        for name, size in sorted(sizes.items()):
+            self.stdout.write(f"{name:<{width}}{_size(size):>10}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(sizes)} indexes, {_size(sum(sizes.values()))} in total."
+            )
+        )
@@ -0,0 +1,49 @@
+"""
+Apply buffered post counter changes (POST_COUNTER_WRITE_BEHIND).
+
+Run every few seconds from a scheduler, or as a long-running worker with
+--interval.
+
+Run with: python manage.py flush_post_counters [--batch-size N]
+          [--interval SECONDS]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from posts.counters import flush
+
+
+class Command(BaseCommand):
+    help = "Fold pending post counter deltas into the post rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Deltas applied per transaction (default: 5000)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Keep running, flushing every INTERVAL seconds",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            applied = self.drain(options["batch_size"])
+            if options["interval"] is None:
+                break
+            if applied:
+                self.stdout.write(f"Applied {applied} deltas.")
+            time.sleep(options["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Applied {applied} deltas."))
+
+    def drain(self, batch_size):
+        applied = 0
+        while True:
+            flushed = flush(batch_size)
+            applied += flushed
+            if flushed < batch_size:
+                return applied
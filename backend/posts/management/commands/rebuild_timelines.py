@@ -0,0 +1,45 @@
+"""
+Rebuild or trim the materialized home timelines.
+
+Run after deploying the timeline store (to backfill existing data) and
+periodically with --trim-only to enforce TIMELINE_MAX_ENTRIES.
+
+Run with: python manage.py rebuild_timelines [--user USERNAME] [--trim-only]
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from posts.timeline import rebuild_timeline, trim_timeline
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or trim) materialized home timelines."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            help="Only process the timeline of this username",
+        )
+        parser.add_argument(
+            "--trim-only",
+            action="store_true",
+            help="Only trim timelines to TIMELINE_MAX_ENTRIES",
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(is_active=True).order_by("pk")
+        if options["user"]:
+            users = users.filter(username=options["user"])
+
+        processed = 0
+        for user in users.iterator(chunk_size=500):
+            if options["trim_only"]:
+                trim_timeline(user.pk)
+            else:
+                rebuild_timeline(user)
+            processed += 1
+
+        action = "Trimmed" if options["trim_only"] else "Rebuilt"
+        self.stdout.write(
+            self.style.SUCCESS(f"{action} {processed} timelines.")
+        )
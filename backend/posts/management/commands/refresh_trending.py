@@ -0,0 +1,62 @@
+"""
+Recompute the precomputed trending hashtag lists.
+
+Run with --backfill once after deploying the trending engine to build the
+hourly counters from existing posts, and periodically (e.g. hourly) with
+--prune to drop counters older than the longest window.
+
+Run with: python manage.py refresh_trending [--backfill] [--prune]
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+from posts import trending
+from posts.models import HashtagHourlyCount, PostHashtag
+
+
+class Command(BaseCommand):
+    help = "Refresh trending hashtag rankings."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="Rebuild the hourly counters from existing posts",
+        )
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Delete counters older than the longest window",
+        )
+
+    def handle(self, *args, **options):
+        if options["backfill"]:
+            self.stdout.write(f"Backfilled {self.backfill()} counters.")
+        if options["prune"]:
+            self.stdout.write(f"Pruned {trending.prune()} counters.")
+
+        for window in trending.WINDOWS:
+            entry = trending.refresh(window)
+            self.stdout.write(f"{window}: {len(entry['items'])} hashtags")
+        self.stdout.write(self.style.SUCCESS("Trending refreshed."))
+
+    def backfill(self):
+        since = trending.bucket_hour(
+            timezone.now() - max(trending.WINDOWS.values())
+        )
+        rows = (
+            PostHashtag.objects.filter(created_at__gte=since, is_deleted=False)
+            .annotate(hour=TruncHour("created_at"))
+            .values("hashtag_id", "hour")
+            .annotate(count=Count("id"))
+        )
+        with transaction.atomic():
+            HashtagHourlyCount.objects.filter(hour__gte=since).delete()
+            created = HashtagHourlyCount.objects.bulk_create(
+                [HashtagHourlyCount(**row) for row in rows],
+                batch_size=1000,
+            )
+        return len(created)
@@ -5,14 +5,22 @@ Handles posts, replies, threads, retweets, quote tweets, hashtags, and
 mentions.
 Place this file in: backend/posts/management/commands/seed_data.py
 Run with: python manage.py seed_data
+
+For load testing, --scale generates synthetic users, follows, posts and
+likes in bulk instead (see posts/synthetic.py), e.g.:
+
+    python manage.py seed_data --scale --users 100000 --posts 1000000 \
+        --likes 10000000 --workers 8
 """
 
 import random
 import re
+import time
 from datetime import timedelta
 
 from bookmarks.models import Bookmark
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from notifications.models import Notification
@@ -36,6 +44,71 @@ class Command(BaseCommand):
             action="store_true",
             help="Clear all existing data before seeding",
         )
+        scale = parser.add_argument_group("bulk load-test data (--scale)")
+        scale.add_argument(
+            "--scale",
+            action="store_true",
+            help="Generate synthetic high-volume data in bulk",
+        )
+        scale.add_argument(
+            "--users",
+            type=int,
+            default=100_000,
+            help="Synthetic users (default: 100000)",
+        )
+        scale.add_argument(
+            "--posts",
+            type=int,
+            default=1_000_000,
+            help="Synthetic posts, replies included (default: 1000000)",
+        )
+        scale.add_argument(
+            "--likes",
+            type=int,
+            default=10_000_000,
+            help="Synthetic likes to attempt (default: 10000000)",
+        )
+        scale.add_argument(
+            "--following",
+            type=int,
+            default=50,
+            help="Mean accounts followed per user (default: 50)",
+        )
+        scale.add_argument(
+            "--reply-ratio",
+            type=float,
+            default=0.2,
+            help="Share of posts that are replies (default: 0.2)",
+        )
+        scale.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Spread post timestamps over this many days (default: 30)",
+        )
+        scale.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per bulk insert (default: 5000)",
+        )
+        scale.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Insert processes; ignored on SQLite (default: 1)",
+        )
+        scale.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed, for reproducible datasets (default: 0)",
+        )
+        scale.add_argument(
+            "--prefix",
+            default="load",
+            help="Username prefix of synthetic users (default: load)",
+        )
 
     def handle(self, *args, **options):
         """Main command handler."""
@@ -43,6 +116,10 @@ class Command(BaseCommand):
             self.stdout.write(self.style.WARNING("Clearing existing data..."))
             self._clear_data()
 
+        if options["scale"]:
+            self._seed_scale(options)
+            return
+
         self.stdout.write(
             self.style.SUCCESS("Starting comprehensive data seeding...")
         )
@@ -86,6 +163,80 @@ class Command(BaseCommand):
         # Step 10: Display summary
         self._display_summary()
 
+    def _seed_scale(self, options):
+        """Bulk synthetic dataset, then set-based recounts and rebuilds."""
+        from posts import synthetic
+
+        batch_size = options["batch_size"]
+        workers = options["workers"]
+        seed = options["seed"]
+
+        def timed(label, rows):
+            started = time.monotonic()
+            total = sum(rows)
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"✓ {label}: {total} rows in {elapsed:.1f}s")
+
+        user_ids = synthetic.create_users(
+            options["users"], options["prefix"], batch_size
+        )
+        self.stdout.write(f"✓ {len(user_ids)} synthetic users with profiles")
+        synthetic.ensure_hashtags()
+        synthetic.reset_samplers()
+
+        follower_batch = max(1, batch_size // max(1, options["following"]))
+        timed(
+            "Follows",
+            synthetic.run_chunks(
+                synthetic.follow_chunk,
+                [
+                    (ids, options["following"], seed * 1_000_003 + index)
+                    for index, ids in enumerate(
+                        synthetic.split_ids(user_ids, follower_batch)
+                    )
+                ],
+                workers,
+            ),
+        )
+
+        replies = int(options["posts"] * options["reply_ratio"])
+        for label, total, is_reply in (
+            ("Posts", options["posts"] - replies, False),
+            ("Replies", replies, True),
+        ):
+            timed(
+                label,
+                synthetic.run_chunks(
+                    synthetic.post_chunk,
+                    [
+                        (size, options["days"], is_reply, chunk_seed)
+                        for size, chunk_seed in synthetic.scale_chunks(
+                            total, batch_size, seed + is_reply
+                        )
+                    ],
+                    workers,
+                ),
+            )
+            synthetic.reset_samplers()  # later phases see the new posts
+
+        timed(
+            "Likes",
+            synthetic.run_chunks(
+                synthetic.like_chunk,
+                synthetic.scale_chunks(options["likes"], batch_size, seed + 2),
+                workers,
+            ),
+        )
+
+        self.stdout.write("Recomputing denormalized counters...")
+        synthetic.recount_hashtags()
+        call_command("reconcile_post_counts", stdout=self.stdout)
+        call_command("recount_profiles", stdout=self.stdout)
+        call_command("refresh_trending", backfill=True, stdout=self.stdout)
+        call_command("rebuild_search_index", stdout=self.stdout)
+        call_command("rebuild_timelines", stdout=self.stdout)
+        self._display_summary()
+
     def _clear_data(self):
         """Clear all existing data."""
         Like.objects.all().delete()
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0005_timelineentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HashtagHourlyCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField()),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "hashtag",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="hourly_counts",
+                        to="posts.hashtag",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["hour", "hashtag"],
+                        name="posts_hasht_hour_688f86_idx",
+                    )
+                ],
+                "unique_together": {("hashtag", "hour")},
+            },
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.8 on 2026-10-17 05:28
+
+from django.conf import settings
+from django.db import migrations, models
+from posts import threads
+
+BATCH_SIZE = 2000
+
+
+def backfill_thread_paths(apps, schema_editor):
+    """
+    Set path/depth level by level: top-level posts first, then the replies
+    whose parent already has a path.
+    """
+    Post = apps.get_model("posts", "Post")
+    salt_range = 36**threads.SALT_WIDTH
+
+    pending = Post.objects.filter(path="", parent_post__isnull=True)
+    while True:
+        rows = list(pending.values_list("pk", "created_at")[:BATCH_SIZE])
+        if not rows:
+            break
+        Post.objects.bulk_update(
+            [
+                Post(pk=pk, path=threads.segment(when, pk % salt_range))
+                for pk, when in rows
+            ],
+            ["path"],
+        )
+
+    pending = Post.objects.filter(path="").exclude(parent_post__path="")
+    while True:
+        rows = list(
+            pending.values_list(
+                "pk", "created_at", "parent_post__path", "parent_post__depth"
+            )[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        updates = []
+        for pk, when, parent_path, parent_depth in rows:
+            path, depth = threads.child_path(
+                parent_path, parent_depth, when, pk % salt_range
+            )
+            updates.append(Post(pk=pk, path=path, depth=depth))
+        Post.objects.bulk_update(updates, ["path", "depth"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0007_postcounterdelta"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="depth",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="post",
+            name="path",
+            field=models.CharField(default="", editable=False, max_length=780),
+        ),
+        migrations.RunPython(backfill_thread_paths, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                fields=["path"], name="posts_post_path_19df4b_idx"
+            ),
+        ),
+    ]
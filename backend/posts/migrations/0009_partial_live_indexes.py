@@ -0,0 +1,105 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0008_post_thread_path"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="post",
+            name="posts_post_user_id_34ab8c_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="post",
+            name="posts_post_parent__f3af64_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="post",
+            name="posts_post_root_po_89b3f3_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="post",
+            name="posts_post_retweet_352e68_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="post",
+            name="posts_post_retweet_fa702a_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="post",
+            name="posts_post_created_dadbfe_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="post",
+            name="posts_post_is_dele_23997e_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="post",
+            name="posts_post_root_po_979633_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="posthashtag",
+            name="posts_posth_post_id_cf2f78_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="posthashtag",
+            name="posts_posth_hashtag_d73639_idx",
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["-created_at", "-id"],
+                name="post_live_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("is_deleted", False)),
+                fields=["user", "-created_at", "-id"],
+                name="post_live_user_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_deleted", False), ("parent_post__isnull", False)
+                ),
+                fields=["parent_post", "created_at"],
+                name="post_live_reply_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(
+                    ("is_deleted", False), ("retweet_of__isnull", False)
+                ),
+                fields=["retweet_of", "user"],
+                name="post_live_retweet_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("is_deleted", True)),
+                fields=["id"],
+                name="post_deleted_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="posthashtag",
+            index=models.Index(
+                fields=["hashtag", "post"], name="posthashtag_tag_post_idx"
+            ),
+        ),
+    ]
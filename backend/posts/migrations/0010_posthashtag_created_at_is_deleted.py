@@ -0,0 +1,63 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_post_fields(apps, schema_editor):
+    """
+    Fill the new columns from the posts in one UPDATE
+    (``backfill_post_hashtags`` re-syncs them in chunks later on).
+    """
+    Post = apps.get_model("posts", "Post")
+    PostHashtag = apps.get_model("posts", "PostHashtag")
+    post = Post.objects.filter(pk=OuterRef("post_id"))
+    PostHashtag.objects.update(
+        created_at=Subquery(post.values("created_at")[:1]),
+        is_deleted=Subquery(post.values("is_deleted")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0009_partial_live_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="posthashtag",
+            name="created_at",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="posthashtag",
+            name="is_deleted",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(copy_post_fields, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="posthashtag",
+            name="posthashtag_tag_post_idx",
+        ),
+        migrations.AddIndex(
+            model_name="posthashtag",
+            index=models.Index(
+                fields=["hashtag", "-created_at", "-post"],
+                name="posthashtag_timeline_idx",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="posthashtag",
+            name="hashtag",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="hashtag_posts",
+                to="posts.hashtag",
+            ),
+        ),
+    ]
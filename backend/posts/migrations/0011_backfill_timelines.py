@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def backfill_timelines(apps, schema_editor):
+    """
+    Materialize the home timeline of every active user, as
+    ``rebuild_timelines`` does, so home feeds are not empty after deploy.
+    """
+    Follow = apps.get_model("posts", "Follow")
+    Post = apps.get_model("posts", "Post")
+    TimelineEntry = apps.get_model("posts", "TimelineEntry")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    UserProfile = apps.get_model("users", "UserProfile")
+
+    fanout_limit = getattr(settings, "TIMELINE_FANOUT_MAX_FOLLOWERS", 5000)
+    max_entries = getattr(settings, "TIMELINE_MAX_ENTRIES", 800)
+    # Their posts are merged in at read time
+    celebrities = set(
+        UserProfile.objects.filter(
+            followers_count__gt=fanout_limit
+        ).values_list("user_id", flat=True)
+    )
+
+    users = User.objects.filter(is_active=True).order_by("pk")
+    for user_id in users.values_list("pk", flat=True).iterator():
+        following = set(
+            Follow.objects.filter(follower_id=user_id).values_list(
+                "following_id", flat=True
+            )
+        )
+        posts = (
+            Post.objects.filter(
+                user_id__in=(following - celebrities) | {user_id},
+                is_deleted=False,
+            )
+            .order_by("-created_at")
+            .values_list("id", "user_id", "created_at")[:max_entries]
+        )
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(
+                    user_id=user_id,
+                    post_id=post_id,
+                    author_id=author_id,
+                    created_at=created_at,
+                )
+                for post_id, author_id, created_at in posts
+            ],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0010_posthashtag_created_at_is_deleted"),
+        ("users", "0012_recount_profiles"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,54 @@
+from datetime import timedelta, timezone
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from django.utils import timezone as django_timezone
+
+# posts.trending.WINDOWS["7d"], the longest window; older buckets are pruned
+LONGEST_WINDOW = timedelta(days=7)
+
+
+def backfill_hourly_counts(apps, schema_editor):
+    """
+    Bucket the live hashtag links of the longest trending window into
+    ``HashtagHourlyCount`` so trending is not empty after deploy.
+    """
+    HashtagHourlyCount = apps.get_model("posts", "HashtagHourlyCount")
+    PostHashtag = apps.get_model("posts", "PostHashtag")
+
+    cutoff = (django_timezone.now() - LONGEST_WINDOW).replace(
+        minute=0, second=0, microsecond=0
+    )
+    buckets = (
+        PostHashtag.objects.filter(is_deleted=False, created_at__gte=cutoff)
+        .annotate(hour=TruncHour("created_at", tzinfo=timezone.utc))
+        .order_by()
+        .values("hashtag_id", "hour")
+        .annotate(n=Count("pk"))
+    )
+    HashtagHourlyCount.objects.filter(hour__gte=cutoff).delete()
+    HashtagHourlyCount.objects.bulk_create(
+        [
+            HashtagHourlyCount(
+                hashtag_id=bucket["hashtag_id"],
+                hour=bucket["hour"],
+                count=bucket["n"],
+            )
+            for bucket in buckets.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0011_backfill_timelines"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_hourly_counts, migrations.RunPython.noop
+        ),
+    ]
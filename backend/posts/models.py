@@ -12,9 +12,14 @@ import re
 
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models import F
 from django.db.models.signals import post_delete, post_save
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from . import threads
+
+# Sent with ``instance`` when a post transitions to is_deleted=True
+post_soft_deleted = Signal()
 
 
 class Post(models.Model):
@@ -58,6 +63,12 @@ class Post(models.Model):
     )
     is_quote_tweet = models.BooleanField(default=False)
 
+    # Materialized thread position (see posts/threads.py)
+    path = models.CharField(
+        max_length=threads.PATH_MAX_LENGTH, default="", editable=False
+    )
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_deleted = models.BooleanField(default=False)
@@ -70,15 +81,45 @@ class Post(models.Model):
     bookmark_count = models.IntegerField(default=0)
 
     class Meta:
+        # Reads only ever list live posts, so the feed indexes are partial
+        # (WHERE NOT is_deleted) and end in the keyset tiebreaker. Plain
+        # lookups by user, parent, root or original use the foreign key
+        # indexes. See the explain_post_indexes command.
         indexes = [
-            models.Index(fields=["user", "created_at"]),
-            models.Index(fields=["parent_post"]),
-            models.Index(fields=["root_post"]),
-            models.Index(fields=["retweet_of"]),
-            models.Index(fields=["retweet_of", "user"]),
-            models.Index(fields=["created_at"]),
-            models.Index(fields=["is_deleted", "created_at"]),
-            models.Index(fields=["root_post", "created_at"]),
+            # Public list, hashtag and mention timelines
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(is_deleted=False),
+                name="post_live_created_idx",
+            ),
+            # User timeline, fan-out-on-read part of the home feed
+            models.Index(
+                fields=["user", "-created_at", "-id"],
+                condition=models.Q(is_deleted=False),
+                name="post_live_user_idx",
+            ),
+            # Replies, reply counts
+            models.Index(
+                fields=["parent_post", "created_at"],
+                condition=models.Q(
+                    is_deleted=False, parent_post__isnull=False
+                ),
+                name="post_live_reply_idx",
+            ),
+            # Viewer's retweets, retweet and quote counts
+            models.Index(
+                fields=["retweet_of", "user"],
+                condition=models.Q(is_deleted=False, retweet_of__isnull=False),
+                name="post_live_retweet_idx",
+            ),
+            # Soft-deleted posts waiting for purge_soft_deleted
+            models.Index(
+                fields=["id"],
+                condition=models.Q(is_deleted=True),
+                name="post_deleted_idx",
+            ),
+            # Thread subtrees (include the root even when deleted)
+            models.Index(fields=["path"]),
         ]
         ordering = ["-created_at"]
 
@@ -104,10 +145,8 @@ class Post(models.Model):
         return self.parent_post_id is not None
 
     def save(self, *args, **kwargs):
-        # Set root_post for thread tracking
-        if self.parent_post_id and not self.root_post_id:
-            parent = Post.objects.get(pk=self.parent_post_id)
-            self.root_post = parent.root_post or parent
+        if self._state.adding and not self.path:
+            self.set_thread_position()
 
         # Set is_quote_tweet flag
         if self.retweet_of_id and self.content:
@@ -115,6 +154,41 @@ class Post(models.Model):
 
         super().save(*args, **kwargs)
 
+    def set_thread_position(self):
+        """Set root_post, path and depth of a new post"""
+        when = self.created_at or timezone.now()
+        if not self.parent_post_id:
+            self.path, self.depth = threads.segment(when), 0
+            return
+        if Post.parent_post.is_cached(self):
+            # Usually the case: the serializer already loaded the parent
+            parent = self.parent_post
+        else:
+            parent = Post.objects.only("root_post_id", "path", "depth").get(
+                pk=self.parent_post_id
+            )
+        if not self.root_post_id:
+            self.root_post_id = parent.root_post_id or parent.pk
+        self.path, self.depth = threads.child_path(
+            parent.path, parent.depth, when
+        )
+
+    def soft_delete(self):
+        """
+        Mark the post as deleted.
+
+        The flag is flipped with a conditional UPDATE so concurrent deletes
+        only fire ``post_soft_deleted`` once. Returns True if this call
+        performed the transition.
+        """
+        updated = Post.objects.filter(pk=self.pk, is_deleted=False).update(
+            is_deleted=True
+        )
+        self.is_deleted = True
+        if updated:
+            post_soft_deleted.send(sender=Post, instance=self)
+        return bool(updated)
+
 
 class Hashtag(models.Model):
     """Normalized hashtag storage for 3NF compliance"""
@@ -151,26 +225,72 @@ class Hashtag(models.Model):
 
 
 class PostHashtag(models.Model):
-    """Many-to-many relationship between posts and hashtags (3NF)"""
+    """
+    Many-to-many relationship between posts and hashtags (3NF).
+
+    ``created_at`` and ``is_deleted`` mirror the post, so a hashtag
+    timeline is one ordered range scan over ``(hashtag, created_at)``
+    without joining ``Post``. They are copied from the post on save and
+    on soft delete; ``backfill_post_hashtags`` re-syncs existing rows.
+    """
 
     post = models.ForeignKey(
         Post, on_delete=models.CASCADE, related_name="post_hashtags"
     )
     hashtag = models.ForeignKey(
-        Hashtag, on_delete=models.CASCADE, related_name="hashtag_posts"
+        Hashtag,
+        on_delete=models.CASCADE,
+        related_name="hashtag_posts",
+        db_index=False,  # leading column of posthashtag_timeline_idx
     )
     position = models.IntegerField(default=0)  # Order of appearance
 
+    # Denormalized from the post
+    created_at = models.DateTimeField()
+    is_deleted = models.BooleanField(default=False)
+
     class Meta:
         unique_together = ("post", "hashtag")
         indexes = [
-            models.Index(fields=["post", "hashtag"]),
-            models.Index(fields=["hashtag"]),
+            # Hashtag timelines, newest first, keyset on the post ID. Not
+            # partial: it also serves plain lookups by hashtag, and the
+            # few soft-deleted links are filtered during the scan.
+            models.Index(
+                fields=["hashtag", "-created_at", "-post"],
+                name="posthashtag_timeline_idx",
+            ),
         ]
 
     def __str__(self):
         return f"{self.post_id} - #{self.hashtag.tag}"
 
+    def save(self, *args, **kwargs):
+        if self.created_at is None:
+            self.created_at = self.post.created_at
+            self.is_deleted = self.post.is_deleted
+        super().save(*args, **kwargs)
+
+
+class HashtagHourlyCount(models.Model):
+    """Uses of a hashtag per clock hour, the input of ``posts.trending``"""
+
+    hashtag = models.ForeignKey(
+        Hashtag, on_delete=models.CASCADE, related_name="hourly_counts"
+    )
+    hour = models.DateTimeField()  # start of the hour (UTC)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("hashtag", "hour")
+        indexes = [
+            models.Index(fields=["hour", "hashtag"]),
+        ]
+
+    def __str__(self):
+        return (
+            f"#{self.hashtag_id} @ {self.hour:%Y-%m-%d %H}:00 = {self.count}"
+        )
+
 
 class Mention(models.Model):
     """User mentions in posts (@username) - 3NF compliant"""
@@ -253,69 +373,116 @@ class Follow(models.Model):
         return f"{self.follower.username} follows {self.following.username}"
 
 
+class TimelineEntry(models.Model):
+    """
+    Materialized home timeline row (fan-out-on-write).
+
+    One row per (timeline owner, post). ``created_at`` mirrors the post's
+    timestamp so a home page is a single range scan over
+    (user, created_at). Maintained by ``posts.timeline``.
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="timeline_entries"
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+"
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("user", "post")
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-post"]),
+            models.Index(fields=["user", "author"]),
+        ]
+
+    def __str__(self):
+        return f"Timeline of {self.user_id}: Post {self.post_id}"
+
+
+class PostCounterDelta(models.Model):
+    """
+    Pending change to one of a post's counters (write-behind mode).
+
+    Rows are only ever inserted by writers, so a burst of likes on one
+    post does not contend on the post row; ``posts.counters.flush``
+    folds them into ``Post`` in batches.
+    """
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="+")
+    field = models.CharField(max_length=20)
+    delta = models.SmallIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["post"]),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} {self.field} {self.delta:+d}"
+
+
 # =============================================================================
 # SIGNALS FOR DENORMALIZED COUNT UPDATES
 # =============================================================================
 
 
-@receiver(post_save, sender=Post)
-def update_reply_count_on_create(sender, instance, created, **kwargs):
-    """Update parent post's reply_count when a reply is created"""
-    if created and instance.parent_post_id:
-        Post.objects.filter(pk=instance.parent_post_id).update(
-            reply_count=F("reply_count") + 1
-        )
+def _bump(post_id, field, delta):
+    from .counters import increment
 
+    increment(post_id, field, delta)
 
-@receiver(post_delete, sender=Post)
-def update_reply_count_on_delete(sender, instance, **kwargs):
-    """Update parent post's reply_count when a reply is deleted"""
-    if instance.parent_post_id:
-        Post.objects.filter(pk=instance.parent_post_id).update(
-            reply_count=F("reply_count") - 1
-        )
+
+def _retweet_field(post):
+    return "quote_count" if post.is_quote_tweet else "retweet_count"
 
 
 @receiver(post_save, sender=Post)
-def update_retweet_quote_count_on_create(sender, instance, created, **kwargs):
-    """Update original post's retweet/quote count"""
-    if created and instance.retweet_of_id:
-        if instance.is_quote_tweet:
-            Post.objects.filter(pk=instance.retweet_of_id).update(
-                quote_count=F("quote_count") + 1
-            )
-        else:
-            Post.objects.filter(pk=instance.retweet_of_id).update(
-                retweet_count=F("retweet_count") + 1
-            )
+def update_counts_on_create(sender, instance, created, **kwargs):
+    """Count a new reply, retweet or quote on its target post"""
+    if not created or instance.is_deleted:
+        return
+    if instance.parent_post_id:
+        _bump(instance.parent_post_id, "reply_count", 1)
+    if instance.retweet_of_id:
+        _bump(instance.retweet_of_id, _retweet_field(instance), 1)
 
 
+@receiver(post_soft_deleted, sender=Post)
 @receiver(post_delete, sender=Post)
-def update_retweet_quote_count_on_delete(sender, instance, **kwargs):
-    """Update original post's retweet/quote count on delete"""
+def update_counts_on_delete(sender, instance, **kwargs):
+    """Uncount a deleted reply, retweet or quote"""
+    if kwargs["signal"] is post_delete and instance.is_deleted:
+        return  # already uncounted when it was soft-deleted
+    if instance.parent_post_id:
+        _bump(instance.parent_post_id, "reply_count", -1)
     if instance.retweet_of_id:
-        if instance.is_quote_tweet:
-            Post.objects.filter(pk=instance.retweet_of_id).update(
-                quote_count=F("quote_count") - 1
-            )
-        else:
-            Post.objects.filter(pk=instance.retweet_of_id).update(
-                retweet_count=F("retweet_count") - 1
-            )
+        _bump(instance.retweet_of_id, _retweet_field(instance), -1)
 
 
 @receiver(post_save, sender=Like)
 def update_like_count_on_create(sender, instance, created, **kwargs):
     """Update post's like_count when a like is created"""
     if created:
-        Post.objects.filter(pk=instance.post_id).update(
-            like_count=F("like_count") + 1
-        )
+        _bump(instance.post_id, "like_count", 1)
 
 
 @receiver(post_delete, sender=Like)
 def update_like_count_on_delete(sender, instance, **kwargs):
     """Update post's like_count when a like is deleted"""
-    Post.objects.filter(pk=instance.post_id).update(
-        like_count=F("like_count") - 1
-    )
+    _bump(instance.post_id, "like_count", -1)
+
+
+# =============================================================================
+# SIGNALS FOR DENORMALIZED HASHTAG LINKS
+# =============================================================================
+
+
+@receiver(post_soft_deleted, sender=Post)
+def hide_hashtag_links(sender, instance, **kwargs):
+    """Drop a soft-deleted post from its hashtag timelines"""
+    PostHashtag.objects.filter(post=instance).update(is_deleted=True)
@@ -0,0 +1,170 @@
+"""
+Permanent deletion of soft-deleted posts.
+
+``Post.objects.filter(is_deleted=True).delete()`` lets Django cascade in
+Python: it loads every reply, retweet, like, mention, bookmark and index
+row into memory, sends ``post_delete`` for each (most of which issue an
+UPDATE) and does all of it in one transaction.
+
+``purge()`` works through the soft-deleted posts in primary-key chunks
+instead. For each chunk it collects the posts that cascade with it
+(replies, thread posts and retweets of purged posts, transitively), then
+deletes the dependent rows of every model with a ``CASCADE`` foreign key
+to ``Post`` and the posts themselves with one ``DELETE ... WHERE ... IN``
+per table, without loading rows or sending signals. What those signals
+would have maintained is recomputed in aggregate:
+
+- counters of surviving posts a purged reply or retweet pointed at
+  (``posts.counters.recount``)
+- ``posts_count`` of the authors of live posts removed by the cascade
+  (``users.counts.recount``)
+- cached copies of every post involved
+
+Soft-deleted posts were already uncounted and removed from timelines,
+search and trending when they were soft-deleted.
+
+Each chunk commits on its own, so an interrupted run loses at most the
+chunk in flight and the next run simply carries on with what is left.
+"""
+
+import time
+
+from django.db import connection, models, transaction
+from django.db.models import Q
+
+from . import counters
+from .models import Post
+
+# Upper bound on the IDs bound into one statement
+STATEMENT_SIZE = 500
+
+
+def _batches(ids, size=STATEMENT_SIZE):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start : start + size]
+
+
+def _dependents():
+    """(table, column) of each model deleted along with its posts"""
+    # Hidden relations (related_name="+", e.g. PostCounterDelta) included
+    return [
+        (rel.related_model._meta.db_table, rel.field.column)
+        for rel in Post._meta.get_fields(include_hidden=True)
+        if rel.auto_created
+        and not rel.concrete
+        and rel.related_model is not Post
+        and rel.on_delete is models.CASCADE
+    ]
+
+
+def _delete(cursor, table, column, ids):
+    """Delete rows of ``table`` whose ``column`` is in ``ids``"""
+    deleted = 0
+    quote = connection.ops.quote_name
+    for batch in _batches(ids):
+        cursor.execute(
+            f"DELETE FROM {quote(table)} WHERE {quote(column)} IN "
+            f"({', '.join(['%s'] * len(batch))})",
+            batch,
+        )
+        deleted += max(cursor.rowcount, 0)
+    return deleted
+
+
+def cascade(post_ids):
+    """``post_ids`` and every post that cascades with them"""
+    found = set(post_ids)
+    frontier = found
+    while frontier:
+        children = set()
+        for batch in _batches(frontier):
+            children.update(
+                Post.objects.filter(
+                    Q(parent_post_id__in=batch)
+                    | Q(root_post_id__in=batch)
+                    | Q(retweet_of_id__in=batch)
+                ).values_list("pk", flat=True)
+            )
+        frontier = children - found
+        found |= frontier
+    return found
+
+
+def purge_chunk(post_ids):
+    """
+    Permanently delete ``post_ids`` and the posts that cascade with them.
+
+    Returns ``(posts, cascaded, rows)``: the posts deleted, how many of
+    them were live posts taken along by the cascade, and the dependent
+    rows deleted with them.
+    """
+    from caching.objects import post_cache
+    from search.engine import release_terms
+    from users.counts import recount as recount_profiles
+
+    with transaction.atomic():
+        ids = cascade(post_ids)
+        targets, authors, live = set(), set(), 0
+        for batch in _batches(ids):
+            posts = Post.objects.filter(pk__in=batch).values_list(
+                "user_id", "parent_post_id", "retweet_of_id", "is_deleted"
+            )
+            for user_id, parent_id, retweet_of_id, is_deleted in posts:
+                targets.update((parent_id, retweet_of_id))
+                if not is_deleted:
+                    authors.add(user_id)
+                    live += 1
+        targets -= ids | {None}
+
+        for batch in _batches(ids):
+            release_terms(batch)
+        rows = 0
+        with connection.cursor() as cursor:
+            for table, column in _dependents():
+                rows += _delete(cursor, table, column, ids)
+            _delete(cursor, Post._meta.db_table, "id", ids)
+
+        if targets:
+            counters.recount(targets)
+        if authors:
+            recount_profiles(user_ids=list(authors))
+        transaction.on_commit(lambda: post_cache.invalidate(*ids))
+    return len(ids), live, rows
+
+
+def purge(chunk_size=1000, limit=None, pause=0):
+    """
+    Purge soft-deleted posts, ``chunk_size`` at a time, in ID order.
+
+    Yields a dict per committed chunk with the running totals (``posts``,
+    ``cascaded``, ``rows``), the ``last_id`` purged and the ``seconds``
+    the chunk took. Stops after ``limit`` soft-deleted posts if given and
+    sleeps ``pause`` seconds between chunks to leave room for other
+    writers.
+    """
+    totals = {"posts": 0, "cascaded": 0, "rows": 0}
+    purged, last_id = 0, 0
+    while limit is None or purged < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - purged)
+        chunk = list(
+            Post.objects.filter(is_deleted=True, pk__gt=last_id)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:size]
+        )
+        if not chunk:
+            return
+        started = time.monotonic()
+        posts, cascaded, rows = purge_chunk(chunk)
+        purged += len(chunk)
+        last_id = chunk[-1]
+        totals["posts"] += posts
+        totals["cascaded"] += cascaded
+        totals["rows"] += rows
+        yield {
+            **totals,
+            "last_id": last_id,
+            "seconds": time.monotonic() - started,
+        }
+        if pause:
+            time.sleep(pause)
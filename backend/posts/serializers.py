@@ -6,16 +6,26 @@ Uses drf-spectacular for OpenAPI documentation.
 import re
 
 from django.contrib.auth import get_user_model
-from django.db.models import F
+from django.db import transaction
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
-from .models import Follow, Hashtag, Like, Mention, Post, PostHashtag
+from .counters import apply_pending, resolve_pending_into_context
+from .extraction import attach_hashtags, attach_mentions
+from .models import Follow, Hashtag, Like, Mention, Post
+from .viewer_state import resolve_into_context
 
 User = get_user_model()
 
 
+def _related(obj, name, *select):
+    """Return a reverse relation, reusing prefetched rows when available"""
+    if name in getattr(obj, "_prefetched_objects_cache", {}):
+        return getattr(obj, name).all()
+    return getattr(obj, name).select_related(*select)
+
+
 class HashtagSerializer(serializers.ModelSerializer):
     """Serializer for hashtag data"""
 
@@ -45,6 +55,25 @@ class UserMiniSerializer(serializers.ModelSerializer):
         read_only_fields = ["id", "username"]
 
 
+class PostListSerializer(serializers.ListSerializer):
+    """
+    List serializer that resolves viewer state for the whole page up front,
+    so the is_*_by_user flags cost three queries per page instead of three
+    per post.
+    """
+
+    def to_representation(self, data):
+        posts = list(data.all() if hasattr(data, "all") else data)
+        resolve_into_context(self.context, [post.pk for post in posts])
+        # Nested retweet_of_data shows counts too
+        resolve_pending_into_context(
+            self.context,
+            [post.pk for post in posts]
+            + [post.retweet_of_id for post in posts],
+        )
+        return super().to_representation(posts)
+
+
 class PostSerializer(serializers.ModelSerializer):
     """
     Full post serializer with support for:
@@ -82,6 +111,7 @@ class PostSerializer(serializers.ModelSerializer):
             "content",
             "parent_post",
             "root_post",
+            "depth",
             "retweet_of",
             "retweet_of_data",
             "is_quote_tweet",
@@ -100,6 +130,7 @@ class PostSerializer(serializers.ModelSerializer):
             "is_deleted",
             "quote_of",
         ]
+        list_serializer_class = PostListSerializer
         read_only_fields = [
             "user",
             "reply_count",
@@ -117,7 +148,7 @@ class PostSerializer(serializers.ModelSerializer):
         """Get hashtags associated with this post"""
         return [
             {"id": ph.hashtag.id, "tag": ph.hashtag.tag}
-            for ph in obj.post_hashtags.select_related("hashtag")
+            for ph in _related(obj, "post_hashtags", "hashtag")
         ]
 
     @extend_schema_field(serializers.ListField(child=MentionSerializer()))
@@ -125,7 +156,7 @@ class PostSerializer(serializers.ModelSerializer):
         """Get mentions in this post"""
         return [
             {"id": m.mentioned_user.id, "username": m.mentioned_user.username}
-            for m in obj.mentions.select_related("mentioned_user")
+            for m in _related(obj, "mentions", "mentioned_user")
         ]
 
     @extend_schema_field(serializers.DictField(allow_null=True))
@@ -137,38 +168,31 @@ class PostSerializer(serializers.ModelSerializer):
             ).data
         return None
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        return apply_pending(self.context, instance.pk, data)
+
+    def _viewer_state(self, obj):
+        """Viewer state covering ``obj``, resolved on demand if missing"""
+        state = self.context.get("viewer_state")
+        if state is None or not state.covers(obj.pk):
+            state = resolve_into_context(self.context, [obj.pk])
+        return state
+
     @extend_schema_field(serializers.BooleanField())
     def get_is_retweeted_by_user(self, obj):
         """Check if current user has retweeted this post"""
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return Post.objects.filter(
-                user=request.user,
-                retweet_of=obj,
-                is_deleted=False,
-                is_quote_tweet=False,
-            ).exists()
-        return False
+        return obj.pk in self._viewer_state(obj).retweeted
 
     @extend_schema_field(serializers.BooleanField())
     def get_is_liked_by_user(self, obj):
         """Check if current user has liked this post"""
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            return Like.objects.filter(user=request.user, post=obj).exists()
-        return False
+        return obj.pk in self._viewer_state(obj).liked
 
     @extend_schema_field(serializers.BooleanField())
     def get_is_bookmarked_by_user(self, obj):
         """Check if current user has bookmarked this post"""
-        request = self.context.get("request")
-        if request and request.user.is_authenticated:
-            from bookmarks.models import Bookmark
-
-            return Bookmark.objects.filter(
-                user=request.user, post=obj
-            ).exists()
-        return False
+        return obj.pk in self._viewer_state(obj).bookmarked
 
     def create(self, validated_data):
         """Create a post with automatic hashtag and mention extraction"""
@@ -181,61 +205,16 @@ class PostSerializer(serializers.ModelSerializer):
             validated_data["retweet_of"] = quote_of
             validated_data["is_quote_tweet"] = True
 
-        # Create post
-        post = Post.objects.create(user=user, **validated_data)
+        with transaction.atomic():
+            # Create post
+            post = Post.objects.create(user=user, **validated_data)
 
-        # Extract and create hashtags
-        self._process_hashtags(post, content)
-
-        # Extract and create mentions
-        self._process_mentions(post, content, user)
+            # Extract and create hashtags and mentions in bulk
+            attach_hashtags(post, content)
+            attach_mentions(post, content, user)
 
         return post
 
-    def _process_hashtags(self, post, content):
-        """Extract hashtags from content and create associations"""
-        hashtag_matches = Hashtag.extract_from_content(content)
-
-        for position, tag_text in enumerate(hashtag_matches):
-            tag_normalized = Hashtag.normalize_tag(tag_text)
-            if not tag_normalized:
-                continue
-
-            hashtag, _ = Hashtag.objects.get_or_create(tag=tag_normalized)
-            PostHashtag.objects.create(
-                post=post, hashtag=hashtag, position=position
-            )
-            # Update hashtag use_count
-            Hashtag.objects.filter(pk=hashtag.pk).update(
-                use_count=F("use_count") + 1
-            )
-
-    def _process_mentions(self, post, content, user):
-        """Extract mentions from content and create associations"""
-        mention_matches = Mention.extract_from_content(content)
-
-        for position, username in enumerate(mention_matches):
-            try:
-                mentioned = User.objects.get(username=username)
-                Mention.objects.create(
-                    post=post,
-                    mentioned_user=mentioned,
-                    mentioner_user=user,
-                    position=position,
-                )
-                # Create notification for mentioned user
-                from notifications.models import Notification
-
-                Notification.objects.create(
-                    user=mentioned,
-                    actor=user,
-                    verb="mentioned you in a post",
-                    target_type="post",
-                    target_id=post.id,
-                )
-            except User.DoesNotExist:
-                pass  # Invalid mention, skip
-
 
 class PostMiniSerializer(serializers.ModelSerializer):
     """
@@ -259,6 +238,10 @@ class PostMiniSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        return apply_pending(self.context, instance.pk, data)
+
 
 class LikeSerializer(serializers.ModelSerializer):
     """Serializer for likes"""
@@ -297,3 +280,4 @@ class TrendingHashtagSerializer(serializers.Serializer):
     tag = serializers.CharField()
     use_count = serializers.IntegerField()
     post_count = serializers.IntegerField(required=False)
+    score = serializers.FloatField(required=False)
@@ -0,0 +1,342 @@
+"""
+Synthetic load-test data for ``seed_data --scale``.
+
+Users, follows, posts and likes are generated in chunks of ``batch_size``
+rows and written with ``bulk_create``: no model signals, no per-row
+queries. Popularity follows a power law: follow targets, post authors and
+liked posts are drawn with Zipf weights (``1 / rank ** alpha``), so a few
+accounts have huge audiences and a few posts go viral, as in real
+traffic.
+
+Chunks are independent and seeded from their index, so a run is
+reproducible and can be spread over a process pool; each worker opens its
+own database connection. SQLite allows a single writer, so there the
+chunks run in the calling process.
+
+Bulk inserts skip the receivers that maintain denormalized columns and
+derived tables; the command recomputes them afterwards in set-based
+passes (``recount_hashtags()`` and the recount/rebuild commands).
+"""
+
+import itertools
+import random
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from users.models import UserProfile
+
+from . import threads
+from .models import Follow, Hashtag, Like, Post, PostHashtag
+
+ALPHA = 1.1
+HASHTAGS = 1000
+HASHTAG_PREFIX = "load"
+WORDS = (
+    "the a new big small today launch build ship test read write deploy "
+    "coffee music team city game weekend code data cloud design idea "
+    "bug fix release travel food photo news update thread question"
+).split()
+
+
+# =============================================================================
+# SAMPLING
+# =============================================================================
+
+
+class PowerLaw:
+    """Draws items with probability proportional to ``1 / rank ** alpha``"""
+
+    def __init__(self, items, alpha=ALPHA, seed=0):
+        self.items = list(items)
+        # Ranks are shuffled so popularity does not follow insertion order
+        random.Random(seed).shuffle(self.items)
+        self.cum_weights = list(
+            itertools.accumulate(
+                1 / (rank**alpha) for rank in range(1, len(self.items) + 1)
+            )
+        )
+
+    def sample(self, rng, k=1):
+        return rng.choices(self.items, cum_weights=self.cum_weights, k=k)
+
+    def sample_unique(self, rng, k):
+        """Up to ``k`` distinct items (fewer if duplicates keep coming)"""
+        k = min(k, len(self.items))
+        chosen = set()
+        for _ in range(4):
+            chosen.update(self.sample(rng, k - len(chosen)))
+            if len(chosen) >= k:
+                break
+        return chosen
+
+
+def _follower_count(rng, mean):
+    """Accounts followed by one user: heavy-tailed around ``mean``"""
+    return max(1, int(rng.paretovariate(2.0) * mean / 2))
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk inserts set ``auto_now_add`` fields (e.g. back-dated)"""
+    previous = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, previous):
+            field.auto_now_add = value
+
+
+def _post_created_at():
+    return Post._meta.get_field("created_at")
+
+
+# =============================================================================
+# WORKER STATE
+# =============================================================================
+
+
+_samplers = {}
+
+
+def _sampler(kind, seed):
+    """Per-process cached sampler over the user or post IDs"""
+    if kind not in _samplers:
+        if kind == "user":
+            ids = User.objects.filter(is_active=True).values_list(
+                "id", flat=True
+            )
+        else:
+            ids = Post.objects.filter(
+                is_deleted=False, parent_post__isnull=True
+            ).values_list("id", flat=True)
+        _samplers[kind] = PowerLaw(ids.order_by("id"), seed=seed)
+    return _samplers[kind]
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+    connections.close_all()
+    _samplers.clear()
+
+
+# =============================================================================
+# CHUNKS
+# =============================================================================
+
+
+def create_users(count, prefix, batch_size):
+    """Users ``<prefix>0000001``... with profiles; returns their IDs"""
+    password = make_password("password123")  # hashed once, not per user
+    for start in range(0, count, batch_size):
+        names = [
+            f"{prefix}{i:07d}"
+            for i in range(start, min(start + batch_size, count))
+        ]
+        User.objects.bulk_create(
+            [
+                User(
+                    username=name,
+                    email=f"{name}@example.com",
+                    password=password,
+                )
+                for name in names
+            ],
+            ignore_conflicts=True,
+        )
+    ids = list(
+        User.objects.filter(username__startswith=prefix).values_list(
+            "id", flat=True
+        )
+    )
+    missing = User.objects.filter(
+        username__startswith=prefix, profile__isnull=True
+    ).values_list("id", flat=True)
+    while True:
+        batch = list(missing[:batch_size])
+        if not batch:
+            return ids
+        UserProfile.objects.bulk_create(
+            [
+                UserProfile(user_id=pk, accepted_legal_policies=True)
+                for pk in batch
+            ]
+        )
+
+
+def follow_chunk(follower_ids, mean_following, seed):
+    rng = random.Random(seed)
+    targets = _sampler("user", seed=0)
+    rows = []
+    for follower_id in follower_ids:
+        chosen = targets.sample_unique(
+            rng, _follower_count(rng, mean_following)
+        )
+        chosen.discard(follower_id)
+        rows.extend(
+            Follow(follower_id=follower_id, following_id=pk) for pk in chosen
+        )
+    Follow.objects.bulk_create(rows, ignore_conflicts=True)
+    return len(rows)
+
+
+def _content(rng, tags):
+    words = rng.choices(WORDS, k=rng.randint(5, 25))
+    return " ".join(words + [f"#{tag}" for tag in tags])
+
+
+def post_chunk(count, days, replies, seed):
+    """``count`` posts with their tags; ``replies`` answer existing posts"""
+    rng = random.Random(seed)
+    authors = _sampler("user", seed=0)
+    parents = _sampler("post", seed=1) if replies else None
+    tag_pool = PowerLaw(range(HASHTAGS), seed=2)
+    hashtags = dict(
+        Hashtag.objects.filter(tag__startswith=HASHTAG_PREFIX).values_list(
+            "tag", "id"
+        )
+    )
+    now = timezone.now()
+
+    parent_ids = parents.sample(rng, count) if replies else [None] * count
+    parent_paths = dict(
+        Post.objects.filter(pk__in=set(parent_ids)).values_list("pk", "path")
+    )
+
+    posts, tags = [], []
+    for parent_id in parent_ids:
+        post_tags = sorted(
+            {
+                f"{HASHTAG_PREFIX}{n}"
+                for n in tag_pool.sample(rng, rng.choice((0, 0, 1, 2)))
+            }
+        )
+        created_at = now - timedelta(seconds=rng.random() * days * 86400)
+        salt = rng.randrange(36**threads.SALT_WIDTH)
+        if parent_id is None:
+            path, depth = threads.segment(created_at, salt), 0
+        else:
+            path, depth = threads.child_path(
+                parent_paths[parent_id], 0, created_at, salt
+            )
+        # Parents are top-level posts, so they are also the thread root
+        posts.append(
+            Post(
+                user_id=authors.sample(rng)[0],
+                content=_content(rng, post_tags),
+                parent_post_id=parent_id,
+                root_post_id=parent_id,
+                path=path,
+                depth=depth,
+                created_at=created_at,
+            )
+        )
+        tags.append(post_tags)
+
+    with explicit_timestamps(_post_created_at()):
+        created = Post.objects.bulk_create(posts)
+    if created and created[0].pk is not None:  # backend returns new IDs
+        PostHashtag.objects.bulk_create(
+            [
+                PostHashtag(
+                    post_id=post.pk,
+                    hashtag_id=hashtags[tag],
+                    position=i,
+                    created_at=post.created_at,
+                )
+                for post, post_tags in zip(created, tags)
+                for i, tag in enumerate(post_tags)
+            ],
+            ignore_conflicts=True,
+        )
+    return len(created)
+
+
+def like_chunk(count, seed):
+    rng = random.Random(seed)
+    users = _sampler("user", seed=0)
+    posts = _sampler("post", seed=1)
+    rows = [
+        Like(user_id=user_id, post_id=post_id)
+        for user_id, post_id in zip(
+            users.sample(rng, count), posts.sample(rng, count)
+        )
+    ]
+    Like.objects.bulk_create(rows, ignore_conflicts=True)
+    return len(rows)
+
+
+# =============================================================================
+# DRIVER
+# =============================================================================
+
+
+def chunk_sizes(total, batch_size):
+    return [
+        min(batch_size, total - start) for start in range(0, total, batch_size)
+    ]
+
+
+def run_chunks(func, argument_lists, workers=1):
+    """
+    Run ``func(*args)`` for every args tuple; yields results as chunks
+    finish.
+    """
+    if workers <= 1 or connection.vendor == "sqlite":
+        for args in argument_lists:
+            yield func(*args)
+        return
+    connections.close_all()  # children must not share the connection
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(func, *args) for args in argument_lists]
+        for future in futures:
+            yield future.result()
+
+
+def ensure_hashtags():
+    Hashtag.objects.bulk_create(
+        [Hashtag(tag=f"{HASHTAG_PREFIX}{n}") for n in range(HASHTAGS)],
+        ignore_conflicts=True,
+    )
+
+
+def recount_hashtags():
+    """Set ``Hashtag.use_count`` from the link rows (one UPDATE)"""
+    uses = (
+        PostHashtag.objects.filter(hashtag=OuterRef("pk"))
+        .order_by()
+        .values("hashtag")
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    return Hashtag.objects.update(
+        use_count=Coalesce(Subquery(uses, output_field=IntegerField()), 0)
+    )
+
+
+def reset_samplers():
+    """Forget cached ID lists (after new users or posts were written)"""
+    _samplers.clear()
+
+
+def scale_chunks(total, batch_size, seed):
+    """``(size, seed)`` per chunk of ``total`` rows"""
+    return [
+        (size, seed * 1_000_003 + index)
+        for index, size in enumerate(chunk_sizes(total, batch_size))
+    ]
+
+
+def split_ids(ids, batch_size):
+    for start in range(0, len(ids), batch_size):
+        yield ids[start : start + batch_size]
@@ -317,7 +317,7 @@ class TestThreadAPI:
         response = authenticated_client.get(f"/api/posts/{post.id}/thread/")
         assert response.status_code == status.HTTP_200_OK
         # Should include original post and all replies
-        assert len(response.data) >= 3
+        assert len(response.data["results"]) >= 3
 
     def test_get_replies(self, authenticated_client, post, user):
         """Test getting direct replies"""
@@ -434,7 +434,7 @@ class TestHomeFeedAPI:
         response = authenticated_client.get("/api/posts/home/")
         assert response.status_code == status.HTTP_200_OK
         # Should include posts from followed users
-        contents = [p["content"] for p in response.data]
+        contents = [p["content"] for p in response.data["results"]]
         assert "Other user's post" in contents
 
     def test_home_feed_shows_own_posts(self, authenticated_client, user, db):
@@ -442,5 +442,5 @@ class TestHomeFeedAPI:
         Post.objects.create(user=user, content="My own post")
         response = authenticated_client.get("/api/posts/home/")
         assert response.status_code == status.HTTP_200_OK
-        contents = [p["content"] for p in response.data]
+        contents = [p["content"] for p in response.data["results"]]
         assert "My own post" in contents
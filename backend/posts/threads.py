@@ -0,0 +1,87 @@
+"""
+Materialized thread paths.
+
+Every post stores ``path``, the concatenated segments of its ancestors and
+itself, and ``depth``, its distance from the thread root (0 for top-level
+posts). A segment is a fixed-width, time-ordered token, so sorting by
+``path`` walks a thread depth-first with siblings oldest first, and the
+subtree of a post is the index range ``[path, path + MAX_SEGMENT)``. A
+page of a thread is therefore one range scan on the ``path`` index, and
+"load more replies under X" is the same query started at X.
+
+Segments are built from the creation time, not the ID, so a post's path
+is known before it is inserted. Chains deeper than ``MAX_DEPTH`` stop
+nesting: further replies are stored as siblings of their parent.
+
+Settings:
+    THREAD_PAGE_SIZE       posts per page (default 50)
+    THREAD_MAX_PAGE_SIZE   largest ``limit`` a client may ask for
+    THREAD_DEFAULT_DEPTH   levels below the node when ``depth`` is not
+                           given (default 5)
+"""
+
+import random
+import string
+
+from django.conf import settings
+
+ALPHABET = string.digits + string.ascii_lowercase  # sorts the same in C
+TIME_WIDTH = 10  # microseconds since the epoch, base 36 (until 2084)
+SALT_WIDTH = 2  # separates siblings created in the same microsecond
+SEGMENT_WIDTH = TIME_WIDTH + SALT_WIDTH
+MAX_SEGMENT = ALPHABET[-1] * SEGMENT_WIDTH
+MAX_DEPTH = 64
+PATH_MAX_LENGTH = SEGMENT_WIDTH * (MAX_DEPTH + 1)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def page_size():
+    return _setting("THREAD_PAGE_SIZE", 50)
+
+
+def max_page_size():
+    return _setting("THREAD_MAX_PAGE_SIZE", 200)
+
+
+def default_depth():
+    return _setting("THREAD_DEFAULT_DEPTH", 5)
+
+
+def _base36(number, width):
+    digits = []
+    for _ in range(width):
+        number, digit = divmod(number, 36)
+        digits.append(ALPHABET[digit])
+    return "".join(reversed(digits))
+
+
+def segment(when, salt=None):
+    """Path segment of a post created at ``when``"""
+    micros = int(when.timestamp() * 1_000_000)
+    if salt is None:
+        salt = random.randrange(36**SALT_WIDTH)
+    return _base36(micros, TIME_WIDTH) + _base36(salt, SALT_WIDTH)
+
+
+def child_path(parent_path, parent_depth, when, salt=None):
+    """``(path, depth)`` of a reply to a post at ``parent_path``"""
+    if parent_depth >= MAX_DEPTH:
+        # Too deep: attach next to the parent instead of under it
+        return parent_path[:-SEGMENT_WIDTH] + segment(when, salt), MAX_DEPTH
+    return parent_path + segment(when, salt), parent_depth + 1
+
+
+def subtree(queryset, node, depth=None):
+    """
+    ``node`` and its descendants down to ``depth`` levels below it, in
+    thread order.
+    """
+    queryset = queryset.filter(
+        path__gte=node.path, path__lt=node.path + MAX_SEGMENT
+    )
+    if depth is not None:
+        queryset = queryset.filter(depth__lte=node.depth + depth)
+    return queryset.order_by("path")
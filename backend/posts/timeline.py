@@ -0,0 +1,244 @@
+"""
+Home timeline store (fan-out-on-write with a fan-out-on-read fallback).
+
+Every new post is copied into the ``TimelineEntry`` rows of the author and
+of each follower, so reading a home feed is one indexed range scan instead
+of an ``IN (following...)`` query over the whole post table.
+
+Authors with more than ``TIMELINE_FANOUT_MAX_FOLLOWERS`` followers are not
+fanned out (that would be a write storm); their posts are merged in at
+read time from the ``(user, created_at)`` post index instead.
+
+Settings:
+    TIMELINE_FANOUT_MAX_FOLLOWERS  follower threshold for fan-out-on-read
+    TIMELINE_MAX_ENTRIES           entries kept per timeline when trimming
+    TIMELINE_BACKFILL_POSTS        posts copied into a timeline on follow
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from users.models import UserProfile
+
+from .models import Follow, Post, TimelineEntry, post_soft_deleted
+
+CELEBRITY_CACHE_KEY = "timeline:celebrities"
+CELEBRITY_CACHE_TIMEOUT = 300
+
+
+def fanout_limit():
+    return getattr(settings, "TIMELINE_FANOUT_MAX_FOLLOWERS", 5000)
+
+
+def max_entries():
+    return getattr(settings, "TIMELINE_MAX_ENTRIES", 800)
+
+
+def backfill_size():
+    return getattr(settings, "TIMELINE_BACKFILL_POSTS", 100)
+
+
+def celebrity_ids():
+    """IDs of users whose posts are merged at read time (cached)"""
+    ids = cache.get(CELEBRITY_CACHE_KEY)
+    if ids is None:
+        ids = set(
+            UserProfile.objects.filter(
+                followers_count__gt=fanout_limit()
+            ).values_list("user_id", flat=True)
+        )
+        cache.set(CELEBRITY_CACHE_KEY, ids, CELEBRITY_CACHE_TIMEOUT)
+    return ids
+
+
+def _entries_for(post, user_ids):
+    return [
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.user_id,
+            created_at=post.created_at,
+        )
+        for user_id in user_ids
+    ]
+
+
+def fan_out_post(post):
+    """Write ``post`` into its author's and followers' timelines"""
+    if post.is_deleted:
+        return
+
+    limit = fanout_limit()
+    follower_ids = list(
+        Follow.objects.filter(following_id=post.user_id).values_list(
+            "follower_id", flat=True
+        )[: limit + 1]
+    )
+    if len(follower_ids) > limit:
+        # Too many followers: readers pick this post up at read time
+        follower_ids = []
+
+    TimelineEntry.objects.bulk_create(
+        _entries_for(post, {post.user_id, *follower_ids}),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def backfill_follow(follower_id, following_id):
+    """Copy the followed user's recent posts into the follower's timeline"""
+    if following_id in celebrity_ids():
+        return
+
+    posts = Post.objects.filter(
+        user_id=following_id, is_deleted=False
+    ).order_by("-created_at")[: backfill_size()]
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=follower_id,
+                post_id=post.pk,
+                author_id=following_id,
+                created_at=post.created_at,
+            )
+            for post in posts.only("id", "created_at")
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    trim_timeline(follower_id)
+
+
+def remove_follow(follower_id, following_id):
+    """Drop the unfollowed user's posts from the follower's timeline"""
+    TimelineEntry.objects.filter(
+        user_id=follower_id, author_id=following_id
+    ).delete()
+
+
+def remove_post(post):
+    """Drop a deleted post from every timeline"""
+    TimelineEntry.objects.filter(post_id=post.pk).delete()
+
+
+def trim_timeline(user_id):
+    """Keep only the newest ``TIMELINE_MAX_ENTRIES`` entries of a timeline"""
+    # Keyset of the newest entry past the limit; entries sharing its
+    # timestamp but ranked above it stay
+    cutoff = (
+        TimelineEntry.objects.filter(user_id=user_id)
+        .order_by("-created_at", "-post_id")
+        .values_list("created_at", "post_id")[max_entries() :]
+        .first()
+    )
+    if cutoff is not None:
+        created_at, post_id = cutoff
+        TimelineEntry.objects.filter(
+            Q(created_at=created_at, post_id=post_id)
+            | _before(cutoff, "post_id"),
+            user_id=user_id,
+        ).delete()
+
+
+def rebuild_timeline(user):
+    """Recompute a user's timeline from scratch"""
+    TimelineEntry.objects.filter(user=user).delete()
+    following_ids = set(
+        Follow.objects.filter(follower=user).values_list(
+            "following_id", flat=True
+        )
+    )
+    author_ids = (following_ids - celebrity_ids()) | {user.pk}
+    posts = (
+        Post.objects.filter(user_id__in=author_ids, is_deleted=False)
+        .order_by("-created_at")
+        .only("id", "user_id", "created_at")[: max_entries()]
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(
+                user_id=user.pk,
+                post_id=post.pk,
+                author_id=post.user_id,
+                created_at=post.created_at,
+            )
+            for post in posts
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+def _before(position, id_field):
+    created_at, post_id = position
+    return Q(created_at__lt=created_at) | Q(
+        created_at=created_at, **{f"{id_field}__lt": post_id}
+    )
+
+
+def home_post_ids(user, limit, before=None):
+    """
+    Newest ``limit`` post IDs for a user's home feed.
+
+    Reads the materialized timeline and merges in recent posts from any
+    followed accounts that are served fan-out-on-read. ``before`` is an
+    optional ``(created_at, post_id)`` keyset position to page from.
+    """
+    entries = TimelineEntry.objects.filter(user=user)
+    if before is not None:
+        entries = entries.filter(_before(before, "post_id"))
+    rows = list(
+        entries.order_by("-created_at", "-post_id").values_list(
+            "created_at", "post_id"
+        )[:limit]
+    )
+
+    celebrities = celebrity_ids()
+    if celebrities:
+        followed = list(
+            Follow.objects.filter(
+                follower=user, following_id__in=celebrities
+            ).values_list("following_id", flat=True)
+        )
+        if followed:
+            posts = Post.objects.filter(user_id__in=followed, is_deleted=False)
+            if before is not None:
+                posts = posts.filter(_before(before, "id"))
+            rows.extend(
+                posts.order_by("-created_at", "-id").values_list(
+                    "created_at", "id"
+                )[:limit]
+            )
+            # An author can cross the threshold while already fanned out
+            rows = sorted(set(rows), reverse=True)[:limit]
+
+    return [post_id for _, post_id in rows]
+
+
+# =============================================================================
+# SIGNALS
+# =============================================================================
+
+
+@receiver(post_save, sender=Post)
+def fan_out_on_create(sender, instance, created, **kwargs):
+    if created:
+        fan_out_post(instance)
+
+
+@receiver(post_soft_deleted, sender=Post)
+def remove_on_soft_delete(sender, instance, **kwargs):
+    remove_post(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_on_follow(sender, instance, created, **kwargs):
+    if created:
+        backfill_follow(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def trim_on_unfollow(sender, instance, **kwargs):
+    remove_follow(instance.follower_id, instance.following_id)
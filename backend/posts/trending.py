@@ -0,0 +1,230 @@
+"""
+Trending hashtags.
+
+Every hashtag use increments a per-hour counter (``HashtagHourlyCount``).
+A window's ranking scores each tag by its exponentially decayed use count
+over the window, so a burst of recent uses outranks a steady all-time
+favourite:
+
+    score = sum(count(hour) * 2 ** ((hour - landmark) / half_life))
+
+with ``half_life = window / 4``. The best ``TRENDING_CANDIDATES`` tags of
+each window are kept precomputed in the cache, so the endpoint only
+slices a sorted list. Writes merge into those lists incrementally; since
+all scores are relative to the same ``landmark`` an increment is a plain
+addition. Buckets leaving the window and tags outside the candidate list
+are only picked up by the periodic full refresh, which runs lazily once a
+list is older than ``TRENDING_REFRESH_SECONDS`` (or via the
+``refresh_trending`` management command).
+
+Settings:
+    TRENDING_CANDIDATES        tags kept per precomputed window list
+    TRENDING_REFRESH_SECONDS   age after which a list is recomputed
+"""
+
+import time
+from datetime import timedelta
+
+from caching.objects import trending_cache
+from django.conf import settings
+from django.db.models import Case, F, FloatField, Sum, Value, When
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import HashtagHourlyCount, Post, PostHashtag, post_soft_deleted
+
+WINDOWS = {
+    "1h": timedelta(hours=1),
+    "24h": timedelta(hours=24),
+    "7d": timedelta(days=7),
+}
+DEFAULT_WINDOW = "7d"
+
+
+def candidates():
+    return getattr(settings, "TRENDING_CANDIDATES", 100)
+
+
+def refresh_seconds():
+    return getattr(settings, "TRENDING_REFRESH_SECONDS", 60)
+
+
+def bucket_hour(when):
+    return when.replace(minute=0, second=0, microsecond=0)
+
+
+def _half_life(window):
+    return WINDOWS[window].total_seconds() / 4
+
+
+def _weight(window, hour, landmark):
+    return 2 ** ((hour.timestamp() - landmark) / _half_life(window))
+
+
+def _sort(items):
+    items.sort(key=lambda item: (-item["score"], item["tag"]))
+    del items[candidates() :]
+
+
+# =============================================================================
+# COUNTERS
+# =============================================================================
+
+
+def record_uses(hashtags, when, delta=1):
+    """
+    Count one use of each of ``hashtags`` at ``when``.
+
+    ``hashtags`` are ``Hashtag`` instances; pass ``delta=-1`` to take uses
+    back (e.g. when a post is deleted).
+    """
+    hashtags = list(hashtags)
+    if not hashtags:
+        return
+    hour = bucket_hour(when)
+    ids = [hashtag.pk for hashtag in hashtags]
+
+    HashtagHourlyCount.objects.bulk_create(
+        [HashtagHourlyCount(hashtag_id=pk, hour=hour) for pk in ids],
+        ignore_conflicts=True,
+    )
+    HashtagHourlyCount.objects.filter(hashtag_id__in=ids, hour=hour).update(
+        count=F("count") + delta
+    )
+    _merge(hashtags, hour, delta)
+
+
+def _merge(hashtags, hour, delta):
+    """Fold new uses into the precomputed window lists"""
+    cached = trending_cache.get_many(WINDOWS)
+    now = time.time()
+    for window, entry in cached.items():
+        if now - entry["computed_at"] > refresh_seconds():
+            continue  # the next read recomputes it anyway
+        if hour.timestamp() < now - WINDOWS[window].total_seconds():
+            continue
+        weight = delta * _weight(window, hour, entry["landmark"])
+        items = {item["id"]: item for item in entry["items"]}
+        for hashtag in hashtags:
+            item = items.get(hashtag.pk)
+            if item is None:
+                if delta < 0:
+                    continue
+                # Outside the list its score is unknown; count this use
+                # only and let the next refresh settle it
+                item = items[hashtag.pk] = {
+                    "id": hashtag.pk,
+                    "tag": hashtag.tag,
+                    "use_count": hashtag.use_count,
+                    "post_count": 0,
+                    "score": 0.0,
+                }
+            item["score"] += weight
+            item["post_count"] += delta
+            item["use_count"] = hashtag.use_count
+        entry["items"] = [
+            item for item in items.values() if item["post_count"] > 0
+        ]
+        _sort(entry["items"])
+        trending_cache.set(window, entry)
+
+
+# =============================================================================
+# RANKING
+# =============================================================================
+
+
+def compute(window):
+    """Rank the window's tags from the hourly counters (one query)"""
+    now = timezone.now()
+    landmark = now.timestamp()
+    start = bucket_hour(now - WINDOWS[window] + timedelta(hours=1))
+    hours = int(WINDOWS[window].total_seconds() // 3600)
+    weight = Case(
+        *[
+            When(
+                hour=start + timedelta(hours=offset),
+                then=Value(
+                    _weight(window, start + timedelta(hours=offset), landmark)
+                ),
+            )
+            for offset in range(hours)
+        ],
+        default=Value(0.0),
+        output_field=FloatField(),
+    )
+    rows = (
+        HashtagHourlyCount.objects.filter(hour__gte=start, count__gt=0)
+        .values("hashtag_id")
+        .annotate(
+            score=Sum(F("count") * weight, output_field=FloatField()),
+            post_count=Sum("count"),
+        )
+        .order_by("-score", "hashtag__tag")
+        .values(
+            "hashtag_id",
+            "hashtag__tag",
+            "hashtag__use_count",
+            "score",
+            "post_count",
+        )[: candidates()]
+    )
+    items = [
+        {
+            "id": row["hashtag_id"],
+            "tag": row["hashtag__tag"],
+            "use_count": row["hashtag__use_count"],
+            "post_count": row["post_count"],
+            "score": row["score"],
+        }
+        for row in rows
+    ]
+    return {"landmark": landmark, "computed_at": time.time(), "items": items}
+
+
+def refresh(window):
+    entry = compute(window)
+    trending_cache.set(window, entry)
+    return entry
+
+
+def trending(window=DEFAULT_WINDOW, limit=20):
+    """Top ``limit`` hashtags for ``window``, best first"""
+    entry = trending_cache.get(window)
+    if entry is None or time.time() - entry["computed_at"] > (
+        refresh_seconds()
+    ):
+        entry = refresh(window)
+    return [
+        {**item, "score": round(item["score"], 4)}
+        for item in entry["items"][:limit]
+    ]
+
+
+def prune(keep=None):
+    """Delete buckets older than the longest window; returns the count"""
+    keep = keep or max(WINDOWS.values())
+    cutoff = bucket_hour(timezone.now() - keep)
+    deleted, _ = HashtagHourlyCount.objects.filter(hour__lt=cutoff).delete()
+    return deleted
+
+
+# =============================================================================
+# SIGNALS
+# =============================================================================
+
+
+@receiver(post_save, sender=PostHashtag)
+def count_on_link(sender, instance, created, **kwargs):
+    # Bulk inserts from posts.extraction call record_uses() directly
+    if created:
+        record_uses([instance.hashtag], instance.post.created_at)
+
+
+@receiver(post_soft_deleted, sender=Post)
+def uncount_on_soft_delete(sender, instance, **kwargs):
+    links = PostHashtag.objects.filter(post=instance).select_related("hashtag")
+    record_uses(
+        [link.hashtag for link in links], instance.created_at, delta=-1
+    )
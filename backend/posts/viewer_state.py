@@ -0,0 +1,85 @@
+"""
+Viewer-state resolution for post serialization.
+
+The "is_*_by_user" flags on PostSerializer depend on the requesting user.
+Instead of one EXISTS query per post and flag, ViewerState loads the
+liked / retweeted / bookmarked sets for a whole page of posts in three
+bulk queries and the serializers read from it.
+"""
+
+from .models import Like, Post
+
+
+class ViewerState:
+    """Per-request snapshot of the viewer's relationship to a set of posts"""
+
+    def __init__(self, post_ids=(), liked=(), retweeted=(), bookmarked=()):
+        self.post_ids = set(post_ids)
+        self.liked = set(liked)
+        self.retweeted = set(retweeted)
+        self.bookmarked = set(bookmarked)
+
+    def covers(self, post_id):
+        """True if this snapshot was resolved for the given post"""
+        return post_id in self.post_ids
+
+    def merge(self, other):
+        """Fold another snapshot into this one"""
+        self.post_ids |= other.post_ids
+        self.liked |= other.liked
+        self.retweeted |= other.retweeted
+        self.bookmarked |= other.bookmarked
+        return self
+
+    @classmethod
+    def resolve(cls, user, post_ids):
+        """Load viewer state for ``post_ids`` in three bulk queries"""
+        post_ids = {pk for pk in post_ids if pk is not None}
+        if not post_ids or user is None or not user.is_authenticated:
+            return cls(post_ids=post_ids)
+
+        from bookmarks.models import Bookmark
+
+        liked = Like.objects.filter(
+            user=user, post_id__in=post_ids
+        ).values_list("post_id", flat=True)
+        retweeted = Post.objects.filter(
+            user=user,
+            retweet_of_id__in=post_ids,
+            is_deleted=False,
+            is_quote_tweet=False,
+        ).values_list("retweet_of_id", flat=True)
+        bookmarked = Bookmark.objects.filter(
+            user=user, post_id__in=post_ids
+        ).values_list("post_id", flat=True)
+
+        return cls(
+            post_ids=post_ids,
+            liked=liked,
+            retweeted=retweeted,
+            bookmarked=bookmarked,
+        )
+
+
+def resolve_into_context(context, post_ids):
+    """
+    Resolve viewer state for ``post_ids`` into a serializer context.
+
+    State that is already present for some posts is kept, so nested
+    serializers sharing the context only pay for posts not seen yet.
+    """
+    request = context.get("request")
+    user = getattr(request, "user", None)
+
+    state = context.get("viewer_state")
+    post_ids = set(post_ids)
+    if state is not None:
+        post_ids = {pk for pk in post_ids if not state.covers(pk)}
+        if not post_ids:
+            return state
+
+    resolved = ViewerState.resolve(user, post_ids)
+    if state is not None:
+        resolved = state.merge(resolved)
+    context["viewer_state"] = resolved
+    return resolved
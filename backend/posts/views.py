@@ -3,10 +3,14 @@ Post views with support for retweets, quotes, threads, hashtags, mentions.
 Uses drf-spectacular for OpenAPI documentation.
 """
 
-from datetime import timedelta
-
-from django.db.models import Count, F
-from django.utils import timezone
+from blocks.service import (
+    blocked_ids,
+    exclude_blocked,
+    is_blocked,
+    mask,
+    visible,
+)
+from django.db.models import Exists, F, OuterRef, Q, Subquery
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     OpenApiParameter,
@@ -16,9 +20,13 @@ from drf_spectacular.utils import (
 )
 from rest_framework import filters, permissions, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 
-from .models import Follow, Hashtag, Like, Post
+from backend.pagination import KeysetPagination
+
+from . import threads, trending
+from .models import Follow, Hashtag, Like, Mention, Post, PostHashtag
 from .serializers import (
     FollowSerializer,
     HashtagSerializer,
@@ -29,6 +37,37 @@ from .serializers import (
 )
 
 
+def with_post_relations(queryset, prefix=""):
+    """
+    Eager-load everything PostSerializer touches for a page of posts.
+
+    ``prefix`` is the path to the post from the queryset's model, e.g.
+    ``"post__"`` for a page of bookmarks.
+    """
+    return queryset.select_related(
+        *(
+            prefix + path
+            for path in ("user", "retweet_of__user", "parent_post__user")
+        )
+    ).prefetch_related(
+        *(
+            prefix + path
+            for path in ("post_hashtags__hashtag", "mentions__mentioned_user")
+        )
+    )
+
+
+class ThreadPagination(KeysetPagination):
+    """Keyset pages of a thread in ``path`` order"""
+
+    ordering = "path"
+
+    def get_page_size(self, request):
+        self.page_size = threads.page_size()
+        self.max_page_size = threads.max_page_size()
+        return super().get_page_size(request)
+
+
 @extend_schema_view(
     list=extend_schema(
         summary="List all posts",
@@ -86,6 +125,7 @@ class PostViewSet(viewsets.ModelViewSet):
 
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ["content", "user__username"]
     ordering_fields = ["created_at", "like_count", "retweet_count"]
@@ -93,27 +133,27 @@ class PostViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Get posts with optional filtering"""
-        queryset = (
-            Post.objects.filter(is_deleted=False)
-            .select_related("user", "retweet_of__user", "parent_post__user")
-            .prefetch_related(
-                "post_hashtags__hashtag", "mentions__mentioned_user"
-            )
-        )
+        queryset = with_post_relations(Post.objects.filter(is_deleted=False))
 
         # Filter by hashtag
         hashtag = self.request.query_params.get("hashtag")
         if hashtag:
             hashtag_normalized = Hashtag.normalize_tag(hashtag)
             queryset = queryset.filter(
-                post_hashtags__hashtag__tag=hashtag_normalized
+                pk__in=PostHashtag.objects.filter(
+                    hashtag__tag=hashtag_normalized, is_deleted=False
+                ).values("post_id")
             )
 
         # Filter by mention
         mention = self.request.query_params.get("mention")
         if mention:
             queryset = queryset.filter(
-                mentions__mentioned_user__username=mention
+                Exists(
+                    Mention.objects.filter(
+                        post=OuterRef("pk"), mentioned_user__username=mention
+                    )
+                )
             )
 
         # Filter by user
@@ -121,12 +161,31 @@ class PostViewSet(viewsets.ModelViewSet):
         if user_id:
             queryset = queryset.filter(user_id=user_id)
 
-        return queryset.distinct()
+        # Filters are semi-joins (IN/EXISTS) and SearchFilter only
+        # follows forward relations, so rows are never repeated and no
+        # DISTINCT sort is needed
+        return exclude_blocked(
+            queryset, self.request.user, "user", "retweet_of__user"
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Serve post detail from the object cache"""
+        from caching.objects import post_cache
+
+        try:
+            pk = int(kwargs[self.lookup_field])
+        except ValueError:
+            raise NotFound()
+        post = post_cache.get_or_load(pk)
+        if post is None or not visible(post, blocked_ids(request.user)):
+            raise NotFound()
+        self.check_object_permissions(request, post)
+        serializer = self.get_serializer(post)
+        return Response(serializer.data)
 
     def perform_destroy(self, instance):
         """Soft delete posts"""
-        instance.is_deleted = True
-        instance.save(update_fields=["is_deleted"])
+        instance.soft_delete()
 
     @extend_schema(
         summary="Retweet a post",
@@ -160,11 +219,11 @@ class PostViewSet(viewsets.ModelViewSet):
             user=request.user, content="", retweet_of=original_post
         )
 
-        # Create notification (count update handled by signal)
-        from notifications.models import Notification
+        # Queue notification (count update handled by signal)
+        from notifications.outbox import enqueue
 
         if original_post.user != request.user:
-            Notification.objects.create(
+            enqueue(
                 user=original_post.user,
                 actor=request.user,
                 verb="retweeted your post",
@@ -206,25 +265,92 @@ class PostViewSet(viewsets.ModelViewSet):
 
     @extend_schema(
         summary="Get thread",
-        description="Get all posts in a thread, starting from the root",
+        description=(
+            "Get a page of a thread as a depth-first tree: each post is "
+            "followed by its replies, siblings oldest first. Use `node` to "
+            "load the replies under one post and `depth` to limit how many "
+            "levels below it are returned; `depth` and `reply_count` on "
+            "each post tell clients where replies were left out."
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="node",
+                type=OpenApiTypes.INT,
+                description="Start at this post of the thread (default root)",
+            ),
+            OpenApiParameter(
+                name="depth",
+                type=OpenApiTypes.INT,
+                description="Levels below the node to include (default 5)",
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                description="Posts per page (default 50, max 200)",
+            ),
+            OpenApiParameter(
+                name="cursor",
+                type=OpenApiTypes.STR,
+                description="Opaque cursor returned in `next`",
+            ),
+        ],
         responses={200: PostSerializer(many=True)},
     )
     @action(detail=True, methods=["get"])
     def thread(self, request, pk=None):
-        """Get all posts in a thread"""
+        """Get a page of a thread, or of the replies under one of its posts"""
         post = self.get_object()
-        root = post.root_post or post
-
-        # Get the root post and all replies
-        thread_posts = [root]
-        thread_posts.extend(
-            Post.objects.filter(root_post=root, is_deleted=False)
-            .select_related("user")
-            .order_by("created_at")
-        )
+        root_id = post.root_post_id or post.id
+        node = self.thread_node(request, post, root_id)
 
-        serializer = self.get_serializer(thread_posts, many=True)
-        return Response(serializer.data)
+        try:
+            depth = int(request.query_params.get("depth"))
+        except (TypeError, ValueError):
+            depth = threads.default_depth()
+        depth = min(max(depth, 0), threads.MAX_DEPTH)
+
+        paginator = ThreadPagination()
+        paginator.request = request
+        paginator.set_ordering("path", descending=False)
+        page_size = paginator.get_page_size(request)
+        position = paginator.get_position(request, Post)
+
+        # The root stays in the tree even when deleted
+        posts = threads.subtree(
+            exclude_blocked(
+                with_post_relations(
+                    Post.objects.filter(Q(is_deleted=False) | Q(pk=root_id))
+                ),
+                request.user,
+                "user",
+            ),
+            node,
+            depth,
+        )
+        if position is not None:
+            posts = posts.filter(paginator.position_filter(position))
+        posts = posts.order_by("path", "id")[: page_size + 1]
+
+        page = paginator.build_page(list(posts), page_size)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @staticmethod
+    def thread_node(request, post, root_id):
+        """The ``?node=`` post (default the root); must be in the thread"""
+        node_id = request.query_params.get("node", str(root_id))
+        if node_id == str(post.pk):
+            return post
+        node = None
+        if node_id.isdigit():
+            node = (
+                Post.objects.only("root_post_id", "path", "depth")
+                .filter(pk=node_id)
+                .first()
+            )
+        if node is None or (node.root_post_id or node.pk) != root_id:
+            raise NotFound("Post is not part of this thread")
+        return node
 
     @extend_schema(
         summary="Get replies to a post",
@@ -236,42 +362,57 @@ class PostViewSet(viewsets.ModelViewSet):
         """Get replies to a post"""
         post = self.get_object()
 
-        replies = (
-            Post.objects.filter(parent_post=post, is_deleted=False)
-            .select_related("user")
-            .order_by("created_at")
-        )
+        replies = exclude_blocked(
+            with_post_relations(
+                Post.objects.filter(parent_post=post, is_deleted=False)
+            ),
+            request.user,
+            "user",
+        ).order_by("created_at")
 
         serializer = self.get_serializer(replies, many=True)
         return Response(serializer.data)
 
     @extend_schema(
         summary="Get trending hashtags",
-        description="Get the top 20 trending hashtags from the last 7 days",
+        description=(
+            "Get the top trending hashtags, ranked by time-decayed use "
+            "within the window"
+        ),
+        parameters=[
+            OpenApiParameter(
+                name="window",
+                type=OpenApiTypes.STR,
+                enum=list(trending.WINDOWS),
+                description="Ranking window (default 7d)",
+            ),
+            OpenApiParameter(
+                name="limit",
+                type=OpenApiTypes.INT,
+                description="Number of hashtags (default 20, max 50)",
+            ),
+        ],
         responses={200: TrendingHashtagSerializer(many=True)},
     )
     @action(detail=False, methods=["get"])
     def trending_hashtags(self, request):
-        """Get trending hashtags from the last 7 days"""
-        week_ago = timezone.now() - timedelta(days=7)
-
-        hashtags = (
-            Hashtag.objects.filter(last_used_at__gte=week_ago)
-            .annotate(post_count=Count("hashtag_posts"))
-            .order_by("-use_count")[:20]
-        )
+        """Get trending hashtags from the precomputed window ranking"""
+        window = request.query_params.get("window", trending.DEFAULT_WINDOW)
+        if window not in trending.WINDOWS:
+            return Response(
+                {"detail": f"window must be one of {list(trending.WINDOWS)}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            limit = 20
+        limit = min(max(limit, 1), 50)
 
-        return Response(
-            [
-                {
-                    "id": h.id,
-                    "tag": h.tag,
-                    "use_count": h.use_count,
-                    "post_count": h.post_count,
-                }
-                for h in hashtags
-            ]
+        serializer = TrendingHashtagSerializer(
+            trending.trending(window, limit), many=True
         )
+        return Response(serializer.data)
 
     @extend_schema(
         summary="Get home feed",
@@ -281,25 +422,25 @@ class PostViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"])
     def home(self, request):
         """Get home feed - posts from followed users"""
-        following_ids = Follow.objects.filter(
-            follower=request.user
-        ).values_list("following_id", flat=True)
-
-        # Include user's own posts and posts from followed users
-        posts = (
-            Post.objects.filter(
-                user_id__in=list(following_ids) + [request.user.id],
-                is_deleted=False,
-            )
-            .select_related("user", "retweet_of__user")
-            .prefetch_related(
-                "post_hashtags__hashtag", "mentions__mentioned_user"
-            )
-            .order_by("-created_at")[:50]
-        )
-
-        serializer = self.get_serializer(posts, many=True)
-        return Response(serializer.data)
+        from .timeline import home_post_ids
+
+        paginator = self.paginator
+        paginator.request = request
+        paginator.set_ordering("created_at")
+        page_size = paginator.get_page_size(request)
+        before = paginator.get_position(request, Post)
+
+        # Own posts and followed users' posts, read from the timeline store
+        post_ids = home_post_ids(request.user, page_size + 1, before=before)
+        posts = with_post_relations(
+            Post.objects.filter(pk__in=post_ids, is_deleted=False)
+        ).order_by("-created_at", "-id")
+
+        page = paginator.build_page(list(posts), page_size)
+        # After paging, so the cursor still advances past hidden posts
+        page = mask(page, request.user)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @extend_schema(
         summary="Get user posts",
@@ -316,17 +457,18 @@ class PostViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"], url_path="user/(?P<user_id>[^/.]+)")
     def user_posts(self, request, user_id=None):
         """Get posts by a specific user"""
-        posts = (
-            Post.objects.filter(user_id=user_id, is_deleted=False)
-            .select_related("user", "retweet_of__user")
-            .prefetch_related(
-                "post_hashtags__hashtag", "mentions__mentioned_user"
-            )
-            .order_by("-created_at")
-        )
+        posts = exclude_blocked(
+            with_post_relations(
+                Post.objects.filter(user_id=user_id, is_deleted=False)
+            ),
+            request.user,
+            "user",
+            "retweet_of__user",
+        ).order_by("-created_at")
 
-        serializer = self.get_serializer(posts, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(posts)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
     @extend_schema(
         summary="Get posts by hashtag",
@@ -343,22 +485,39 @@ class PostViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["get"], url_path="hashtag/(?P<tag>[^/.]+)")
     def by_hashtag(self, request, tag=None):
         """Get posts by hashtag"""
-        tag_normalized = Hashtag.normalize_tag(tag)
-
-        posts = (
-            Post.objects.filter(
-                post_hashtags__hashtag__tag=tag_normalized, is_deleted=False
-            )
-            .select_related("user", "retweet_of__user")
-            .prefetch_related(
-                "post_hashtags__hashtag", "mentions__mentioned_user"
+        paginator = self.paginator
+        paginator.request = request
+        paginator.set_ordering("created_at")
+        page_size = paginator.get_page_size(request)
+        before = paginator.get_position(request, Post)
+
+        # One ordered range scan of posthashtag_timeline_idx. The tag is
+        # looked up in a subquery so the planner sees a single hashtag_id
+        # and needs no sort.
+        hashtag = Hashtag.objects.filter(tag=Hashtag.normalize_tag(tag))
+        links = PostHashtag.objects.filter(
+            hashtag_id=Subquery(hashtag.values("id")), is_deleted=False
+        )
+        if before is not None:
+            created_at, post_id = before
+            links = links.filter(
+                Q(created_at__lt=created_at)
+                | Q(created_at=created_at, post_id__lt=post_id)
             )
-            .distinct()
-            .order_by("-created_at")
+        post_ids = list(
+            links.order_by("-created_at", "-post_id").values_list(
+                "post_id", flat=True
+            )[: page_size + 1]
         )
+        posts = with_post_relations(
+            Post.objects.filter(pk__in=post_ids, is_deleted=False)
+        ).order_by("-created_at", "-id")
 
-        serializer = self.get_serializer(posts, many=True)
-        return Response(serializer.data)
+        page = paginator.build_page(list(posts), page_size)
+        # After paging, so the cursor still advances past hidden posts
+        page = mask(page, request.user)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     @extend_schema(
         summary="Get posts mentioning a user",
@@ -377,20 +536,22 @@ class PostViewSet(viewsets.ModelViewSet):
     )
     def by_mention(self, request, username=None):
         """Get posts mentioning a specific user"""
-        posts = (
-            Post.objects.filter(
-                mentions__mentioned_user__username=username, is_deleted=False
-            )
-            .select_related("user", "retweet_of__user")
-            .prefetch_related(
-                "post_hashtags__hashtag", "mentions__mentioned_user"
-            )
-            .distinct()
-            .order_by("-created_at")
-        )
+        posts = exclude_blocked(
+            with_post_relations(
+                Post.objects.filter(
+                    pk__in=Mention.objects.filter(
+                        mentioned_user__username=username
+                    ).values("post_id"),
+                    is_deleted=False,
+                )
+            ),
+            request.user,
+            "user",
+        ).order_by("-created_at")
 
-        serializer = self.get_serializer(posts, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(posts)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
 
 @extend_schema_view(
@@ -469,11 +630,11 @@ class LikeViewSet(viewsets.ModelViewSet):
 
         serializer.save(user=self.request.user)
 
-        # Create notification (count update handled by signal)
-        from notifications.models import Notification
+        # Queue notification (count update handled by signal)
+        from notifications.outbox import enqueue
 
         if post.user != self.request.user:
-            Notification.objects.create(
+            enqueue(
                 user=post.user,
                 actor=self.request.user,
                 verb="liked your post",
@@ -578,6 +739,11 @@ class FollowViewSet(viewsets.ModelViewSet):
 
             raise ValidationError({"detail": "Cannot follow yourself"})
 
+        if is_blocked(self.request.user, following_user.pk):
+            from rest_framework.exceptions import ValidationError
+
+            raise ValidationError({"detail": "Cannot follow this user"})
+
         # Check if already following
         if Follow.objects.filter(
             follower=self.request.user, following=following_user
@@ -589,11 +755,11 @@ class FollowViewSet(viewsets.ModelViewSet):
         serializer.save(follower=self.request.user)
         logger.info(f"Follow created successfully")
 
-        # Create notification (non-critical, silently fail if error)
+        # Queue notification (non-critical, silently fail if error)
         try:
-            from notifications.models import Notification
+            from notifications.outbox import enqueue
 
-            Notification.objects.create(
+            enqueue(
                 user=following_user,
                 actor=self.request.user,
                 verb="followed you",
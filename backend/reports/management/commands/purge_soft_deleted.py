@@ -1,14 +1,71 @@
+"""
+Permanently delete soft-deleted posts (see posts/purge.py).
+
+Works in primary-key chunks that each commit on their own, so it can run
+against a live database and be interrupted at any time; running it again
+resumes with the posts that are left.
+
+Run with: python manage.py purge_soft_deleted [--chunk-size N]
+          [--limit N] [--pause SECONDS]
+"""
+
+import time
+
 from django.core.management.base import BaseCommand
 from posts.models import Post
+from posts.purge import purge
 
 
 class Command(BaseCommand):
     help = "Permanently delete all posts marked as soft-deleted."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Soft-deleted posts purged per transaction (default: 1000)",
+        )
+        parser.add_argument(
+            "--limit",
+            type=int,
+            help="Stop after this many soft-deleted posts",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0,
+            help="Seconds to sleep between chunks (default: 0)",
+        )
+
     def handle(self, *args, **options):
-        deleted_count, _ = Post.objects.filter(is_deleted=True).delete()
+        pending = Post.objects.filter(is_deleted=True).count()
+        if options["limit"] is not None:
+            pending = min(pending, options["limit"])
+
+        started = time.monotonic()
+        totals = {"posts": 0, "cascaded": 0, "rows": 0}
+        for totals in purge(
+            chunk_size=options["chunk_size"],
+            limit=options["limit"],
+            pause=options["pause"],
+        ):
+            done = totals["posts"] - totals["cascaded"]
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f"  {done}/{pending} posts purged "
+                f"(+{totals['cascaded']} cascaded, {totals['rows']} rows), "
+                f"up to id {totals['last_id']}, "
+                f"{totals['posts'] / elapsed:.0f} posts/s, "
+                f"chunk {totals['seconds']:.2f}s"
+            )
+
+        elapsed = time.monotonic() - started
+        deleted = totals["posts"] - totals["cascaded"]
         self.stdout.write(
             self.style.SUCCESS(
-                f"Permanently deleted {deleted_count} soft-deleted posts."
+                f"Permanently deleted {deleted} soft-deleted posts "
+                f"({totals['cascaded']} replies and retweets with them, "
+                f"{totals['rows']} dependent rows) in {elapsed:.1f}s."
             )
         )
@@ -0,0 +1,347 @@
+"""
+In-memory prefix index for username and hashtag autocomplete.
+
+Each index is a trie whose nodes keep their own top-K completions in a
+bounded heap ranked by weight (followers for users, use count for
+hashtags). A lookup walks ``len(prefix)`` nodes and sorts at most K
+cached entries, so it costs a few microseconds no matter how many
+entries share the prefix.
+
+Indexes are built lazily per process on first use, updated incrementally
+from the signal receivers below, and fully reloaded every
+``AUTOCOMPLETE_REFRESH_SECONDS`` to pick up changes made by other worker
+processes or by bulk ``UPDATE`` statements that bypass signals. A reload
+runs in a background thread while lookups keep using the stale index,
+which is swapped out once the new one is built.
+
+Settings:
+    AUTOCOMPLETE_TOP_K             completions cached per trie node
+    AUTOCOMPLETE_REFRESH_SECONDS   full reload interval per process
+"""
+
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from posts.models import Hashtag
+
+
+class _Ranked:
+    """A ``(weight, key)`` pair ordered from weakest to best"""
+
+    __slots__ = ("weight", "key")
+
+    def __init__(self, weight, key):
+        self.weight = weight
+        self.key = key
+
+    def __lt__(self, other):
+        # Lower weight ranks lower, then the alphabetically later key
+        return (self.weight, other.key) < (other.weight, self.key)
+
+
+class _Node:
+    __slots__ = ("children", "entry", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.entry = None  # _Ranked if a key ends here
+        self.top = []  # min-heap of the best _Ranked in this subtree
+
+
+class PrefixIndex:
+    """Trie with per-node top-K completions ordered by weight"""
+
+    def __init__(self, top_k=10):
+        self.top_k = top_k
+        self.root = _Node()
+        self.payloads = {}
+        self.keys = {}  # ident -> key, to follow renames
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.payloads)
+
+    @staticmethod
+    def normalize(key):
+        return key.lower()
+
+    def _rank(self, node):
+        """Recompute the heap of ``node`` from its entry and children"""
+        candidates = [node.entry] if node.entry else []
+        for child in node.children.values():
+            candidates.extend(child.top)
+        # Ascending order is a valid min-heap
+        node.top = heapq.nlargest(self.top_k, candidates)[::-1]
+
+    def _offer(self, node, key, entry):
+        """
+        Replace ``key`` in the heap of ``node`` with ``entry`` (``None``
+        drops it). Only dropping a ranked key or lowering its weight needs
+        the children's heaps; otherwise the bounded heap takes the entry
+        in ``O(log K)``.
+        """
+        for position, ranked in enumerate(node.top):
+            if ranked.key != key:
+                continue
+            if entry is None or entry < ranked:
+                self._rank(node)
+                return
+            node.top[position] = node.top[-1]
+            node.top.pop()
+            heapq.heapify(node.top)
+            break
+        if entry is None:
+            return
+        if len(node.top) < self.top_k:
+            heapq.heappush(node.top, entry)
+        elif node.top[0] < entry:
+            heapq.heapreplace(node.top, entry)
+
+    def _update_path(self, key, weight):
+        path = [self.root]
+        node = self.root
+        for char in key:
+            if weight is None and char not in node.children:
+                return
+            node = node.children.setdefault(char, _Node())
+            path.append(node)
+        entry = None if weight is None else _Ranked(weight, key)
+        node.entry = entry
+        for node in reversed(path):
+            self._offer(node, key, entry)
+
+    def add(self, key, weight, payload, ident=None):
+        """
+        Insert ``key`` or update its weight and payload.
+
+        ``ident`` identifies the underlying record; if it was indexed
+        under a different key before (a rename), the old key is dropped.
+        """
+        key = self.normalize(key)
+        if not key:
+            return
+        with self.lock:
+            previous = self.keys.get(ident) if ident is not None else None
+            if previous is not None and previous != key:
+                self._remove(previous)
+            if ident is not None:
+                self.keys[ident] = key
+            self.payloads[key] = payload
+            self._update_path(key, weight)
+
+    def _remove(self, key):
+        if self.payloads.pop(key, None) is not None:
+            self._update_path(key, None)
+
+    def remove(self, key):
+        with self.lock:
+            self._remove(self.normalize(key))
+
+    def lookup(self, prefix, limit=None):
+        """Best completions for ``prefix``, highest weight first"""
+        node = self.root
+        for char in self.normalize(prefix):
+            node = node.children.get(char)
+            if node is None:
+                return []
+        limit = self.top_k if limit is None else min(limit, self.top_k)
+        best = sorted(node.top, reverse=True)[:limit]
+        return [self.payloads[ranked.key] for ranked in best]
+
+
+# =============================================================================
+# INDEX REGISTRY
+# =============================================================================
+
+
+DEFAULT_LIMIT = 10
+
+
+def _top_k():
+    return getattr(settings, "AUTOCOMPLETE_TOP_K", 10)
+
+
+def _refresh_seconds():
+    return getattr(settings, "AUTOCOMPLETE_REFRESH_SECONDS", 300)
+
+
+def _user_payload(user_id, username):
+    return {"id": user_id, "username": username}
+
+
+def _hashtag_payload(hashtag_id, tag, use_count):
+    return {"id": hashtag_id, "tag": tag, "use_count": use_count}
+
+
+def _load_users():
+    index = PrefixIndex(_top_k())
+    rows = User.objects.filter(is_active=True).values_list(
+        "id", "username", "profile__followers_count"
+    )
+    for user_id, username, followers in rows.iterator(chunk_size=5000):
+        index.add(
+            username,
+            followers or 0,
+            _user_payload(user_id, username),
+            ident=user_id,
+        )
+    return index
+
+
+def _load_hashtags():
+    index = PrefixIndex(_top_k())
+    rows = Hashtag.objects.values_list("id", "tag", "use_count")
+    for hashtag_id, tag, use_count in rows.iterator(chunk_size=5000):
+        index.add(
+            tag,
+            use_count,
+            _hashtag_payload(hashtag_id, tag, use_count),
+            ident=hashtag_id,
+        )
+    return index
+
+
+_LOADERS = {"user": _load_users, "hashtag": _load_hashtags}
+_indexes = {}
+_loaded_at = {}
+_refreshing = set()
+_registry_lock = threading.Lock()
+_load_locks = {kind: threading.Lock() for kind in _LOADERS}
+
+
+def _is_stale(kind):
+    loaded_at = _loaded_at.get(kind)
+    return loaded_at is None or (
+        time.monotonic() - loaded_at > _refresh_seconds()
+    )
+
+
+def _load(kind):
+    """Build the index for ``kind`` off the registry lock and swap it in"""
+    with _load_locks[kind]:
+        if kind in _indexes and not _is_stale(kind):
+            return
+        index = _LOADERS[kind]()
+        with _registry_lock:
+            _indexes[kind] = index
+            _loaded_at[kind] = time.monotonic()
+
+
+def _refresh(kind):
+    try:
+        _load(kind)
+    finally:
+        with _registry_lock:
+            _refreshing.discard(kind)
+        connection.close()
+
+
+def get_index(kind):
+    """
+    The process-wide index for ``kind`` ("user" or "hashtag").
+
+    The first call loads it; once it is stale it is reloaded in a
+    background thread and the stale index is served until then.
+    """
+    if kind not in _indexes:
+        _load(kind)
+    elif _is_stale(kind):
+        with _registry_lock:
+            start = kind not in _refreshing
+            _refreshing.add(kind)
+        if start:
+            threading.Thread(
+                target=_refresh,
+                args=(kind,),
+                name=f"autocomplete-{kind}",
+                daemon=True,
+            ).start()
+    return _indexes[kind]
+
+
+def reset():
+    """Forget all loaded indexes (they reload on next use)"""
+    with _registry_lock:
+        _indexes.clear()
+        _loaded_at.clear()
+
+
+def loaded_index(kind):
+    """The index for ``kind`` if already loaded; never triggers a load"""
+    return _indexes.get(kind)
+
+
+def note_user(user_id, username, followers=0):
+    index = loaded_index("user")
+    if index is not None:
+        index.add(
+            username,
+            followers,
+            _user_payload(user_id, username),
+            ident=user_id,
+        )
+
+
+def note_hashtag(hashtag_id, tag, use_count):
+    index = loaded_index("hashtag")
+    if index is not None:
+        index.add(
+            tag,
+            use_count,
+            _hashtag_payload(hashtag_id, tag, use_count),
+            ident=hashtag_id,
+        )
+
+
+def complete_users(prefix, limit=DEFAULT_LIMIT):
+    return get_index("user").lookup(prefix.lstrip("@"), limit)
+
+
+def complete_hashtags(prefix, limit=DEFAULT_LIMIT):
+    return get_index("hashtag").lookup(Hashtag.normalize_tag(prefix), limit)
+
+
+# =============================================================================
+# SIGNALS
+# =============================================================================
+
+
+@receiver(post_save, sender=User)
+def index_user(sender, instance, created, update_fields=None, **kwargs):
+    if not created and update_fields and "username" not in update_fields:
+        return  # e.g. last_login updates
+    index = loaded_index("user")
+    if index is None:
+        return
+    if not instance.is_active:
+        index.remove(instance.username)
+        return
+    followers = getattr(
+        getattr(instance, "profile", None), "followers_count", 0
+    )
+    note_user(instance.pk, instance.username, followers)
+
+
+@receiver(post_delete, sender=User)
+def unindex_user(sender, instance, **kwargs):
+    index = loaded_index("user")
+    if index is not None:
+        index.remove(instance.username)
+
+
+@receiver(post_save, sender=Hashtag)
+def index_hashtag(sender, instance, **kwargs):
+    note_hashtag(instance.pk, instance.tag, instance.use_count)
+
+
+@receiver(post_delete, sender=Hashtag)
+def unindex_hashtag(sender, instance, **kwargs):
+    index = loaded_index("hashtag")
+    if index is not None:
+        index.remove(instance.tag)
@@ -0,0 +1,317 @@
+"""
+Post search engine: tokenizer, index maintenance and BM25 ranking.
+
+Posts are tokenized into lower-cased word terms; ``#hashtag`` and
+``@mention`` terms are indexed with a boost so posts tagged with a query
+term outrank posts that merely contain it. Queries score candidate posts
+with Okapi BM25 computed in SQL over the postings of the query terms only.
+The last query term also matches as a prefix so results track the user's
+typing; it expands to at most ``SEARCH_MAX_PREFIX_TERMS`` indexed terms,
+the most frequent first, and only once it is ``SEARCH_MIN_PREFIX_LENGTH``
+characters long. Document frequencies come from ``SearchTerm`` rather
+than from counting postings per query.
+
+The index is kept in sync by the receivers at the bottom of this module;
+``manage.py rebuild_search_index`` rebuilds it from scratch.
+
+Settings:
+    SEARCH_HASHTAG_BOOST  weight multiplier for #hashtag terms
+    SEARCH_MENTION_BOOST  weight multiplier for @mention terms
+    SEARCH_MIN_PREFIX_LENGTH  shortest last term matched as a prefix
+    SEARCH_MAX_PREFIX_TERMS   indexed terms a prefix expands to at most
+"""
+
+import math
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import (
+    Avg,
+    Case,
+    Count,
+    F,
+    FloatField,
+    Q,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Cast
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from posts.models import Post, post_soft_deleted
+
+from .models import SearchDocument, SearchPosting, SearchTerm
+
+TOKEN_PATTERN = re.compile(r"[#@]?\w+", re.UNICODE)
+MAX_TERM_LENGTH = 100
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have i in is it its of on "
+    "or that the this to was were will with you your".split()
+)
+
+# Okapi BM25 parameters
+K1 = 1.2
+B = 0.75
+
+STATS_CACHE_KEY = "search:stats"
+STATS_CACHE_TIMEOUT = 300
+
+
+def _boosts():
+    return {
+        "#": getattr(settings, "SEARCH_HASHTAG_BOOST", 2.0),
+        "@": getattr(settings, "SEARCH_MENTION_BOOST", 1.5),
+    }
+
+
+def min_prefix_length():
+    return getattr(settings, "SEARCH_MIN_PREFIX_LENGTH", 3)
+
+
+def max_prefix_terms():
+    return getattr(settings, "SEARCH_MAX_PREFIX_TERMS", 50)
+
+
+def tokenize(text):
+    """Split text into ``(term, marker)`` pairs; marker is "#", "@" or ''"""
+    tokens = []
+    for raw in TOKEN_PATTERN.findall(text or ""):
+        marker = raw[0] if raw[0] in "#@" else ""
+        term = raw.lstrip("#@").lower()[:MAX_TERM_LENGTH]
+        if term and term not in STOPWORDS:
+            tokens.append((term, marker))
+    return tokens
+
+
+# =============================================================================
+# INDEXING
+# =============================================================================
+
+
+def _count_terms(added=(), removed=()):
+    """Adjust the document frequencies of ``added`` and ``removed`` terms"""
+    if added:
+        SearchTerm.objects.bulk_create(
+            [SearchTerm(term=term) for term in added],
+            ignore_conflicts=True,
+        )
+        SearchTerm.objects.filter(term__in=added).update(
+            document_frequency=F("document_frequency") + 1
+        )
+    if removed:
+        SearchTerm.objects.filter(term__in=removed).update(
+            document_frequency=F("document_frequency") - 1
+        )
+        SearchTerm.objects.filter(
+            term__in=removed, document_frequency=0
+        ).delete()
+
+
+def release_terms(post_ids):
+    """
+    Uncount the terms of ``post_ids`` ahead of deleting their postings
+    in bulk (``posts.purge``), which bypasses ``remove_post``.
+    """
+    rows = (
+        SearchPosting.objects.filter(post_id__in=post_ids)
+        .values("term")
+        .annotate(n=Count("pk"))
+        .order_by()
+    )
+    terms = []
+    for row in rows:
+        SearchTerm.objects.filter(term=row["term"]).update(
+            document_frequency=F("document_frequency") - row["n"]
+        )
+        terms.append(row["term"])
+    SearchTerm.objects.filter(term__in=terms, document_frequency=0).delete()
+
+
+def index_post(post):
+    """(Re)index a single post"""
+    with transaction.atomic():
+        postings = SearchPosting.objects.filter(post_id=post.pk)
+        indexed = set(postings.values_list("term", flat=True))
+        postings.delete()
+        tokens = [] if post.is_deleted else tokenize(post.content)
+        frequencies = Counter(term for term, _ in tokens)
+        _count_terms(
+            added=frequencies.keys() - indexed,
+            removed=indexed - frequencies.keys(),
+        )
+        if not tokens:
+            SearchDocument.objects.filter(post_id=post.pk).delete()
+            return
+
+        boosts = _boosts()
+        term_boost = {}
+        for term, marker in tokens:
+            term_boost[term] = max(
+                term_boost.get(term, 1.0), boosts.get(marker, 1.0)
+            )
+
+        length = len(tokens)
+        SearchPosting.objects.bulk_create(
+            [
+                SearchPosting(
+                    term=term,
+                    post_id=post.pk,
+                    term_frequency=count,
+                    doc_length=length,
+                    boost=term_boost[term],
+                )
+                for term, count in frequencies.items()
+            ]
+        )
+        SearchDocument.objects.update_or_create(
+            post_id=post.pk, defaults={"length": length}
+        )
+
+
+def remove_post(post_id):
+    """Drop a post from the index"""
+    with transaction.atomic():
+        postings = SearchPosting.objects.filter(post_id=post_id)
+        _count_terms(removed=set(postings.values_list("term", flat=True)))
+        postings.delete()
+        SearchDocument.objects.filter(post_id=post_id).delete()
+
+
+def rebuild_index(chunk_size=1000, stdout=None):
+    """Rebuild the whole index; returns the number of posts indexed"""
+    SearchPosting.objects.all().delete()
+    SearchDocument.objects.all().delete()
+    SearchTerm.objects.all().delete()
+
+    indexed = 0
+    posts = (
+        Post.objects.filter(is_deleted=False)
+        .only("id", "content", "is_deleted")
+        .order_by("pk")
+    )
+    for post in posts.iterator(chunk_size=chunk_size):
+        index_post(post)
+        indexed += 1
+        if stdout and indexed % chunk_size == 0:
+            stdout.write(f"  indexed {indexed} posts")
+    cache.delete(STATS_CACHE_KEY)
+    return indexed
+
+
+# =============================================================================
+# QUERYING
+# =============================================================================
+
+
+def corpus_stats():
+    """``(document count, average document length)``, cached briefly"""
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        row = SearchDocument.objects.aggregate(
+            n=Count("pk"), avg=Avg("length")
+        )
+        stats = (row["n"] or 0, float(row["avg"] or 0.0))
+        cache.set(STATS_CACHE_KEY, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def _expand(term, prefix):
+    """
+    ``(terms, document frequency)`` that ``term`` matches.
+
+    A prefix expands to its most frequent indexed terms; its frequency is
+    the sum of theirs, which overcounts posts holding several of them but
+    needs no DISTINCT over the postings.
+    """
+    terms = SearchTerm.objects.filter(term=term)
+    if prefix and len(term) >= min_prefix_length():
+        # A range on the term primary key, usable by any B-tree
+        terms = SearchTerm.objects.filter(
+            term__gte=term, term__lt=term + "\U0010ffff"
+        ).order_by("-document_frequency", "term")[: max_prefix_terms()]
+    rows = list(terms.values_list("term", "document_frequency"))
+    return [term for term, _ in rows], sum(n for _, n in rows)
+
+
+def search_posts(query, limit=20, offset=0):
+    """
+    Rank posts for ``query`` with BM25.
+
+    Returns a list of ``(post_id, score)`` for the requested page, best
+    match first.
+    """
+    terms = list(dict.fromkeys(term for term, _ in tokenize(query)))
+    if not terms:
+        return []
+
+    count, avg_length = corpus_stats()
+    if not count:
+        return []
+
+    conditions = []
+    for position, term in enumerate(terms):
+        is_last = position == len(terms) - 1
+        matched, frequency = _expand(term, prefix=is_last)
+        if not frequency:
+            continue
+        frequency = min(frequency, count)
+        condition = Q(term__in=matched)
+        idf = math.log(1 + (count - frequency + 0.5) / (frequency + 0.5))
+        conditions.append((condition, idf))
+
+    if not conditions:
+        return []
+
+    tf = Cast("term_frequency", FloatField())
+    length_norm = Value(K1 * (1 - B)) + Value(K1 * B / avg_length) * Cast(
+        "doc_length", FloatField()
+    )
+    term_score = tf * Value(K1 + 1) / (tf + length_norm) * F("boost")
+
+    any_term = Q()
+    for condition, _ in conditions:
+        any_term |= condition
+
+    ranked = (
+        SearchPosting.objects.filter(any_term)
+        .values("post_id")
+        .annotate(
+            score=Sum(
+                Case(
+                    *[
+                        When(condition, then=term_score * Value(idf))
+                        for condition, idf in conditions
+                    ],
+                    default=Value(0.0),
+                    output_field=FloatField(),
+                )
+            )
+        )
+        .order_by("-score", "-post_id")
+    )
+    return [
+        (row["post_id"], row["score"])
+        for row in ranked[offset : offset + limit]
+    ]
+
+
+# =============================================================================
+# SIGNALS
+# =============================================================================
+
+
+@receiver(post_save, sender=Post)
+def index_on_save(sender, instance, **kwargs):
+    update_fields = kwargs.get("update_fields")
+    if update_fields and not {"content", "is_deleted"} & set(update_fields):
+        return
+    index_post(instance)
+
+
+@receiver(post_soft_deleted, sender=Post)
+def remove_on_soft_delete(sender, instance, **kwargs):
+    remove_post(instance.pk)
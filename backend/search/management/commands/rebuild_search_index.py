@@ -0,0 +1,28 @@
+"""
+Rebuild the post search index from scratch.
+
+Run with: python manage.py rebuild_search_index [--chunk-size N]
+"""
+
+from django.core.management.base import BaseCommand
+from search.engine import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the inverted index used by the search endpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Posts fetched per database round-trip",
+        )
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(
+            chunk_size=options["chunk_size"], stdout=self.stdout
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {indexed} posts for search.")
+        )
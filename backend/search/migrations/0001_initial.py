@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("posts", "0005_timelineentry"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchDocument",
+            fields=[
+                (
+                    "post",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="posts.post",
+                    ),
+                ),
+                ("length", models.PositiveIntegerField(default=0)),
+                ("indexed_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SearchPosting",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(max_length=100)),
+                ("term_frequency", models.PositiveIntegerField(default=1)),
+                ("doc_length", models.PositiveIntegerField(default=1)),
+                ("boost", models.FloatField(default=1.0)),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_postings",
+                        to="posts.post",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("term", "post")},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.8 on 2026-10-17 06:44
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_terms(apps, schema_editor):
+    """Document frequencies of the terms already in the index"""
+    SearchPosting = apps.get_model("search", "SearchPosting")
+    SearchTerm = apps.get_model("search", "SearchTerm")
+    rows = (
+        SearchPosting.objects.values("term")
+        .annotate(n=Count("pk"))
+        .order_by("term")
+    )
+    SearchTerm.objects.bulk_create(
+        (
+            SearchTerm(term=row["term"], document_frequency=row["n"])
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchTerm",
+            fields=[
+                (
+                    "term",
+                    models.CharField(
+                        max_length=100, primary_key=True, serialize=False
+                    ),
+                ),
+                ("document_frequency", models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(count_terms, migrations.RunPython.noop),
+    ]
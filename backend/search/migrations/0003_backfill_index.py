@@ -0,0 +1,85 @@
+from collections import Counter
+
+from django.db import migrations
+from django.db.models import Count
+from search.engine import _boosts, tokenize
+
+CHUNK_SIZE = 1000
+
+
+def _index_chunk(apps, posts, boosts):
+    SearchDocument = apps.get_model("search", "SearchDocument")
+    SearchPosting = apps.get_model("search", "SearchPosting")
+    documents, postings = [], []
+    for post_id, content in posts:
+        tokens = tokenize(content)
+        if not tokens:
+            continue
+        term_boost = {}
+        for term, marker in tokens:
+            term_boost[term] = max(
+                term_boost.get(term, 1.0), boosts.get(marker, 1.0)
+            )
+        length = len(tokens)
+        documents.append(SearchDocument(post_id=post_id, length=length))
+        postings.extend(
+            SearchPosting(
+                term=term,
+                post_id=post_id,
+                term_frequency=count,
+                doc_length=length,
+                boost=term_boost[term],
+            )
+            for term, count in Counter(term for term, _ in tokens).items()
+        )
+    SearchDocument.objects.bulk_create(documents)
+    SearchPosting.objects.bulk_create(postings, batch_size=CHUNK_SIZE)
+
+
+def backfill_index(apps, schema_editor):
+    """
+    Index the live posts that are not indexed yet, as
+    ``rebuild_search_index`` does, then recount the document frequencies.
+    """
+    Post = apps.get_model("posts", "Post")
+    SearchPosting = apps.get_model("search", "SearchPosting")
+    SearchTerm = apps.get_model("search", "SearchTerm")
+
+    boosts = _boosts()
+    posts = (
+        Post.objects.filter(is_deleted=False, search_document__isnull=True)
+        .order_by("pk")
+        .values_list("id", "content")
+    )
+    chunk = []
+    for post in posts.iterator(chunk_size=CHUNK_SIZE):
+        chunk.append(post)
+        if len(chunk) == CHUNK_SIZE:
+            _index_chunk(apps, chunk, boosts)
+            chunk = []
+    _index_chunk(apps, chunk, boosts)
+
+    rows = (
+        SearchPosting.objects.values("term")
+        .annotate(n=Count("pk"))
+        .order_by("term")
+    )
+    SearchTerm.objects.all().delete()
+    SearchTerm.objects.bulk_create(
+        (
+            SearchTerm(term=row["term"], document_frequency=row["n"])
+            for row in rows.iterator()
+        ),
+        batch_size=CHUNK_SIZE,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("search", "0002_searchterm"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_index, migrations.RunPython.noop),
+    ]
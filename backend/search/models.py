@@ -1,3 +1,60 @@
-# from django.db import models
+"""
+Inverted index for post search.
 
-# Create your models here.
+``SearchPosting`` holds one row per (term, post) with the term frequency
+and document length needed for BM25 scoring, so a query only touches the
+postings of its own terms (a range scan on the ``term`` index) instead of
+scanning every post. ``SearchDocument`` tracks which posts are indexed and
+feeds the corpus statistics. ``SearchTerm`` keeps each term's document
+frequency so queries neither count postings nor scan a whole prefix
+range. Maintained by ``search.engine``.
+"""
+
+from django.db import models
+from posts.models import Post
+
+
+class SearchDocument(models.Model):
+    """An indexed post and its length in terms"""
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    length = models.PositiveIntegerField(default=0)
+    indexed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Search document for Post {self.post_id}"
+
+
+class SearchPosting(models.Model):
+    """Occurrences of one term in one post"""
+
+    term = models.CharField(max_length=100)
+    post = models.ForeignKey(
+        Post, on_delete=models.CASCADE, related_name="search_postings"
+    )
+    term_frequency = models.PositiveIntegerField(default=1)
+    # Denormalized from SearchDocument so scoring needs no join
+    doc_length = models.PositiveIntegerField(default=1)
+    # >1 when the term appears as a #hashtag or @mention
+    boost = models.FloatField(default=1.0)
+
+    class Meta:
+        unique_together = ("term", "post")
+
+    def __str__(self):
+        return f"{self.term} in Post {self.post_id}"
+
+
+class SearchTerm(models.Model):
+    """A term of the index and the number of posts containing it"""
+
+    term = models.CharField(max_length=100, primary_key=True)
+    document_frequency = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.term} in {self.document_frequency} posts"
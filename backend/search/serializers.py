@@ -4,3 +4,9 @@ from rest_framework import serializers
 class SearchResultSerializer(serializers.Serializer):
     users = serializers.ListField(child=serializers.DictField())
     posts = serializers.ListField(child=serializers.DictField())
+    next_offset = serializers.IntegerField(allow_null=True, required=False)
+
+
+class AutocompleteResultSerializer(serializers.Serializer):
+    users = serializers.ListField(child=serializers.DictField())
+    hashtags = serializers.ListField(child=serializers.DictField())
@@ -1,7 +1,12 @@
 from django.urls import path
 
-from .views import SearchView
+from .views import AutocompleteView, SearchView
 
 urlpatterns = [
     path("", SearchView.as_view(), name="search"),
+    path(
+        "autocomplete/",
+        AutocompleteView.as_view(),
+        name="search-autocomplete",
+    ),
 ]
@@ -1,12 +1,65 @@
+from blocks.service import exclude_blocked, mask
 from django.contrib.auth.models import User
 from posts.models import Post
 from rest_framework import generics, permissions
 from rest_framework.response import Response
 
-from .serializers import SearchResultSerializer
+from . import autocomplete
+from .engine import search_posts
+from .serializers import (
+    AutocompleteResultSerializer,
+    SearchResultSerializer,
+)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+
+def _int_param(request, name, default, maximum=None):
+    try:
+        value = int(request.GET.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    value = max(value, 0)
+    return min(value, maximum) if maximum is not None else value
+
+
+def _matching_users(query, viewer, limit):
+    """
+    Users whose username starts with ``query``, most followed first, then
+    users whose username merely contains it, alphabetically.
+    """
+    users = mask(
+        autocomplete.complete_users(query, limit),
+        viewer,
+        key=lambda user: user["id"],
+    )
+    if len(users) < limit:
+        others = exclude_blocked(
+            User.objects.filter(
+                username__icontains=query.lstrip("@"), is_active=True
+            ).exclude(pk__in=[user["id"] for user in users]),
+            viewer,
+            "pk",
+        )
+        users.extend(
+            others.order_by("username").values("id", "username")[
+                : limit - len(users)
+            ]
+        )
+    return users
 
 
 class SearchView(generics.ListAPIView):
+    """
+    Ranked search over posts and usernames.
+
+    Posts come from the inverted index in ``search.engine`` ordered by
+    BM25 score; ``limit``/``offset`` page through them and ``next_offset``
+    is null on the last page. Usernames starting with the query come
+    first, then usernames containing it.
+    """
+
     serializer_class = SearchResultSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -15,13 +68,78 @@ class SearchView(generics.ListAPIView):
         return []
 
     def list(self, request, *args, **kwargs):
-        query = request.GET.get("q", "")
-        users = User.objects.filter(username__icontains=query).values(
-            "id", "username"
+        query = request.GET.get("q", "").strip()
+        limit = _int_param(request, "limit", DEFAULT_LIMIT, MAX_LIMIT)
+        limit = limit or DEFAULT_LIMIT
+        offset = _int_param(request, "offset", 0)
+
+        users, posts, next_offset = [], [], None
+        if query:
+            users = _matching_users(query, request.user, limit)
+
+            ranked = search_posts(query, limit=limit + 1, offset=offset)
+            if len(ranked) > limit:
+                ranked = ranked[:limit]
+                next_offset = offset + limit
+            rows = Post.objects.filter(
+                pk__in=[post_id for post_id, _ in ranked], is_deleted=False
+            ).in_bulk()
+            posts = mask(
+                [
+                    {
+                        "id": post_id,
+                        "content": rows[post_id].content,
+                        "user_id": rows[post_id].user_id,
+                        "score": round(score, 4),
+                    }
+                    for post_id, score in ranked
+                    if post_id in rows
+                ],
+                request.user,
+                key=lambda post: post["user_id"],
+            )
+
+        data = {"users": users, "posts": posts, "next_offset": next_offset}
+        serializer = self.get_serializer(data)
+        return Response(serializer.data)
+
+
+class AutocompleteView(generics.GenericAPIView):
+    """
+    Typeahead for the mention and hashtag pickers.
+
+    ``q`` is a prefix; a leading ``@`` limits results to users and a
+    leading ``#`` to hashtags, otherwise ``type`` (user, hashtag or all)
+    decides. Answers come from the in-memory prefix index, ranked by
+    followers and hashtag use count.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = AutocompleteResultSerializer
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get("q", "").strip()
+        kind = request.GET.get("type", "all")
+        limit = _int_param(
+            request, "limit", autocomplete.DEFAULT_LIMIT, MAX_LIMIT
         )
-        posts = Post.objects.filter(content__icontains=query).values(
-            "id", "content", "user_id"
+        if query.startswith("@"):
+            kind = "user"
+        elif query.startswith("#"):
+            kind = "hashtag"
+
+        users, hashtags = [], []
+        if query.lstrip("@#"):
+            if kind in ("user", "all"):
+                users = mask(
+                    autocomplete.complete_users(query, limit),
+                    request.user,
+                    key=lambda user: user["id"],
+                )
+            if kind in ("hashtag", "all"):
+                hashtags = autocomplete.complete_hashtags(query, limit)
+
+        serializer = self.get_serializer(
+            {"users": users, "hashtags": hashtags}
         )
-        data = {"users": list(users), "posts": list(posts)}
-        serializer = self.get_serializer(data)
         return Response(serializer.data)
@@ -25,6 +25,16 @@ django.setup()
 
 
 # Your existing fixtures below
+@pytest.fixture(autouse=True)
+def clear_object_caches():
+    """Cached rows would outlive the rolled-back test transaction"""
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def api_client():
     """Return Django REST framework API client."""
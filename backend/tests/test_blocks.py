@@ -0,0 +1,169 @@
+import pytest
+from blocks.models import Block
+from blocks.service import block_cache, blocked_ids
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from notifications.models import Notification
+from posts.models import Follow, Post
+from rest_framework.test import APIClient
+from search import autocomplete
+from usermessages.models import Message
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def reset_autocomplete():
+    autocomplete.reset()
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pass")
+
+
+@pytest.fixture
+def troll():
+    return User.objects.create_user(username="troll", password="pass")
+
+
+def _client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def client(alice):
+    return _client(alice)
+
+
+@pytest.fixture
+def blocked(client, alice, troll):
+    Follow.objects.create(follower=alice, following=troll)
+    Follow.objects.create(follower=troll, following=alice)
+    res = client.post("/api/blocks/", {"blocked": troll.pk})
+    assert res.status_code == 201
+    return res
+
+
+def _ids(res):
+    assert res.status_code == 200, res.data
+    items = res.data["results"] if "results" in res.data else res.data
+    return [item["id"] for item in items]
+
+
+def test_block_removes_follows_both_ways(blocked, alice, troll):
+    assert not Follow.objects.filter(follower=alice, following=troll).exists()
+    assert not Follow.objects.filter(follower=troll, following=alice).exists()
+    assert blocked_ids(alice) == {troll.pk}
+    assert blocked_ids(troll) == {alice.pk}
+
+
+def test_cannot_block_yourself(client, alice):
+    res = client.post("/api/blocks/", {"blocked": alice.pk})
+    assert res.status_code == 400
+
+
+def test_block_set_is_cached_and_invalidated(client, alice, troll):
+    assert blocked_ids(alice) == frozenset()
+    with CaptureQueriesContext(connection) as ctx:
+        blocked_ids(alice)
+    assert not ctx.captured_queries
+
+    Block.objects.create(blocker=troll, blocked=alice)
+    assert blocked_ids(alice) == {troll.pk}
+
+    assert client.get("/api/blocks/").data["results"] == []
+    assert _client(troll).delete(f"/api/blocks/{alice.pk}/").status_code == 204
+    assert block_cache.get(alice.pk) is None
+    assert blocked_ids(alice) == frozenset()
+
+
+def test_blocked_posts_are_hidden(blocked, client, alice, troll):
+    own = Post.objects.create(user=alice, content="mine #topic @alice")
+    theirs = Post.objects.create(user=troll, content="spam #topic @alice")
+    retweet = Post.objects.create(user=alice, retweet_of=theirs)
+    reply = Post.objects.create(user=troll, content="re", parent_post=own)
+
+    for url in (
+        "/api/posts/",
+        "/api/posts/hashtag/topic/",
+        "/api/posts/mentions/alice/",
+        f"/api/posts/user/{troll.pk}/",
+        f"/api/posts/{own.pk}/replies/",
+        f"/api/posts/{own.pk}/thread/",
+    ):
+        ids = _ids(client.get(url))
+        assert theirs.pk not in ids and reply.pk not in ids, url
+        assert retweet.pk not in ids, url
+
+    assert client.get(f"/api/posts/{theirs.pk}/").status_code == 404
+    assert client.get(f"/api/posts/{reply.pk}/thread/").status_code == 404
+
+
+def test_home_masks_retweets_of_blocked_users(client, alice, troll):
+    friend = User.objects.create_user(username="friend", password="pass")
+    Follow.objects.create(follower=alice, following=friend)
+    theirs = Post.objects.create(user=troll, content="spam")
+    retweet = Post.objects.create(user=friend, retweet_of=theirs)
+    Block.objects.create(blocker=alice, blocked=troll)
+
+    res = client.get("/api/posts/home/?limit=1")
+    assert retweet.pk not in _ids(res)
+
+
+def test_search_masks_blocked_users(blocked, client, troll):
+    Post.objects.create(user=troll, content="findable words")
+
+    res = client.get(reverse("search"), {"q": "troll"})
+    assert res.data["users"] == []
+    res = client.get(reverse("search"), {"q": "findable"})
+    assert res.data["posts"] == []
+    res = client.get(reverse("search-autocomplete"), {"q": "@tro"})
+    assert res.data["users"] == []
+
+
+def test_no_messages_between_blocked_users(blocked, client, alice, troll):
+    Message.objects.create(sender=troll, receiver=alice, content="before")
+
+    res = _client(troll).post(f"/api/messages/{alice.pk}/", {"content": "hi"})
+    assert res.status_code == 403
+    res = client.post(f"/api/messages/{troll.pk}/", {"content": "hi"})
+    assert res.status_code == 403
+    assert client.get("/api/messages/inbox/").data["results"] == []
+
+
+def test_no_notifications_or_follows_across_a_block(blocked, alice, troll):
+    post = Post.objects.create(user=alice, content="hello")
+    troll_client = _client(troll)
+
+    res = troll_client.post(f"/api/posts/{post.pk}/like/")
+    assert res.status_code == 404
+    troll_client.post("/api/posts/", {"content": "hey @alice"})
+    res = troll_client.post("/api/follows/", {"following": alice.pk})
+    assert res.status_code == 400
+
+    assert not Notification.objects.filter(user=alice).exists()
+
+
+def test_grouped_notifications_survive_a_blocked_newest_actor(
+    client, alice, troll
+):
+    fan = User.objects.create_user(username="fan", password="pass")
+    for actor in (fan, troll):  # the troll's row is the newest
+        Notification.objects.create(
+            user=alice,
+            actor=actor,
+            verb="liked your post",
+            target_type="post",
+            target_id=7,
+        )
+    Block.objects.create(blocker=alice, blocked=troll)
+
+    res = client.get("/api/notifications/", {"grouped": "1"})
+    (group,) = res.data["results"]
+    assert group["actor_username"] == "fan"
+    assert (group["group_size"], group["actor_count"]) == (1, 1)
@@ -1,5 +1,7 @@
 import pytest
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from posts.models import Post
 from rest_framework.test import APIClient
@@ -63,6 +65,35 @@ class TestBookmarks:
         assert len(bookmarks) == 1
         assert bookmarks[0]["post"]["id"] == self.post.id
 
+    def test_list_query_count_is_flat(self, django_assert_num_queries):
+        """Test that authors, parents and retweets load per page"""
+        from bookmarks.models import Bookmark
+
+        def bookmark_posts(n):
+            for i in range(n):
+                root = Post.objects.create(
+                    user=self.other_user, content=f"#root {i} @testuser"
+                )
+                reply = Post.objects.create(
+                    user=self.other_user, content="reply", parent_post=root
+                )
+                retweet = Post.objects.create(
+                    user=self.other_user, retweet_of=root
+                )
+                for post in (root, reply, retweet):
+                    Bookmark.objects.create(user=self.user, post=post)
+
+        url = reverse("bookmark-list")
+        bookmark_posts(1)
+        self.client.get(url)  # caches the viewer's block set
+        with CaptureQueriesContext(connection) as small:
+            self.client.get(url)
+
+        bookmark_posts(4)
+        with django_assert_num_queries(len(small.captured_queries)):
+            response = self.client.get(url)
+        assert len(response.data["results"]) == 15
+
     def test_delete_bookmark(self):
         """Test removing a bookmark"""
         from bookmarks.models import Bookmark
@@ -75,6 +106,21 @@ class TestBookmarks:
         assert response.status_code == 204
         assert Bookmark.objects.count() == 0
 
+    def test_bookmark_count_follows_bookmarks(self):
+        """Test that bookmarking and unbookmarking update bookmark_count"""
+        url = reverse("bookmark-list")
+        response = self.client.post(
+            url, {"post_id": self.post.id}, format="json"
+        )
+        assert response.status_code == 201
+        self.post.refresh_from_db()
+        assert self.post.bookmark_count == 1
+
+        url = reverse("bookmark-detail", args=[response.data["id"]])
+        assert self.client.delete(url).status_code == 204
+        self.post.refresh_from_db()
+        assert self.post.bookmark_count == 0
+
     def test_cannot_see_others_bookmarks(self):
         """Test that users can only see their own bookmarks"""
         from bookmarks.models import Bookmark
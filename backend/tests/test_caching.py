@@ -0,0 +1,99 @@
+import pytest
+from caching import store
+from caching.objects import post_cache, user_cache
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from posts.models import Like, Post
+from rest_framework.test import APIClient
+from users.models import UserProfile
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    store.reset_stats()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def alice():
+    user = User.objects.create_user(username="alice", password="pass")
+    UserProfile.objects.create(user=user, bio="hello")
+    return user
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(user=alice)
+    return client
+
+
+def _get(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get(url)
+    return res, len(ctx.captured_queries)
+
+
+def test_post_detail_is_cached_and_invalidated(client, alice):
+    post = Post.objects.create(user=alice, content="cached #post")
+    url = f"/api/posts/{post.pk}/"
+
+    res, cold = _get(client, url)
+    assert res.status_code == 200
+    res, warm = _get(client, url)
+    assert warm < cold
+    assert res.data["content"] == "cached #post"
+
+    # Counter bumps go through F() updates and must still invalidate
+    Like.objects.create(user=alice, post=post)
+    res = client.get(url)
+    assert res.data["like_count"] == 1
+    assert res.data["is_liked_by_user"] is True
+
+    Post.objects.create(user=alice, content="reply", parent_post=post)
+    assert client.get(url).data["reply_count"] == 1
+
+    post.soft_delete()
+    assert client.get(url).status_code == 404
+    assert client.get("/api/posts/999999/").status_code == 404
+
+
+def test_profile_is_cached_and_invalidated(client, alice):
+    url = "/api/users/alice/"
+    res, cold = _get(client, url)
+    assert res.data["profile"]["bio"] == "hello"
+    res, warm = _get(client, url)
+    assert warm < cold
+    assert user_cache.get("alice") is not None
+
+    alice.profile.bio = "updated"
+    alice.profile.save()
+    assert client.get(url).data["profile"]["bio"] == "updated"
+
+    alice.username = "alicia"
+    alice.save()
+    assert client.get(url).status_code == 404
+    assert client.get("/api/users/alicia/").data["id"] == alice.pk
+
+
+def test_cache_stats_endpoint(client, alice):
+    post = Post.objects.create(user=alice, content="stats")
+    client.get(f"/api/posts/{post.pk}/")
+    client.get(f"/api/posts/{post.pk}/")
+    assert post_cache.get(post.pk) is not None
+
+    assert client.get("/api/cache/stats/").status_code == 403
+
+    admin = User.objects.create_superuser("root", "root@x.io", "pass")
+    client.force_authenticate(user=admin)
+    res = client.get("/api/cache/stats/")
+    assert res.status_code == 200
+    assert res.data["caches"]["post"]["hits"] == 2
+    assert res.data["caches"]["post"]["misses"] == 1
+    assert "LocMemCache" in res.data["backend"]
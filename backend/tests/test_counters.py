@@ -0,0 +1,131 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from posts import counters
+from posts.models import Like, Post, PostCounterDelta
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pass")
+
+
+@pytest.fixture
+def bob():
+    return User.objects.create_user(username="bob", password="pass")
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(user=alice)
+    return client
+
+
+@pytest.fixture
+def write_behind(settings):
+    settings.POST_COUNTER_WRITE_BEHIND = True
+
+
+def _stored(post, field):
+    post.refresh_from_db()
+    return getattr(post, field)
+
+
+def test_write_behind_buffers_and_reads_stay_exact(
+    write_behind, client, alice, bob, django_capture_on_commit_callbacks
+):
+    post = Post.objects.create(user=bob, content="viral")
+    client.post("/api/likes/", {"post": post.pk})
+    Like.objects.create(user=bob, post=post)
+    Post.objects.create(user=alice, content="", retweet_of=post)
+
+    assert _stored(post, "like_count") == 0
+    assert PostCounterDelta.objects.count() == 3
+
+    detail = client.get(f"/api/posts/{post.pk}/").data
+    assert (detail["like_count"], detail["retweet_count"]) == (2, 1)
+    listed = {p["id"]: p for p in client.get("/api/posts/").data["results"]}
+    assert listed[post.pk]["like_count"] == 2
+    retweet = next(p for p in listed.values() if p["retweet_of"] == post.pk)
+    assert retweet["retweet_of_data"]["like_count"] == 2
+
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command("flush_post_counters")
+    assert PostCounterDelta.objects.count() == 0
+    assert _stored(post, "like_count") == 2
+    assert _stored(post, "retweet_count") == 1
+    assert client.get(f"/api/posts/{post.pk}/").data["like_count"] == 2
+
+
+def test_flush_nets_out_opposite_changes(write_behind, alice, bob):
+    post = Post.objects.create(user=bob, content="meh")
+    like = Like.objects.create(user=alice, post=post)
+    like.delete()
+
+    assert counters.flush() == 2
+    assert _stored(post, "like_count") == 0
+
+
+def test_soft_deleted_replies_are_uncounted(alice, bob):
+    post = Post.objects.create(user=bob, content="question")
+    reply = Post.objects.create(user=alice, content="a", parent_post=post)
+    Post.objects.create(user=alice, content="b", parent_post=post)
+    assert _stored(post, "reply_count") == 2
+
+    reply.soft_delete()
+    assert _stored(post, "reply_count") == 1
+    reply.delete()  # already uncounted
+    assert _stored(post, "reply_count") == 1
+
+
+def test_reconcile_recomputes_drifted_counts(write_behind, alice, bob):
+    post = Post.objects.create(user=bob, content="drift")
+    Like.objects.create(user=alice, post=post)
+    Post.objects.create(
+        user=alice, content="q", retweet_of=post, is_quote_tweet=True
+    )
+    untouched = Post.objects.create(user=bob, content="fine")
+    Post.objects.filter(pk=post.pk).update(like_count=99, reply_count=5)
+
+    call_command("reconcile_post_counts")
+
+    post.refresh_from_db()
+    assert (post.like_count, post.reply_count, post.quote_count) == (1, 0, 1)
+    assert not PostCounterDelta.objects.exists()
+    assert counters.reconcile() == 0
+    assert _stored(untouched, "like_count") == 0
+
+
+def test_reconcile_drops_deltas_chunk_by_chunk(
+    write_behind, alice, bob, monkeypatch
+):
+    first, second = [
+        Post.objects.create(user=bob, content=f"drift {n}") for n in range(2)
+    ]
+    Post.objects.filter(pk__in=[first.pk, second.pk]).update(like_count=7)
+    recount = counters.recount
+
+    def recount_then_like(post_ids):
+        recount(post_ids)
+        if post_ids == [first.pk]:
+            # Liked while reconcile is still working on the first chunk
+            Like.objects.create(user=alice, post=second)
+
+    monkeypatch.setattr(counters, "recount", recount_then_like)
+    assert counters.reconcile(chunk_size=1) == 2
+
+    counters.flush()
+    assert _stored(first, "like_count") == 0
+    assert _stored(second, "like_count") == 1
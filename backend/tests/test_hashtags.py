@@ -7,3 +7,145 @@ def test_create_hashtag():
 
     h = Hashtag.objects.create(tag="testtag")
     assert h.tag == "testtag"
+
+
+@pytest.mark.django_db
+def test_post_extraction_is_bulk_and_deduplicated():
+    from django.contrib.auth.models import User
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from notifications.models import Notification
+    from posts.models import Hashtag, Mention, PostHashtag
+    from rest_framework.test import APIClient
+    from users.models import UserProfile
+
+    author = User.objects.create_user(username="author", password="pass")
+    UserProfile.objects.create(user=author)
+    names = [f"friend{i}" for i in range(10)]
+    for name in names:
+        User.objects.create_user(username=name, password="pass")
+    Hashtag.objects.create(tag="tag0", use_count=4)
+
+    client = APIClient()
+    client.force_authenticate(user=author)
+
+    def create(content):
+        with CaptureQueriesContext(connection) as ctx:
+            res = client.post("/api/posts/", {"content": content})
+        assert res.status_code == 201
+        return res.data["id"], len(ctx.captured_queries)
+
+    create("warm up @friend9")  # caches the author's block set
+    tags = " ".join(f"#tag{i}" for i in range(10))
+    mentions = " ".join(f"@{name}" for name in names)
+    post_id, many = create(f"{tags} {mentions} #TAG0 @friend0 @nobody")
+    _, few = create("#solo @friend1")
+    assert many == few
+
+    assert PostHashtag.objects.filter(post_id=post_id).count() == 10
+    assert Hashtag.objects.get(tag="tag0").use_count == 5
+    assert Hashtag.objects.get(tag="tag9").use_count == 1
+    assert (
+        PostHashtag.objects.get(post_id=post_id, hashtag__tag="tag3").position
+        == 3
+    )
+    assert Mention.objects.filter(post_id=post_id).count() == 10
+    assert (
+        Notification.objects.filter(
+            target_id=post_id, verb="mentioned you in a post"
+        ).count()
+        == 10
+    )
+
+
+@pytest.fixture
+def tagged_posts(db):
+    from django.contrib.auth.models import User
+    from posts.extraction import attach_hashtags
+    from posts.models import Post
+
+    author = User.objects.create_user(username="author", password="pass")
+    posts = []
+    for content in [f"post {n} #django" for n in range(5)] + ["#python"]:
+        post = Post.objects.create(user=author, content=content)
+        attach_hashtags(post, content)
+        posts.append(post)
+    return author, posts[:5]
+
+
+def _client(user):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db
+def test_links_mirror_their_post(tagged_posts):
+    from posts.models import PostHashtag
+
+    _, posts = tagged_posts
+    link = PostHashtag.objects.get(post=posts[0])
+    assert link.created_at == posts[0].created_at
+    assert not link.is_deleted
+
+    posts[0].soft_delete()
+    link.refresh_from_db()
+    assert link.is_deleted
+
+
+@pytest.mark.django_db
+def test_hashtag_timeline_pages_over_links(tagged_posts):
+    author, posts = tagged_posts
+    posts[2].soft_delete()
+    client = _client(author)
+
+    seen, url = [], "/api/posts/hashtag/DJANGO/?limit=2"
+    while url:
+        res = client.get(url)
+        assert res.status_code == 200
+        seen += [post["id"] for post in res.data["results"]]
+        url = res.data["next"]
+    expected = [post.pk for post in reversed(posts) if post != posts[2]]
+    assert seen == expected
+
+
+@pytest.mark.django_db
+def test_hashtag_filter_has_no_duplicates(tagged_posts):
+    from posts.models import Hashtag, PostHashtag
+
+    author, posts = tagged_posts
+    # A second link to the same post must not repeat it
+    PostHashtag.objects.create(
+        post=posts[0], hashtag=Hashtag.objects.create(tag="Django2")
+    )
+    res = _client(author).get("/api/posts/?hashtag=django&limit=50")
+    ids = [post["id"] for post in res.data["results"]]
+    assert sorted(ids) == sorted(post.pk for post in posts)
+
+
+@pytest.mark.django_db
+def test_backfill_post_hashtags_resyncs_links(tagged_posts):
+    from io import StringIO
+
+    from django.core.management import call_command
+    from django.utils import timezone
+    from posts.models import Post, PostHashtag
+
+    _, posts = tagged_posts
+    Post.objects.filter(pk=posts[1].pk).update(is_deleted=True)
+    PostHashtag.objects.filter(post=posts[0]).update(created_at=timezone.now())
+
+    out = StringIO()
+    call_command("backfill_post_hashtags", chunk_size=1, stdout=out)
+    assert "Backfilled 2 hashtag links." in out.getvalue()
+    assert (
+        PostHashtag.objects.get(post=posts[0]).created_at
+        == posts[0].created_at
+    )
+    assert PostHashtag.objects.get(post=posts[1]).is_deleted
+
+    out = StringIO()
+    call_command("backfill_post_hashtags", stdout=out)
+    assert "Backfilled 0 hashtag links." in out.getvalue()
@@ -0,0 +1,140 @@
+import pytest
+from caching.objects import auth_user_cache
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import UserProfile
+
+pytestmark = pytest.mark.django_db
+
+UNREAD = "/api/notifications/unread-count/"
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def alice():
+    user = User.objects.create_user(username="alice", password="pass")
+    UserProfile.objects.create(user=user, bio="hello")
+    return user
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    token = RefreshToken.for_user(alice).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+def _user_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get(url)
+    return res, [
+        q["sql"]
+        for q in ctx.captured_queries
+        if 'FROM "auth_user"' in q["sql"]
+    ]
+
+
+def test_user_is_loaded_once_with_profile(client, alice):
+    res, cold = _user_queries(client, UNREAD)
+    assert res.status_code == 200
+    assert len(cold) == 1
+    assert '"users_userprofile"' in cold[0]  # profile joined
+
+    res, warm = _user_queries(client, UNREAD)
+    assert res.status_code == 200
+    assert warm == []
+
+    cached = auth_user_cache.get(alice.pk)
+    with CaptureQueriesContext(connection) as ctx:
+        assert cached.profile.bio == "hello"
+    assert not ctx.captured_queries
+
+
+def test_profile_update_invalidates(client, alice):
+    client.get(UNREAD)
+    res = client.patch("/api/account/profile/", {"bio": "updated"})
+    assert res.status_code == 200
+    assert auth_user_cache.get(alice.pk) is None
+
+    client.get(UNREAD)
+    assert auth_user_cache.get(alice.pk).profile.bio == "updated"
+
+
+def test_account_update_invalidates(client, alice):
+    client.get(UNREAD)
+    res = client.patch("/api/account/update/", {"username": "alicia"})
+    assert res.status_code == 200
+    client.get(UNREAD)
+    assert auth_user_cache.get(alice.pk).username == "alicia"
+
+
+def test_deactivated_account_is_rejected_at_once(client):
+    assert client.get(UNREAD).status_code == 200
+    assert client.delete("/api/account/delete/").status_code == 200
+    assert client.get(UNREAD).status_code == 401
+
+
+def test_deleted_user_is_rejected(client, alice):
+    client.get(UNREAD)
+    alice.delete()
+    assert client.get(UNREAD).status_code == 401
+
+
+def test_trusted_claims_skip_the_lookup(client, alice, settings):
+    settings.AUTH_TRUST_TOKEN_CLAIMS = True
+
+    res, queries = _user_queries(client, UNREAD)
+    assert res.status_code == 200
+    assert queries == []
+    assert auth_user_cache.get(alice.pk) is None
+
+    # Writes and views without trust_token_claims still load the user
+    res, queries = _user_queries(client, "/api/posts/")
+    assert res.status_code == 200
+    assert len(queries) == 1
+
+
+def test_claims_are_not_trusted_by_default(client):
+    res, queries = _user_queries(client, UNREAD)
+    assert len(queries) == 1
+
+
+def test_cache_holds_no_password_hash(client, alice):
+    client.get(UNREAD)
+    cached = auth_user_cache.get(alice.pk)
+    assert "password" in cached.get_deferred_fields()
+    assert "reset_token" in cached.profile.get_deferred_fields()
+
+    # Saving the cached instance leaves the stored password alone
+    cached.first_name = "Alice"
+    cached.save()
+    alice.refresh_from_db()
+    assert alice.check_password("pass")
+
+
+def test_password_change_revokes_cached_user_tokens(
+    client, alice, monkeypatch
+):
+    from authentication import jwt
+    from rest_framework_simplejwt import tokens
+
+    for module in (jwt, tokens):
+        monkeypatch.setattr(module.api_settings, "CHECK_REVOKE_TOKEN", True)
+
+    token = RefreshToken.for_user(alice).access_token
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    assert client.get(UNREAD).status_code == 200
+    alice.set_password("changed")
+    alice.save()
+    assert client.get(UNREAD).status_code == 401
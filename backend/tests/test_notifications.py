@@ -65,3 +65,300 @@ def test_mark_notification_as_read_unauthenticated(notification):
     url = reverse("notification-mark-read", kwargs={"pk": notification.pk})
     response = client.post(url)
     assert response.status_code == 401
+
+
+def test_stream_requires_ticket_or_token(user):
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    url = reverse("notification-stream")
+    token = str(AccessToken.for_user(user))
+    assert APIClient().get(url).status_code == 401
+    assert APIClient().get(url, {"ticket": "bogus"}).status_code == 401
+    # Access tokens are no longer accepted in the query string
+    assert APIClient().get(url, {"token": token}).status_code == 401
+
+
+def test_stream_opens_with_a_ticket(client, user):
+    res = client.post(reverse("notification-stream-ticket"))
+    assert res.status_code == 200
+    assert res.data["expires_in"] == 60
+
+    url = reverse("notification-stream")
+    response = APIClient().get(url, {"ticket": res.data["ticket"]})
+    assert response.status_code == 200
+    assert response["Content-Type"] == "text/event-stream"
+    assert response.streaming
+
+
+def test_stream_ticket_expires(client, settings):
+    settings.NOTIFICATION_STREAM_TICKET_MAX_AGE = -1
+    ticket = client.post(reverse("notification-stream-ticket")).data["ticket"]
+
+    response = APIClient().get(
+        reverse("notification-stream"), {"ticket": ticket}
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.django_db(transaction=True)
+def test_stream_replays_then_pushes_new_notifications(settings):
+    import asyncio
+
+    from asgiref.sync import sync_to_async
+    from notifications.streaming import event_stream, hub
+
+    settings.NOTIFICATION_STREAM_HEARTBEAT = 0.05
+    user = User.objects.create_user(username="streamer", password="x")
+    seen = Notification.objects.create(user=user, verb="old news")
+    missed = Notification.objects.create(user=user, verb="missed")
+
+    async def scenario():
+        stream = event_stream(user.pk, last_event_id=seen.pk)
+        chunks = [await stream.__anext__(), await stream.__anext__()]
+        assert hub.connection_count() == 1
+
+        chunks.append(await stream.__anext__())  # idle: heartbeat
+        await sync_to_async(Notification.objects.create)(
+            user=user, verb="fresh"
+        )
+        chunk = await asyncio.wait_for(stream.__anext__(), 5)
+        while chunk.startswith(":"):
+            chunk = await asyncio.wait_for(stream.__anext__(), 5)
+        chunks.append(chunk)
+        await stream.aclose()
+        return chunks
+
+    connected, replayed, heartbeat, pushed = asyncio.run(scenario())
+    assert connected.startswith("retry:")
+    assert replayed.startswith(f"id: {missed.pk}\n")
+    assert '"verb":"missed"' in replayed
+    assert heartbeat == ": keep-alive\n\n"
+    assert "event: notification" in pushed
+    assert '"verb":"fresh"' in pushed
+    assert hub.connection_count() == 0
+
+
+def test_polling_backend_reads_other_processes_notifications(user):
+    from notifications.streaming import DatabasePollingBackend
+
+    class FakeHub:
+        events = []
+
+        def user_ids(self):
+            return {user.pk}
+
+        def dispatch(self, event):
+            self.events.append(event)
+
+    backend = DatabasePollingBackend()
+    backend.hub = FakeHub()
+    backend.high_water = None
+    backend.poll()
+    assert backend.hub.events == []
+
+    other = User.objects.create_user(username="other", password="x")
+    created = Notification.objects.create(user=user, verb="from elsewhere")
+    Notification.objects.create(user=other, verb="not streamed")
+    backend.poll()
+    assert [e["id"] for e in backend.hub.events] == [created.pk]
+
+
+def test_likes_are_coalesced_into_one_notification(user):
+    from posts.models import Post
+
+    post = Post.objects.create(user=user, content="popular")
+    for name in ["fan1", "fan2", "fan3"]:
+        fan = User.objects.create_user(username=name, password="x")
+        fan_client = APIClient()
+        fan_client.force_authenticate(user=fan)
+        assert (
+            fan_client.post("/api/likes/", {"post": post.pk}).status_code
+            == 201
+        )
+
+    rows = Notification.objects.filter(user=user, verb="liked your post")
+    assert rows.count() == 1
+    assert (rows.get().actor.username, rows.get().actor_count) == ("fan3", 3)
+
+
+def test_outbox_batch_coalesces_and_read_rows_start_over(user):
+    from notifications.models import NotificationEvent
+    from notifications.outbox import drain
+
+    fans = [
+        User.objects.create_user(username=f"fan{i}", password="x")
+        for i in range(3)
+    ]
+    NotificationEvent.objects.bulk_create(
+        NotificationEvent(user=user, actor=fan, verb="followed you")
+        for fan in fans + fans[:1]  # fan0 twice
+    )
+    assert drain() == 4
+    row = Notification.objects.get(user=user)
+    assert (row.actor_id, row.actor_count) == (fans[0].pk, 3)
+    assert not NotificationEvent.objects.exists()
+
+    row.is_read = True
+    row.save()
+    NotificationEvent.objects.create(
+        user=user, actor=fans[1], verb="followed you"
+    )
+    drain()
+    assert Notification.objects.filter(user=user).count() == 2
+
+
+def test_folding_bumps_reopens_counts_and_republishes(user, monkeypatch):
+    from datetime import timedelta
+
+    from django.utils import timezone
+    from notifications import outbox
+    from notifications.models import NotificationEvent
+    from notifications.unread import mark_read, unread_count
+
+    fans = [
+        User.objects.create_user(username=f"fan{i}", password="x")
+        for i in range(2)
+    ]
+    outbox.enqueue(user=user, actor=fans[0], verb="followed you")
+    row = Notification.objects.get(user=user)
+    Notification.objects.filter(pk=row.pk).update(
+        created_at=timezone.now() - timedelta(hours=1)
+    )
+    assert unread_count(user) == 1
+
+    published = []
+    monkeypatch.setattr(outbox, "publish", published.extend)
+    now = timezone.now
+    calls = []
+
+    def read_while_draining():
+        calls.append(None)
+        if len(calls) == 2:  # the row is loaded, the fold is next
+            mark_read(user)
+        return now()
+
+    NotificationEvent.objects.create(
+        user=user, actor=fans[1], verb="followed you"
+    )
+    monkeypatch.setattr(outbox.timezone, "now", read_while_draining)
+    outbox.drain()
+    monkeypatch.undo()
+
+    row.refresh_from_db()
+    assert (row.actor_id, row.actor_count) == (fans[1].pk, 2)
+    assert row.created_at > now() - timedelta(minutes=1)
+    assert not row.is_read and unread_count(user) == 1
+    assert [(n.pk, n.actor_count) for n in published] == [(row.pk, 2)]
+
+
+def test_async_outbox_drains_in_background(
+    user, settings, django_capture_on_commit_callbacks
+):
+    from notifications import outbox
+
+    settings.NOTIFICATION_OUTBOX_ASYNC = True
+    actor = User.objects.create_user(username="actor", password="x")
+    with django_capture_on_commit_callbacks() as callbacks:
+        outbox.enqueue(user=user, actor=actor, verb="followed you")
+    assert not Notification.objects.filter(user=user).exists()
+    assert callbacks == [outbox.schedule]
+
+    # The worker thread has its own connection; drain here instead
+    assert outbox.drain_all() == 1
+    assert Notification.objects.filter(user=user, actor=actor).exists()
+
+
+def test_drain_command_delivers_leftover_events(user):
+    from django.core.management import call_command
+    from notifications.models import NotificationEvent
+
+    NotificationEvent.objects.create(user=user, verb="left behind")
+    call_command("drain_notification_outbox", verbosity=0)
+    assert Notification.objects.filter(user=user, verb="left behind").exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_worker_thread_delivers_committed_events(settings):
+    from notifications import outbox
+
+    settings.NOTIFICATION_OUTBOX_ASYNC = True
+    user = User.objects.create_user(username="target", password="x")
+    actor = User.objects.create_user(username="actor", password="x")
+    outbox.enqueue(user=user, actor=actor, verb="followed you")
+    # A single worker runs tasks in order: wait for the drain to finish
+    outbox.get_executor().submit(lambda: None).result(timeout=5)
+    assert Notification.objects.filter(user=user, actor=actor).exists()
+
+
+def test_unread_count_and_mark_read(client, user):
+    other = User.objects.create_user(username="other", password="x")
+    first, second, third = (
+        Notification.objects.create(user=user, verb=f"event {i}")
+        for i in range(3)
+    )
+    Notification.objects.create(user=other, verb="not yours")
+    count_url = reverse("notification-unread-count")
+    assert client.get(count_url).data == {"unread_count": 3}
+
+    url = reverse("notification-mark-read", kwargs={"pk": second.pk})
+    assert client.post(url).status_code == 200
+    assert client.post(url).status_code == 200  # already read
+    assert client.get(count_url).data == {"unread_count": 2}
+
+    url = reverse("notification-mark-all-read")
+    response = client.post(url, {"up_to": second.pk})
+    assert response.data == {"marked": 1, "unread_count": 1}
+    third.refresh_from_db()
+    assert third.is_read is False
+
+    response = client.post(url)
+    assert response.data == {"marked": 1, "unread_count": 0}
+    assert Notification.objects.get(user=other).is_read is False
+
+
+def test_mark_read_of_other_users_notification(client):
+    other = User.objects.create_user(username="other", password="x")
+    theirs = Notification.objects.create(user=other, verb="private")
+    url = reverse("notification-mark-read", kwargs={"pk": theirs.pk})
+    assert client.post(url).status_code == 403
+    theirs.refresh_from_db()
+    assert theirs.is_read is False
+
+    url = reverse("notification-mark-read", kwargs={"pk": theirs.pk + 1})
+    assert client.post(url).status_code == 404
+
+
+def test_grouped_list_collapses_same_verb_and_target(client, user):
+    fans = [
+        User.objects.create_user(username=f"fan{i}", password="x")
+        for i in range(3)
+    ]
+    for fan in fans:
+        Notification.objects.create(
+            user=user,
+            actor=fan,
+            verb="liked your post",
+            target_type="post",
+            target_id=7,
+            is_read=fan is fans[0],
+        )
+    Notification.objects.create(
+        user=user, verb="liked your post", target_type="post", target_id=8
+    )
+    Notification.objects.create(user=user, verb="welcome")
+
+    url = reverse("notification-list")
+    assert len(client.get(url).data["results"]) == 5
+
+    results = client.get(url, {"grouped": "1", "limit": 2}).data
+    page = results["results"]
+    assert [n["verb"] for n in page] == ["welcome", "liked your post"]
+    assert page[1]["target_id"] == 8
+    assert page[1]["group_size"] == 1
+
+    rest = client.get(results["next"]).data["results"]
+    assert len(rest) == 1
+    liked = rest[0]
+    assert liked["actor_username"] == "fan2"
+    assert (liked["group_size"], liked["actor_count"]) == (3, 3)
+    assert liked["is_read"] is False
@@ -0,0 +1,128 @@
+import json
+import logging
+
+import pytest
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import override_settings
+from observability import middleware, recorder
+from posts.models import Post
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    recorder.metrics.reset()
+    yield
+    recorder.metrics.reset()
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pass")
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(user=alice)
+    return client
+
+
+def _timings(response):
+    return {
+        part.split(";")[0].strip(): part
+        for part in response["Server-Timing"].split(",")
+    }
+
+
+def test_fingerprint_collapses_literals_and_in_lists():
+    a = recorder.fingerprint(
+        "SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'bob' LIMIT 20"
+    )
+    b = recorder.fingerprint(
+        "SELECT * FROM t WHERE id IN (%s) AND name = 'it''s' LIMIT 5"
+    )
+    assert a == b
+    assert "(%s...)" in a
+
+
+def test_server_timing_header_reports_queries(client, alice):
+    Post.objects.create(user=alice, content="timed")
+
+    res = client.get("/api/posts/")
+
+    assert res.status_code == 200
+    timings = _timings(res)
+    assert set(timings) == {"db", "serialize", "total"}
+    queries = int(timings["db"].split('desc="')[1].split()[0])
+    assert queries > 0
+
+
+@override_settings(OBSERVABILITY_SERVER_TIMING=False)
+def test_server_timing_header_can_be_disabled(client):
+    assert "Server-Timing" not in client.get("/api/posts/")
+
+
+def test_repeated_queries_are_reported_as_duplicates(alice, rf):
+    def view(request):
+        for pk in (alice.pk, alice.pk + 1, alice.pk + 2):
+            list(User.objects.filter(pk=pk))
+        list(Post.objects.all()[:1])
+        return HttpResponse()
+
+    seen = {}
+
+    def observe(view, stats, duration_ms, status_code):
+        seen["stats"] = stats
+
+    metrics = recorder.Metrics()
+    metrics.observe = observe
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(recorder, "metrics", metrics)
+        middleware.RequestMetricsMiddleware(view)(rf.get("/"))
+
+    stats = seen["stats"]
+    assert stats.queries == 4
+    assert list(stats.duplicates().values()) == [3]
+    assert recorder.current() is None
+
+
+def test_request_is_logged_as_json(client, alice, caplog, monkeypatch):
+    messages = []
+    handler = logging.Handler(logging.INFO)
+    handler.emit = lambda record: messages.append(record.getMessage())
+    monkeypatch.setattr(middleware.logger, "handlers", [handler])
+    caplog.set_level(logging.INFO, logger="nexus.requests")
+    post = Post.objects.create(user=alice, content="logged")
+
+    client.get(f"/api/posts/{post.pk}/")
+
+    assert len(messages) == 1
+    record = json.loads(messages[0])
+    assert record["path"] == f"/api/posts/{post.pk}/"
+    assert record["status"] == 200
+    assert record["queries"] > 0
+    assert record["view"] == "post-detail"
+
+
+def test_metrics_endpoint_is_admin_only(client, alice):
+    client.get("/api/posts/")
+    client.get("/api/posts/")
+
+    assert client.get("/api/metrics/").status_code == 403
+
+    alice.is_staff = True
+    alice.save()
+    res = client.get("/api/metrics/")
+    assert res.status_code == 200
+    posts = res.data["views"]["post-list"]
+    assert posts["requests"] == 2
+    assert posts["latency_ms"]["count"] == 2
+    assert posts["queries"]["p50"] is not None
+
+    assert client.delete("/api/metrics/").status_code == 204
+    views = client.get("/api/metrics/").data["views"]
+    assert "post-list" not in views
@@ -0,0 +1,97 @@
+import base64
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from posts.models import Follow, Post
+from rest_framework.test import APIClient
+from usermessages.models import Message
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def user():
+    cache.clear()
+    return User.objects.create_user(username="pager", password="pass")
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def _walk(client, url):
+    """Follow ``next`` links and return every page's results"""
+    pages = []
+    while url:
+        res = client.get(url)
+        assert res.status_code == 200
+        pages.append(res.data["results"])
+        url = res.data["next"]
+    return pages
+
+
+def test_post_list_pages_without_gaps_or_duplicates(client, user):
+    posts = [Post.objects.create(user=user, content=f"p{i}") for i in range(5)]
+
+    first = client.get("/api/posts/", {"limit": 2})
+    # A post inserted mid-scroll must not shift later pages
+    Post.objects.create(user=user, content="late arrival")
+    pages = [first.data["results"]] + _walk(client, first.data["next"])
+
+    ids = [p["id"] for page in pages for p in page]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert ids == [p.id for p in reversed(posts)]
+
+
+def test_post_list_keyset_respects_ordering_filter(client, user):
+    for likes in (3, 1, 2, 2):
+        Post.objects.create(user=user, content="x", like_count=likes)
+
+    pages = _walk(client, "/api/posts/?ordering=-like_count&limit=3")
+
+    counts = [p["like_count"] for page in pages for p in page]
+    assert counts == [3, 2, 2, 1]
+
+
+def test_home_feed_is_paginated(client, user):
+    other = User.objects.create_user(username="other", password="pass")
+    Follow.objects.create(follower=user, following=other)
+    for i in range(3):
+        Post.objects.create(user=other, content=f"h{i}")
+
+    pages = _walk(client, "/api/posts/home/?limit=2")
+
+    contents = [p["content"] for page in pages for p in page]
+    assert contents == ["h2", "h1", "h0"]
+
+
+def test_messages_pages_are_chronological(client, user):
+    other = User.objects.create_user(username="friend", password="pass")
+    for i in range(5):
+        Message.objects.create(sender=user, receiver=other, content=f"m{i}")
+
+    pages = _walk(client, f"/api/messages/{other.id}/?limit=2")
+
+    assert [[m["content"] for m in page] for page in pages] == [
+        ["m3", "m4"],
+        ["m1", "m2"],
+        ["m0"],
+    ]
+
+
+def test_invalid_cursor_is_rejected(client):
+    res = client.get("/api/posts/", {"cursor": "not-a-cursor"})
+    assert res.status_code == 404
+
+
+@pytest.mark.parametrize("value", [[1, 2], {"a": 1}, "yesterday"])
+def test_cursor_with_malformed_value_is_rejected(client, value):
+    raw = json.dumps([value, 1]).encode()
+    cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+    res = client.get("/api/posts/", {"cursor": cursor})
+    assert res.status_code == 404
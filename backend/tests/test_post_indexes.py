@@ -0,0 +1,51 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from posts.explain import HOT_QUERIES, explain, samples, used_indexes
+from posts.models import Follow, Post
+
+pytestmark = pytest.mark.django_db
+
+EXPECTED = {
+    "list": "post_live_created_idx",
+    "user_timeline": "post_live_user_idx",
+    "replies": "post_live_reply_idx",
+    "hashtag": "posthashtag_timeline_idx",
+    "purge_scan": "post_deleted_idx",
+}
+
+
+@pytest.fixture
+def posts():
+    alice = User.objects.create_user(username="alice", password="pass")
+    bob = User.objects.create_user(username="bob", password="pass")
+    Follow.objects.create(follower=bob, following=alice)
+    root = Post.objects.create(user=alice, content="hello #django")
+    for n in range(5):
+        Post.objects.create(user=bob, content=f"reply {n}", parent_post=root)
+    Post.objects.create(user=bob, retweet_of=root)
+    Post.objects.create(user=alice, content="gone").soft_delete()
+    return root
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_hot_queries_use_partial_indexes(posts, name):
+    plan = explain(HOT_QUERIES[name](samples()))
+    assert EXPECTED[name] in used_indexes(plan), plan
+
+
+def test_partial_indexes_skip_deleted_posts(posts):
+    live = list(HOT_QUERIES["list"](samples()))
+    assert live and all(not post.is_deleted for post in live)
+    assert len(list(HOT_QUERIES["purge_scan"](samples()))) == 1
+
+
+def test_explain_post_indexes_command(posts):
+    out = StringIO()
+    call_command("explain_post_indexes", stdout=out)
+    output = out.getvalue()
+    for name in HOT_QUERIES:
+        assert name in output
+    assert "post_live_created_idx" in output
@@ -52,3 +52,97 @@ def test_list_posts(auth_client, user):
     posts = res.data["results"] if "results" in res.data else res.data
     assert len(posts) >= 1
     assert any(post["content"] == "First post" for post in posts)
+
+
+def _seed_feed(user, other, count):
+    """Create ``count`` posts by ``other`` that ``user`` interacts with."""
+    from bookmarks.models import Bookmark
+    from posts.models import Follow, Hashtag, Like, Mention, PostHashtag
+
+    Follow.objects.get_or_create(follower=user, following=other)
+    tag, _ = Hashtag.objects.get_or_create(tag="perf")
+    for i in range(count):
+        post = Post.objects.create(user=other, content=f"#perf @u1 {i}")
+        PostHashtag.objects.create(post=post, hashtag=tag)
+        Mention.objects.create(
+            post=post, mentioned_user=user, mentioner_user=other
+        )
+        Like.objects.create(user=user, post=post)
+        Bookmark.objects.create(user=user, post=post)
+        Post.objects.create(user=user, retweet_of=post)
+
+
+def _count_queries(client, url):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as ctx:
+        res = client.get(url)
+    assert res.status_code == 200
+    return res, len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/api/posts/",
+        "/api/posts/home/",
+        "/api/posts/hashtag/perf/",
+        "/api/posts/mentions/u1/",
+        "/api/bookmarks/",
+    ],
+)
+def test_viewer_state_query_count_is_constant(auth_client, user, url):
+    """Viewer flags are resolved per page, not per post."""
+    other = User.objects.create_user(username="u2", password="pass")
+
+    _seed_feed(user, other, 2)
+    auth_client.get(url)  # caches the authenticated user
+    _, small = _count_queries(auth_client, url)
+
+    _seed_feed(user, other, 8)
+    res, large = _count_queries(auth_client, url)
+
+    assert small == large
+    items = res.data["results"] if "results" in res.data else res.data
+    items = [item.get("post", item) for item in items]  # bookmarks
+    originals = [p for p in items if p["user"] == other.id]
+    assert originals
+    assert all(p["is_liked_by_user"] for p in originals)
+    assert all(p["is_bookmarked_by_user"] for p in originals)
+    assert all(p["is_retweeted_by_user"] for p in originals)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "query",
+    [
+        "",
+        "?hashtag=perf",
+        "?mention=u1",
+        "?hashtag=perf&mention=u1&search=perf",
+        "?ordering=-like_count",
+    ],
+)
+def test_list_filters_need_no_distinct(auth_client, user, query):
+    """Hashtag/mention filters are semi-joins, so rows never repeat."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from posts.models import Hashtag, PostHashtag
+
+    other = User.objects.create_user(username="u2", password="pass")
+    _seed_feed(user, other, 3)
+    # A second matching hashtag link must not repeat the post
+    post = Post.objects.filter(user=other).first()
+    PostHashtag.objects.create(
+        post=post, hashtag=Hashtag.objects.create(tag="Perf2")
+    )
+
+    with CaptureQueriesContext(connection) as ctx:
+        res = auth_client.get(f"/api/posts/{query}")
+    assert res.status_code == 200
+    ids = [item["id"] for item in res.data["results"]]
+    assert len(ids) == len(set(ids))
+    assert post.pk in ids
+    assert not any("DISTINCT" in q["sql"] for q in ctx.captured_queries)
@@ -0,0 +1,105 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from posts.models import Follow, Post
+from rest_framework.test import APIClient
+from users.models import UserProfile
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def alice():
+    user = User.objects.create_user(username="alice", password="pass")
+    UserProfile.objects.create(user=user)
+    return user
+
+
+@pytest.fixture
+def bob():
+    user = User.objects.create_user(username="bob", password="pass")
+    UserProfile.objects.create(user=user)
+    return user
+
+
+def _counts(user):
+    profile = UserProfile.objects.get(user=user)
+    return (
+        profile.followers_count,
+        profile.following_count,
+        profile.posts_count,
+    )
+
+
+def test_follow_and_unfollow_update_both_profiles(alice, bob):
+    follow = Follow.objects.create(follower=alice, following=bob)
+    assert _counts(alice) == (0, 1, 0)
+    assert _counts(bob) == (1, 0, 0)
+
+    follow.delete()
+    assert _counts(alice) == (0, 0, 0)
+    assert _counts(bob) == (0, 0, 0)
+
+
+def test_posts_count_follows_create_and_delete(alice):
+    first = Post.objects.create(user=alice, content="one")
+    second = Post.objects.create(user=alice, content="two")
+    assert _counts(alice)[2] == 2
+
+    first.soft_delete()
+    first.soft_delete()
+    assert _counts(alice)[2] == 1
+
+    first.delete()  # already uncounted
+    second.delete()
+    assert _counts(alice)[2] == 0
+
+
+def test_missing_profile_is_created_with_true_counts(alice):
+    carol = User.objects.create_user(username="carol", password="pass")
+    Follow.objects.create(follower=alice, following=carol)
+    UserProfile.objects.filter(user=carol).delete()
+
+    Post.objects.create(user=carol, content="after the profile is gone")
+    assert _counts(carol) == (1, 0, 1)
+
+
+def test_deleting_a_user_updates_the_users_they_followed(alice, bob):
+    Follow.objects.create(follower=alice, following=bob)
+    Follow.objects.create(follower=bob, following=alice)
+
+    alice.delete()
+    assert _counts(bob) == (0, 0, 0)
+
+
+def test_profile_endpoint_shows_fresh_counts(
+    alice, bob, django_capture_on_commit_callbacks
+):
+    client = APIClient()
+    client.force_authenticate(user=alice)
+    url = "/api/users/bob/"
+    assert client.get(url).data["profile"]["followers_count"] == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Follow.objects.create(follower=alice, following=bob)
+    assert client.get(url).data["profile"]["followers_count"] == 1
+
+
+def test_recount_profiles_fixes_drift(alice, bob):
+    Follow.objects.create(follower=alice, following=bob)
+    Post.objects.create(user=bob, content="hello")
+    UserProfile.objects.update(
+        followers_count=7, following_count=7, posts_count=7
+    )
+
+    call_command("recount_profiles", verbosity=0)
+    assert _counts(alice) == (0, 1, 0)
+    assert _counts(bob) == (1, 0, 1)
@@ -0,0 +1,147 @@
+from io import StringIO
+
+import pytest
+from bookmarks.models import Bookmark
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from posts.models import (
+    Like,
+    Mention,
+    Post,
+    PostCounterDelta,
+    PostHashtag,
+    TimelineEntry,
+)
+from posts.purge import cascade, purge
+from reports.models import PostReport
+from search.models import SearchDocument, SearchPosting, SearchTerm
+from users.models import UserProfile
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def alice():
+    user = User.objects.create_user(username="alice", password="pass")
+    UserProfile.objects.create(user=user)
+    return user
+
+
+@pytest.fixture
+def bob():
+    user = User.objects.create_user(username="bob", password="pass")
+    UserProfile.objects.create(user=user)
+    return user
+
+
+@pytest.fixture
+def thread(alice, bob):
+    """A live root, a doomed reply with a live sub-thread and a retweet"""
+    root = Post.objects.create(user=alice, content="root")
+    doomed = Post.objects.create(
+        user=alice, content="#gone @bob", parent_post=root
+    )
+    reply = Post.objects.create(user=bob, content="re", parent_post=doomed)
+    nested = Post.objects.create(user=alice, content="re", parent_post=reply)
+    retweet = Post.objects.create(user=bob, retweet_of=doomed)
+    Like.objects.create(user=bob, post=doomed)
+    Like.objects.create(user=alice, post=reply)
+    Bookmark.objects.create(user=bob, post=doomed)
+    PostReport.objects.create(post=doomed, reporter=bob, reason="spam")
+    doomed.soft_delete()
+    return root, doomed, reply, nested, retweet
+
+
+def _run(**options):
+    out = StringIO()
+    call_command("purge_soft_deleted", stdout=out, **options)
+    return out.getvalue()
+
+
+def test_cascade_follows_replies_threads_and_retweets(thread):
+    root, doomed, reply, nested, retweet = thread
+    assert cascade([doomed.pk]) == {doomed.pk, reply.pk, nested.pk, retweet.pk}
+    assert cascade([root.pk]) == {p.pk for p in thread}
+
+
+def test_purge_deletes_posts_and_dependent_rows(thread, alice, bob):
+    root, doomed, *cascaded = thread
+    gone = [doomed.pk] + [p.pk for p in cascaded]
+
+    output = _run()
+
+    assert "Permanently deleted 1 soft-deleted posts" in output
+    assert "3 replies and retweets" in output
+    assert list(Post.objects.values_list("pk", flat=True)) == [root.pk]
+    for model in (
+        Like,
+        Bookmark,
+        PostHashtag,
+        Mention,
+        TimelineEntry,
+        PostReport,
+        SearchDocument,
+        SearchPosting,
+    ):
+        assert not model.objects.filter(post_id__in=gone).exists(), model
+    # The cascaded replies' terms are uncounted with their postings
+    assert not SearchTerm.objects.filter(term="re").exists()
+
+
+def test_purge_recounts_survivors(thread, alice, bob):
+    root = thread[0]
+    Post.objects.filter(pk=root.pk).update(reply_count=5)
+
+    _run()
+
+    root.refresh_from_db()
+    assert root.reply_count == 0
+    assert UserProfile.objects.get(user=alice).posts_count == 1
+    assert UserProfile.objects.get(user=bob).posts_count == 0
+
+
+def test_purge_drops_pending_deltas_of_survivors(thread, settings):
+    settings.POST_COUNTER_WRITE_BEHIND = True
+    root = thread[0]
+    PostCounterDelta.objects.create(post=root, field="reply_count", delta=1)
+
+    _run()
+
+    assert not PostCounterDelta.objects.exists()
+    root.refresh_from_db()
+    assert root.reply_count == 0
+
+
+def test_purge_with_pending_deltas_of_purged_posts(thread, settings):
+    settings.POST_COUNTER_WRITE_BEHIND = True
+    root, doomed, reply = thread[:3]
+    for post in (doomed, reply):
+        PostCounterDelta.objects.create(post=post, field="like_count", delta=1)
+
+    assert "Permanently deleted 1 soft-deleted posts" in _run()
+
+    assert not Post.objects.filter(pk__in=[doomed.pk, reply.pk]).exists()
+    assert not PostCounterDelta.objects.exists()
+
+
+def test_purge_works_in_chunks_and_resumes(alice):
+    posts = [
+        Post.objects.create(user=alice, content=f"post {n}") for n in range(5)
+    ]
+    for post in posts:
+        post.soft_delete()
+
+    chunks = list(purge(chunk_size=2, limit=3))
+    assert [chunk["posts"] for chunk in chunks] == [2, 3]
+    assert chunks[-1]["last_id"] == posts[2].pk
+    assert Post.objects.count() == 2
+
+    # A later run picks up what is left
+    assert "Permanently deleted 2 soft-deleted posts" in _run(chunk_size=1)
+    assert not Post.objects.exists()
+
+
+def test_purge_leaves_live_posts_alone(alice):
+    live = Post.objects.create(user=alice, content="keep")
+    assert "Permanently deleted 0 soft-deleted posts" in _run()
+    assert Post.objects.filter(pk=live.pk).exists()
@@ -1,8 +1,14 @@
+import threading
+
 import pytest
 from django.contrib.auth.models import User
 from django.urls import reverse
-from posts.models import Post
+from posts.models import Hashtag, Post
 from rest_framework.test import APIClient
+from search import autocomplete
+from search.autocomplete import PrefixIndex
+from search.models import SearchTerm
+from users.models import UserProfile
 
 pytestmark = pytest.mark.django_db
 
@@ -36,8 +42,218 @@ def test_search_authenticated(client, user, post):
     )
 
 
+def test_search_users_by_prefix_then_substring(client, user):
+    UserProfile.objects.create(user=user, followers_count=1)
+    popular = User.objects.create_user(username="usermax", password="x")
+    UserProfile.objects.create(user=popular, followers_count=50)
+    User.objects.create_user(username="poweruser", password="x")
+    User.objects.create_user(username="gone_user", is_active=False)
+
+    response = client.get(reverse("search"), {"q": "user"})
+    assert [u["username"] for u in response.data["users"]] == [
+        "usermax",
+        "poweruser",
+        "searchuser",
+    ]
+
+    response = client.get(reverse("search"), {"q": "user", "limit": 2})
+    assert [u["username"] for u in response.data["users"]] == [
+        "usermax",
+        "poweruser",
+    ]
+
+
 def test_search_unauthenticated():
     client = APIClient()
     url = reverse("search")
     response = client.get(url, {"q": "search"})
     assert response.status_code == 401
+
+
+@pytest.fixture(autouse=True)
+def clear_search_stats():
+    from django.core.cache import cache
+
+    cache.clear()
+    autocomplete.reset()
+
+
+def _post_ids(client, query, **params):
+    response = client.get(reverse("search"), {"q": query, **params})
+    assert response.status_code == 200
+    return [p["id"] for p in response.data["posts"]], response.data
+
+
+def test_search_ranks_hashtags_and_frequency(client, user):
+    plain = Post.objects.create(user=user, content="I like django a lot")
+    tagged = Post.objects.create(user=user, content="shipping it #django")
+    repeated = Post.objects.create(
+        user=user, content="django django django everywhere"
+    )
+    Post.objects.create(user=user, content="unrelated flask post")
+
+    ids, _ = _post_ids(client, "django")
+
+    assert set(ids) == {plain.id, tagged.id, repeated.id}
+    assert ids.index(tagged.id) < ids.index(plain.id)
+    assert ids.index(repeated.id) < ids.index(plain.id)
+
+
+def test_search_pages_with_offset(client, user):
+    for i in range(5):
+        Post.objects.create(user=user, content=f"paging post {i}")
+
+    first, data = _post_ids(client, "paging", limit=3)
+    second, last = _post_ids(client, "paging", limit=3, offset=3)
+
+    assert len(first) == 3 and data["next_offset"] == 3
+    assert len(second) == 2 and last["next_offset"] is None
+    assert not set(first) & set(second)
+
+
+def test_search_index_follows_edits_and_deletes(client, user, post):
+    post.content = "renamed entirely"
+    post.save()
+    assert _post_ids(client, "searchable")[0] == []
+    assert _post_ids(client, "renamed")[0] == [post.id]
+
+    post.soft_delete()
+    assert _post_ids(client, "renamed")[0] == []
+
+
+def test_rebuild_search_index_command(client, user, post):
+    from django.core.management import call_command
+    from search.models import SearchPosting
+
+    SearchPosting.objects.all().delete()
+    call_command("rebuild_search_index", verbosity=0)
+
+    assert _post_ids(client, "searchable")[0] == [post.id]
+
+
+def test_term_frequencies_follow_the_index(user, post):
+    assert SearchTerm.objects.get(term="searchable").document_frequency == 1
+    other = Post.objects.create(user=user, content="searchable again")
+    assert SearchTerm.objects.get(term="searchable").document_frequency == 2
+
+    post.content = "again"
+    post.save()
+    other.soft_delete()
+    assert not SearchTerm.objects.filter(term="searchable").exists()
+    assert SearchTerm.objects.get(term="again").document_frequency == 1
+
+
+def test_short_prefixes_match_whole_terms_only(client, user, settings):
+    settings.SEARCH_MIN_PREFIX_LENGTH = 3
+    exact = Post.objects.create(user=user, content="go")
+    longer = Post.objects.create(user=user, content="going gone")
+
+    assert _post_ids(client, "go")[0] == [exact.id]
+    assert _post_ids(client, "goi")[0] == [longer.id]
+
+
+def test_prefixes_expand_to_the_most_frequent_terms(client, user, settings):
+    settings.SEARCH_MAX_PREFIX_TERMS = 1
+    common = [
+        Post.objects.create(user=user, content="prefixing") for _ in range(2)
+    ]
+    Post.objects.create(user=user, content="prefixed")
+
+    ids, _ = _post_ids(client, "prefix")
+    assert sorted(ids) == sorted(post.id for post in common)
+
+
+def test_prefix_index_top_k_updates_and_renames():
+    index = PrefixIndex(top_k=2)
+    index.add("alice", 5, "alice", ident=1)
+    index.add("alan", 9, "alan", ident=2)
+    index.add("albert", 1, "albert", ident=3)
+    index.add("bob", 7, "bob", ident=4)
+
+    assert index.lookup("al") == ["alan", "alice"]
+    assert index.lookup("AL", limit=1) == ["alan"]
+    assert index.lookup("x") == []
+
+    index.add("albert", 20, "albert", ident=3)
+    assert index.lookup("al") == ["albert", "alan"]
+
+    index.remove("albert")
+    assert index.lookup("al") == ["alan", "alice"]
+
+    index.add("carol", 9, "carol", ident=2)  # alan renamed to carol
+    assert index.lookup("al") == ["alice"]
+    assert index.lookup("c") == ["carol"]
+    assert len(index) == 3
+
+
+def test_stale_index_is_served_while_reloading(monkeypatch, settings):
+    settings.AUTOCOMPLETE_REFRESH_SECONDS = 0
+    release = threading.Event()
+    built = []
+
+    def load():
+        if built:
+            release.wait(5)
+        built.append(PrefixIndex())
+        return built[-1]
+
+    monkeypatch.setitem(autocomplete._LOADERS, "user", load)
+    first = autocomplete.get_index("user")
+    assert autocomplete.get_index("user") is first
+
+    (reload,) = [
+        thread
+        for thread in threading.enumerate()
+        if thread.name == "autocomplete-user"
+    ]
+    release.set()
+    reload.join(5)
+    assert autocomplete.loaded_index("user") is built[1]
+
+
+def test_autocomplete_users_and_hashtags(client, user):
+    popular = User.objects.create_user(username="searchstar", password="x")
+    UserProfile.objects.create(user=popular, followers_count=50)
+    Hashtag.objects.create(tag="searching", use_count=3)
+    Hashtag.objects.create(tag="searchlight", use_count=8)
+
+    url = reverse("search-autocomplete")
+    response = client.get(url, {"q": "sea"})
+    assert response.status_code == 200
+    assert [u["username"] for u in response.data["users"]] == [
+        "searchstar",
+        "searchuser",
+    ]
+    assert [h["tag"] for h in response.data["hashtags"]] == [
+        "searchlight",
+        "searching",
+    ]
+
+    response = client.get(url, {"q": "#SEARCHL"})
+    assert response.data["users"] == []
+    assert [h["tag"] for h in response.data["hashtags"]] == ["searchlight"]
+
+    response = client.get(url, {"q": "@search", "limit": 1})
+    assert [u["username"] for u in response.data["users"]] == ["searchstar"]
+    assert response.data["hashtags"] == []
+
+
+def test_autocomplete_follows_new_and_renamed_records(client, user):
+    url = reverse("search-autocomplete")
+    assert client.get(url, {"q": "newbie"}).data["users"] == []
+
+    newbie = User.objects.create_user(username="newbie", password="x")
+    Hashtag.objects.create(tag="newbies")
+    response = client.get(url, {"q": "newbie"})
+    assert [u["username"] for u in response.data["users"]] == ["newbie"]
+    assert [h["tag"] for h in response.data["hashtags"]] == ["newbies"]
+
+    newbie.username = "veteran"
+    newbie.save()
+    assert client.get(url, {"q": "newbie", "type": "user"}).data["users"] == []
+    assert client.get(url, {"q": "vet"}).data["users"][0]["id"] == newbie.pk
+
+
+def test_autocomplete_unauthenticated():
+    response = APIClient().get(reverse("search-autocomplete"), {"q": "a"})
+    assert response.status_code == 401
@@ -0,0 +1,57 @@
+import io
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db.models import Sum
+from posts.models import Follow, Hashtag, Like, Post, PostHashtag
+from users.models import UserProfile
+
+pytestmark = pytest.mark.django_db
+
+
+def test_scale_mode_writes_consistent_counters():
+    call_command(
+        "seed_data",
+        scale=True,
+        users=40,
+        posts=300,
+        likes=1000,
+        following=5,
+        batch_size=64,
+        stdout=io.StringIO(),
+    )
+
+    assert User.objects.filter(username__startswith="load").count() == 40
+    assert UserProfile.objects.count() == 40
+    assert Post.objects.count() == 300
+    assert Post.objects.filter(parent_post__isnull=False).count() == 60
+    assert not Post.objects.filter(
+        parent_post__isnull=False, root_post__isnull=True
+    ).exists()
+    assert Follow.objects.exists()
+    assert 0 < Like.objects.count() <= 1000
+
+    posts = Post.objects.aggregate(
+        likes=Sum("like_count"), replies=Sum("reply_count")
+    )
+    assert posts == {"likes": Like.objects.count(), "replies": 60}
+    profiles = UserProfile.objects.aggregate(
+        followers=Sum("followers_count"),
+        following=Sum("following_count"),
+        posts=Sum("posts_count"),
+    )
+    assert profiles == {
+        "followers": Follow.objects.count(),
+        "following": Follow.objects.count(),
+        "posts": 300,
+    }
+    assert Hashtag.objects.aggregate(uses=Sum("use_count"))["uses"] == (
+        PostHashtag.objects.count()
+    )
+
+    # Popularity is skewed: the top account has many times the median
+    counts = sorted(
+        UserProfile.objects.values_list("followers_count", flat=True)
+    )
+    assert counts[-1] >= 3 * max(1, counts[len(counts) // 2])
@@ -0,0 +1,149 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from posts import threads
+from posts.models import Post
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pass")
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(user=alice)
+    return client
+
+
+@pytest.fixture
+def tree(alice):
+    """
+    root
+    ├── a
+    │   └── a1
+    │       └── a1x
+    └── b
+    """
+    root = Post.objects.create(user=alice, content="root")
+    a = Post.objects.create(user=alice, content="a", parent_post=root)
+    a1 = Post.objects.create(user=alice, content="a1", parent_post=a)
+    a1x = Post.objects.create(user=alice, content="a1x", parent_post=a1)
+    b = Post.objects.create(user=alice, content="b", parent_post=root)
+    return {"root": root, "a": a, "a1": a1, "a1x": a1x, "b": b}
+
+
+def _contents(res):
+    assert res.status_code == 200, res.data
+    return [post["content"] for post in res.data["results"]]
+
+
+def test_reply_gets_path_and_depth_without_parent_query(alice):
+    root = Post.objects.create(user=alice, content="root")
+
+    with CaptureQueriesContext(connection) as ctx:
+        reply = Post.objects.create(user=alice, content="r", parent_post=root)
+    inserts = [q for q in ctx.captured_queries if "INSERT" in q["sql"]]
+    selects = [
+        q
+        for q in ctx.captured_queries
+        if q["sql"].startswith("SELECT") and '"posts_post"' in q["sql"]
+    ]
+    assert inserts and not selects
+
+    assert root.depth == 0 and len(root.path) == threads.SEGMENT_WIDTH
+    assert reply.depth == 1
+    assert reply.root_post_id == root.pk
+    assert reply.path.startswith(root.path)
+
+    # Only the parent ID known: one narrow lookup
+    nested = Post.objects.create(
+        user=alice, content="n", parent_post_id=reply.pk
+    )
+    assert nested.depth == 2
+    assert nested.root_post_id == root.pk
+    assert nested.path.startswith(reply.path)
+
+
+def test_segments_sort_by_time():
+    now = timezone.now()
+    earlier = threads.segment(now - timedelta(microseconds=1), salt=1295)
+    assert earlier < threads.segment(now, salt=0)
+    assert len(earlier) == threads.SEGMENT_WIDTH
+
+
+def test_deep_chains_stop_nesting():
+    now = timezone.now()
+    path = threads.segment(now) * (threads.MAX_DEPTH + 1)
+    child, depth = threads.child_path(path, threads.MAX_DEPTH, now)
+    assert depth == threads.MAX_DEPTH
+    assert len(child) == len(path)
+
+
+def test_thread_is_returned_depth_first(client, tree):
+    res = client.get(f"/api/posts/{tree['a1'].pk}/thread/")
+    assert _contents(res) == ["root", "a", "a1", "a1x", "b"]
+    assert [post["depth"] for post in res.data["results"]] == [0, 1, 2, 3, 1]
+    assert res.data["next"] is None
+
+
+def test_thread_depth_limit(client, tree):
+    res = client.get(f"/api/posts/{tree['root'].pk}/thread/?depth=1")
+    assert _contents(res) == ["root", "a", "b"]
+
+
+def test_load_more_under_node(client, tree):
+    root = tree["root"].pk
+    res = client.get(f"/api/posts/{root}/thread/?node={tree['a'].pk}")
+    assert _contents(res) == ["a", "a1", "a1x"]
+
+    res = client.get(f"/api/posts/{root}/thread/?node={tree['a1'].pk}&depth=0")
+    assert _contents(res) == ["a1"]
+
+
+def test_node_must_belong_to_thread(client, alice, tree):
+    other = Post.objects.create(user=alice, content="other")
+    res = client.get(f"/api/posts/{tree['root'].pk}/thread/?node={other.pk}")
+    assert res.status_code == 404
+    res = client.get(f"/api/posts/{tree['root'].pk}/thread/?node=abc")
+    assert res.status_code == 404
+
+
+def test_thread_pages_with_cursor(client, tree):
+    url = f"/api/posts/{tree['root'].pk}/thread/?limit=2"
+    seen = []
+    while url:
+        res = client.get(url)
+        seen.extend(_contents(res))
+        url = res.data["next"]
+    assert seen == ["root", "a", "a1", "a1x", "b"]
+
+
+def test_deleted_replies_are_hidden_but_root_is_kept(client, tree):
+    tree["root"].soft_delete()
+    tree["b"].soft_delete()
+    res = client.get(f"/api/posts/{tree['a'].pk}/thread/")
+    assert _contents(res) == ["root", "a", "a1", "a1x"]
+
+
+def test_thread_query_count_is_flat(client, alice, tree):
+    url = f"/api/posts/{tree['root'].pk}/thread/"
+    client.get(url)  # caches the viewer's block set
+    with CaptureQueriesContext(connection) as small:
+        client.get(url)
+    for i in range(10):
+        Post.objects.create(
+            user=alice, content=f"more {i}", parent_post=tree["b"]
+        )
+    with CaptureQueriesContext(connection) as large:
+        res = client.get(url)
+    assert len(res.data["results"]) == 15
+    assert len(large.captured_queries) == len(small.captured_queries)
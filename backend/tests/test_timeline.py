@@ -0,0 +1,114 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from posts.models import Follow, Post, TimelineEntry
+from posts.timeline import trim_timeline
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pass")
+
+
+@pytest.fixture
+def bob():
+    return User.objects.create_user(username="bob", password="pass")
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(user=alice)
+    return client
+
+
+def _home_contents(client):
+    res = client.get("/api/posts/home/")
+    assert res.status_code == 200
+    return [p["content"] for p in res.data["results"]]
+
+
+def test_post_is_fanned_out_to_followers(alice, bob):
+    Follow.objects.create(follower=alice, following=bob)
+    post = Post.objects.create(user=bob, content="hello")
+
+    assert TimelineEntry.objects.filter(user=alice, post=post).exists()
+    assert TimelineEntry.objects.filter(user=bob, post=post).exists()
+
+
+def test_follow_backfills_and_unfollow_trims(client, alice, bob):
+    Post.objects.create(user=bob, content="before follow")
+    follow = Follow.objects.create(follower=alice, following=bob)
+    assert "before follow" in _home_contents(client)
+
+    follow.delete()
+    assert "before follow" not in _home_contents(client)
+    assert not TimelineEntry.objects.filter(user=alice, author=bob).exists()
+
+
+def test_soft_delete_removes_entries(client, alice, bob):
+    Follow.objects.create(follower=alice, following=bob)
+    post = Post.objects.create(user=bob, content="soon gone")
+
+    assert post.soft_delete() is True
+    assert post.soft_delete() is False
+    assert not TimelineEntry.objects.filter(post=post).exists()
+    assert "soon gone" not in _home_contents(client)
+
+
+def test_celebrity_posts_are_merged_at_read_time(client, alice, bob, settings):
+    settings.TIMELINE_FANOUT_MAX_FOLLOWERS = 1
+    carol = User.objects.create_user(username="carol", password="pass")
+    Follow.objects.create(follower=alice, following=bob)
+    Follow.objects.create(follower=carol, following=bob)
+    cache.clear()
+
+    post = Post.objects.create(user=bob, content="celebrity post")
+
+    assert not TimelineEntry.objects.filter(user=alice, post=post).exists()
+    assert "celebrity post" in _home_contents(client)
+
+
+def test_rebuild_timelines_command(alice, bob):
+    from django.core.management import call_command
+
+    Follow.objects.create(follower=alice, following=bob)
+    post = Post.objects.create(user=bob, content="rebuilt")
+    TimelineEntry.objects.all().delete()
+
+    call_command("rebuild_timelines", verbosity=0)
+
+    assert TimelineEntry.objects.filter(user=alice, post=post).exists()
+
+
+def test_trim_keeps_ties_inside_the_limit(alice, bob, settings):
+    settings.TIMELINE_MAX_ENTRIES = 2
+    posts = [Post.objects.create(user=bob, content=f"{n}") for n in range(4)]
+    # Every post shares one timestamp, so only post_id breaks the tie
+    Post.objects.filter(pk__in=[p.pk for p in posts]).update(
+        created_at=posts[0].created_at
+    )
+    for post in posts:
+        TimelineEntry.objects.create(
+            user=alice,
+            post=post,
+            author=bob,
+            created_at=posts[0].created_at,
+        )
+
+    trim_timeline(alice.pk)
+
+    kept = TimelineEntry.objects.filter(user=alice).values_list(
+        "post_id", flat=True
+    )
+    assert sorted(kept) == [posts[2].pk, posts[3].pk]
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.utils import timezone
+from posts import trending
+from posts.models import Hashtag, HashtagHourlyCount, Post, PostHashtag
+from rest_framework.test import APIClient
+
+pytestmark = pytest.mark.django_db
+
+URL = "/api/posts/trending_hashtags/"
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def alice():
+    return User.objects.create_user(username="alice", password="pass")
+
+
+@pytest.fixture
+def client(alice):
+    client = APIClient()
+    client.force_authenticate(user=alice)
+    return client
+
+
+def _tags(client, **params):
+    res = client.get(URL, params)
+    assert res.status_code == 200
+    return [h["tag"] for h in res.data]
+
+
+def _bucket(tag, hours_ago, count, use_count=0):
+    hashtag, _ = Hashtag.objects.get_or_create(
+        tag=tag, defaults={"use_count": use_count}
+    )
+    HashtagHourlyCount.objects.create(
+        hashtag=hashtag,
+        hour=trending.bucket_hour(timezone.now() - timedelta(hours=hours_ago)),
+        count=count,
+    )
+
+
+def test_recent_burst_outranks_old_favourite(client):
+    _bucket("evergreen", hours_ago=6 * 24, count=10, use_count=5000)
+    _bucket("breaking", hours_ago=0, count=3)
+    _bucket("steady", hours_ago=5, count=2)
+
+    assert _tags(client) == ["breaking", "steady", "evergreen"]
+    assert _tags(client, window="24h") == ["breaking", "steady"]
+    assert _tags(client, window="1h") == ["breaking"]
+    assert _tags(client, limit=1) == ["breaking"]
+
+
+def test_invalid_window(client):
+    assert client.get(URL, {"window": "2y"}).status_code == 400
+
+
+def test_new_posts_merge_into_cached_ranking(client, alice):
+    _bucket("older", hours_ago=3, count=2)
+    assert _tags(client, window="24h") == ["older"]
+
+    for _ in range(3):
+        client.post("/api/posts/", {"content": "news #fresh"})
+    res = client.get(URL, {"window": "24h"})
+    assert [h["tag"] for h in res.data] == ["fresh", "older"]
+    assert res.data[0]["post_count"] == 3
+    assert res.data[0]["use_count"] == 3
+
+    # Links created directly are counted through the signal
+    post = Post.objects.create(user=alice, content="#direct")
+    PostHashtag.objects.create(
+        post=post, hashtag=Hashtag.objects.create(tag="direct")
+    )
+    assert "direct" in _tags(client, window="24h")
+
+    post.soft_delete()
+    assert "direct" not in _tags(client, window="24h")
+    assert HashtagHourlyCount.objects.get(hashtag__tag="direct").count == 0
+
+
+def test_refresh_trending_backfills_counters(client, alice):
+    post = Post.objects.create(user=alice, content="#legacy")
+    hashtag = Hashtag.objects.create(tag="legacy")
+    PostHashtag.objects.create(post=post, hashtag=hashtag)
+    HashtagHourlyCount.objects.all().delete()
+    _bucket("ancient", hours_ago=30 * 24, count=1)
+
+    call_command("refresh_trending", "--backfill", "--prune")
+
+    assert HashtagHourlyCount.objects.get(hashtag=hashtag).count == 1
+    assert not HashtagHourlyCount.objects.filter(
+        hashtag__tag="ancient"
+    ).exists()
+    assert _tags(client) == ["legacy"]
@@ -39,7 +39,7 @@ def test_get_messages(client, user1, user2):
     url = f"/api/messages/{user2.id}/"
     response = client.get(url)
     assert response.status_code == 200
-    assert any(m["content"] == "Hi Bob!" for m in response.data)
+    assert any(m["content"] == "Hi Bob!" for m in response.data["results"])
 
 
 def test_unauthenticated_cannot_send():
@@ -48,3 +48,51 @@ def test_unauthenticated_cannot_send():
     url = f"/api/messages/{user.id}/"
     response = client.post(url, {"content": "Hey!"})
     assert response.status_code == 401
+
+
+def test_inbox_orders_by_activity_and_tracks_unread(client, user1, user2):
+    carol = User.objects.create_user(username="carol", password="x")
+    Message.objects.create(sender=user2, receiver=user1, content="from bob")
+    Message.objects.create(sender=user2, receiver=user1, content="again")
+    Message.objects.create(sender=user1, receiver=carol, content="hi carol")
+
+    response = client.get("/api/messages/inbox/")
+    assert response.status_code == 200
+    rows = response.data["results"]
+    assert [r["other_user"]["username"] for r in rows] == ["carol", "bob"]
+    assert [r["unread_count"] for r in rows] == [0, 2]
+    assert rows[1]["last_message"]["content"] == "again"
+
+    # Opening the conversation reads it
+    client.get(f"/api/messages/{user2.id}/")
+    assert not Message.objects.filter(receiver=user1, is_read=False).exists()
+    rows = client.get("/api/messages/inbox/").data["results"]
+    assert [r["unread_count"] for r in rows] == [0, 0]
+
+    client.post(f"/api/messages/{user2.id}/", {"content": "reply"})
+    rows = client.get("/api/messages/inbox/", {"limit": 1}).data
+    assert rows["results"][0]["other_user"]["username"] == "bob"
+    assert rows["next"] is not None
+
+    bob = APIClient()
+    bob.force_authenticate(user=user2)
+    rows = bob.get("/api/messages/inbox/").data["results"]
+    assert rows[0]["unread_count"] == 1
+    assert rows[0]["last_message"]["content"] == "reply"
+
+
+def test_history_is_scoped_to_the_conversation(client, user1, user2):
+    carol = User.objects.create_user(username="carol", password="x")
+    for i in range(5):
+        Message.objects.create(sender=user1, receiver=user2, content=f"m{i}")
+    Message.objects.create(sender=carol, receiver=user1, content="other")
+
+    page = client.get(f"/api/messages/{user2.id}/", {"limit": 3}).data
+    assert [m["content"] for m in page["results"]] == ["m2", "m3", "m4"]
+    page = client.get(page["next"]).data
+    assert [m["content"] for m in page["results"]] == ["m0", "m1"]
+    assert page["next"] is None
+
+    stranger = User.objects.create_user(username="dave", password="x")
+    page = client.get(f"/api/messages/{stranger.id}/").data
+    assert page["results"] == []
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:45
+
+from django.db import migrations
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Greatest, Least
+
+
+def backfill_conversations(apps, schema_editor):
+    """Create one conversation per user pair and file messages under it"""
+    Conversation = apps.get_model("usermessages", "Conversation")
+    Message = apps.get_model("usermessages", "Message")
+
+    pairs = (
+        Message.objects.filter(conversation__isnull=True)
+        .annotate(
+            low=Least("sender_id", "receiver_id"),
+            high=Greatest("sender_id", "receiver_id"),
+        )
+        .values("low", "high")
+        .distinct()
+    )
+    for pair in pairs.iterator():
+        low, high = pair["low"], pair["high"]
+        conversation, _ = Conversation.objects.get_or_create(
+            user_low_id=low, user_high_id=high
+        )
+        messages = Message.objects.filter(
+            Q(sender_id=low, receiver_id=high)
+            | Q(sender_id=high, receiver_id=low)
+        )
+        messages.update(conversation=conversation)
+
+        stats = messages.aggregate(
+            last_at=Max("created_at"),
+            unread_low=Count("id", filter=Q(receiver_id=low, is_read=False)),
+            unread_high=Count("id", filter=Q(receiver_id=high, is_read=False)),
+        )
+        conversation.last_message = messages.order_by(
+            "-created_at", "-id"
+        ).first()
+        conversation.last_message_at = stats["last_at"]
+        conversation.unread_low = stats["unread_low"]
+        conversation.unread_high = stats["unread_high"]
+        conversation.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("usermessages", "0003_conversation"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_conversations, migrations.RunPython.noop
+        ),
+    ]
@@ -1,9 +1,19 @@
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models import F
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
 
 
 # Create your models here.
 class Message(models.Model):
+    conversation = models.ForeignKey(
+        "Conversation",
+        on_delete=models.CASCADE,
+        related_name="messages",
+        null=True,
+        blank=True,
+    )
     sender = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="sent_messages"
     )
@@ -16,3 +26,120 @@ class Message(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["conversation", "-created_at", "-id"]),
+            models.Index(fields=["receiver", "is_read"]),
+        ]
+
+
+class Conversation(models.Model):
+    """
+    A direct-message thread between two users.
+
+    The pair is stored ordered (``user_low.pk < user_high.pk``) so each
+    pair has exactly one row. ``last_message``/``last_message_at`` and the
+    per-side unread counters are denormalized from ``Message`` so the
+    inbox never has to scan messages.
+    """
+
+    user_low = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+"
+    )
+    user_high = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+"
+    )
+    last_message = models.ForeignKey(
+        Message,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    unread_low = models.IntegerField(default=0)  # unread by user_low
+    unread_high = models.IntegerField(default=0)  # unread by user_high
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-last_message_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user_low", "user_high"],
+                name="unique_conversation_pair",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user_low", "-last_message_at", "-id"]),
+            models.Index(fields=["user_high", "-last_message_at", "-id"]),
+        ]
+
+    def __str__(self):
+        return f"Conversation {self.user_low_id} <-> {self.user_high_id}"
+
+    @staticmethod
+    def pair(user_a_id, user_b_id):
+        return min(user_a_id, user_b_id), max(user_a_id, user_b_id)
+
+    @classmethod
+    def between(cls, user_a_id, user_b_id):
+        """The conversation of two users, created on first use"""
+        low, high = cls.pair(user_a_id, user_b_id)
+        conversation, _ = cls.objects.get_or_create(
+            user_low_id=low, user_high_id=high
+        )
+        return conversation
+
+    @classmethod
+    def involving(cls, user):
+        return cls.objects.filter(
+            models.Q(user_low=user) | models.Q(user_high=user)
+        )
+
+    def side(self, user_id):
+        """ "low" or "high": which participant ``user_id`` is"""
+        return "low" if user_id == self.user_low_id else "high"
+
+    def other_user(self, user_id):
+        return self.user_high if user_id == self.user_low_id else self.user_low
+
+    def unread_for(self, user_id):
+        return getattr(self, f"unread_{self.side(user_id)}")
+
+    def record_message(self, message):
+        """Point at ``message`` and count it as unread for its receiver"""
+        unread = f"unread_{self.side(message.receiver_id)}"
+        Conversation.objects.filter(pk=self.pk).update(
+            last_message=message,
+            last_message_at=message.created_at,
+            **{unread: F(unread) + 1},
+        )
+
+    def mark_read(self, user_id):
+        """Mark everything ``user_id`` received here as read"""
+        unread = f"unread_{self.side(user_id)}"
+        Message.objects.filter(
+            conversation=self, receiver_id=user_id, is_read=False
+        ).update(is_read=True)
+        Conversation.objects.filter(pk=self.pk).update(**{unread: 0})
+        setattr(self, unread, 0)
+
+
+# =============================================================================
+# SIGNALS FOR CONVERSATION MAINTENANCE
+# =============================================================================
+
+
+@receiver(pre_save, sender=Message)
+def attach_conversation(sender, instance, **kwargs):
+    """File new messages under their conversation"""
+    if instance.conversation_id is None:
+        instance.conversation = Conversation.between(
+            instance.sender_id, instance.receiver_id
+        )
+
+
+@receiver(post_save, sender=Message)
+def update_conversation_on_create(sender, instance, created, **kwargs):
+    """Move the conversation's last-message pointer and unread count"""
+    if created:
+        instance.conversation.record_message(instance)
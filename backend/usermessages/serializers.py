@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from .models import Message
+from .models import Conversation, Message
 
 
 class MessageSerializer(serializers.ModelSerializer):
@@ -19,3 +19,44 @@ class MessageSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["sender_username", "created_at", "is_read"]
         extra_kwargs = {"receiver": {"write_only": True, "required": False}}
+
+
+class ConversationSerializer(serializers.ModelSerializer):
+    """Inbox row, from the point of view of the requesting user"""
+
+    other_user = serializers.SerializerMethodField()
+    last_message = serializers.SerializerMethodField()
+    unread_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Conversation
+        fields = [
+            "id",
+            "other_user",
+            "last_message",
+            "last_message_at",
+            "unread_count",
+        ]
+
+    def _viewer_id(self):
+        return self.context["request"].user.pk
+
+    def get_other_user(self, obj):
+        other = obj.other_user(self._viewer_id())
+        return {"id": other.pk, "username": other.username}
+
+    def get_last_message(self, obj):
+        message = obj.last_message
+        if message is None:
+            return None
+        return {
+            "id": message.pk,
+            "sender": message.sender_id,
+            "content": message.content,
+            "created_at": serializers.DateTimeField().to_representation(
+                message.created_at
+            ),
+        }
+
+    def get_unread_count(self, obj):
+        return obj.unread_for(self._viewer_id())
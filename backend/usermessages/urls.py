@@ -1,10 +1,11 @@
 from django.urls import path
 
-from .views import MessageListSendView
+from .views import InboxView, MessageListSendView
 from .views_messages_home import messages_home
 
 urlpatterns = [
     path("", messages_home, name="messages-home"),
+    path("inbox/", InboxView.as_view(), name="message-inbox"),
     path(
         "<int:user_id>/",
         MessageListSendView.as_view(),
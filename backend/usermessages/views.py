@@ -1,34 +1,87 @@
-from django.db.models import Q
+from blocks.service import exclude_blocked, is_blocked
+from django.db import transaction
 from rest_framework import generics, permissions
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 
-from .models import Message
-from .serializers import MessageSerializer
+from backend.pagination import KeysetPagination
+
+from .models import Conversation, Message
+from .serializers import ConversationSerializer, MessageSerializer
 
 
 class MessageListSendView(generics.ListCreateAPIView):
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_conversation(self):
+        low, high = Conversation.pair(
+            self.request.user.pk, self.kwargs["user_id"]
+        )
+        return Conversation.objects.filter(
+            user_low_id=low, user_high_id=high
+        ).first()
 
     def get_queryset(self):
-        other_id = self.kwargs["user_id"]
-        user = self.request.user
-        return Message.objects.filter(
-            Q(sender=user, receiver_id=other_id)
-            | Q(receiver=user, sender_id=other_id)
-        ).order_by("created_at")
+        return (
+            Message.objects.filter(conversation=self.conversation)
+            .select_related("sender")
+            .order_by("-created_at")
+        )
 
     def create(self, request, *args, **kwargs):
         receiver_id = self.kwargs["user_id"]
+        if is_blocked(request.user, receiver_id):
+            raise PermissionDenied("You cannot message this user.")
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        message = serializer.save(
-            sender=self.request.user, receiver_id=receiver_id
-        )
+        with transaction.atomic():
+            message = serializer.save(
+                sender=self.request.user,
+                receiver_id=receiver_id,
+                conversation=Conversation.between(
+                    self.request.user.pk, receiver_id
+                ),
+            )
         output_serializer = self.get_serializer(message)
         return Response(output_serializer.data, status=200)
 
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        self.conversation = self.get_conversation()
+        if self.conversation is None:
+            return self.get_paginated_response([])
+        opened = not request.query_params.get(
+            self.paginator.cursor_query_param
+        )
+        if opened and self.conversation.unread_for(request.user.pk):
+            # Opening the conversation reads it
+            self.conversation.mark_read(request.user.pk)
+
+        # Pages walk back in time from the newest message; each page is
+        # returned oldest-first so it can be rendered as-is.
+        page = self.paginate_queryset(self.get_queryset())
+        page.reverse()
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class InboxView(generics.ListAPIView):
+    """The user's conversations, most recently active first"""
+
+    serializer_class = ConversationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return (
+            exclude_blocked(
+                Conversation.involving(self.request.user),
+                self.request.user,
+                "user_low",
+                "user_high",
+            )
+            .filter(last_message_at__isnull=False)
+            .select_related("user_low", "user_high", "last_message")
+            .order_by("-last_message_at")
+        )
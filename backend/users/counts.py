@@ -0,0 +1,141 @@
+"""
+Denormalized profile counts (followers, following, posts).
+
+Follows and posts change the counts of their users with
+``UPDATE users_userprofile SET followers_count = followers_count + 1``,
+so concurrent requests never overwrite each other's changes and nothing
+has to ``COUNT(*)`` the follow or post tables on read.
+
+Users created without a profile get one the first time a count goes up;
+it is filled from the source rows, so it also covers what happened
+before. Decrements of a missing profile are dropped (there is nothing to
+correct, and during a cascading user delete the profile is already
+gone).
+
+``recount_profiles`` recomputes every count from the ``Follow`` and
+``Post`` rows and rewrites the profiles that drifted.
+"""
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from posts.models import Follow, Post, post_soft_deleted
+
+from .models import UserProfile
+
+COUNTS = ("followers_count", "following_count", "posts_count")
+
+
+def _invalidate(user_ids):
+    from caching.objects import user_cache
+
+    usernames = User.objects.filter(pk__in=list(user_ids)).values_list(
+        "username", flat=True
+    )
+    user_cache.invalidate(*usernames)
+
+
+def increment(user_id, field, delta=1):
+    """Change ``field`` of a user's profile by ``delta``"""
+    if field not in COUNTS:
+        raise ValueError(f"Unknown profile count: {field}")
+    updated = UserProfile.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta}
+    )
+    if not updated and delta > 0:
+        UserProfile.objects.get_or_create(user_id=user_id)
+        recount(user_ids=[user_id])
+    transaction.on_commit(lambda: _invalidate([user_id]))
+
+
+# =============================================================================
+# RECOUNT
+# =============================================================================
+
+
+def _count(queryset, field):
+    """Correlated ``COUNT`` of ``queryset`` rows whose ``field`` is the user"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef("user_id")})
+            .order_by()
+            .values(field)
+            .annotate(n=Count("pk"))
+            .values("n"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def true_counts():
+    """Expressions computing each count from the source rows"""
+    return {
+        "followers_count": _count(Follow.objects.all(), "following"),
+        "following_count": _count(Follow.objects.all(), "follower"),
+        "posts_count": _count(Post.objects.filter(is_deleted=False), "user"),
+    }
+
+
+def recount(user_ids=None, chunk_size=1000):
+    """
+    Recompute the counts of every profile (or of ``user_ids``).
+
+    Only profiles whose stored counts disagree are written; returns their
+    number.
+    """
+    counts = true_counts()
+    profiles = UserProfile.objects.all()
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=user_ids)
+    drift = Q()
+    for field in counts:
+        drift |= ~Q(**{field: F(f"true_{field}")})
+    with transaction.atomic():
+        wrong = list(
+            profiles.annotate(
+                **{f"true_{field}": expr for field, expr in counts.items()}
+            )
+            .filter(drift)
+            .values_list("user_id", flat=True)
+        )
+        for start in range(0, len(wrong), chunk_size):
+            chunk = wrong[start : start + chunk_size]
+            UserProfile.objects.filter(user_id__in=chunk).update(**counts)
+        transaction.on_commit(lambda: _invalidate(wrong))
+    return len(wrong)
+
+
+# =============================================================================
+# SIGNALS
+# =============================================================================
+
+
+@receiver(post_save, sender=Follow)
+def count_follow(sender, instance, created, **kwargs):
+    if created:
+        increment(instance.following_id, "followers_count", 1)
+        increment(instance.follower_id, "following_count", 1)
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follow(sender, instance, **kwargs):
+    increment(instance.following_id, "followers_count", -1)
+    increment(instance.follower_id, "following_count", -1)
+
+
+@receiver(post_save, sender=Post)
+def count_post(sender, instance, created, **kwargs):
+    if created and not instance.is_deleted:
+        increment(instance.user_id, "posts_count", 1)
+
+
+@receiver(post_soft_deleted, sender=Post)
+@receiver(post_delete, sender=Post)
+def uncount_post(sender, instance, **kwargs):
+    if kwargs["signal"] is post_delete and instance.is_deleted:
+        return  # already uncounted when it was soft-deleted
+    increment(instance.user_id, "posts_count", -1)
@@ -0,0 +1,27 @@
+"""
+Recompute profile followers/following/posts counts from the source rows.
+
+One set-based statement per chunk of drifted profiles; profiles whose
+counts are already right are not written.
+
+Run with: python manage.py recount_profiles [--chunk-size N]
+"""
+
+from django.core.management.base import BaseCommand
+from users.counts import recount
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized profile counts from follows and posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Profiles updated per statement (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        fixed = recount(chunk_size=options["chunk_size"])
+        self.stdout.write(self.style.SUCCESS(f"Recounted {fixed} profiles."))
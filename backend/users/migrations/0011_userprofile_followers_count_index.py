@@ -0,0 +1,22 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0010_remove_ip_address_logging"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="userprofile",
+            index=models.Index(
+                fields=["followers_count"],
+                name="users_userp_followe_470314_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+from django.db import migrations
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef("user_id")})
+            .order_by()
+            .values(field)
+            .annotate(n=Count("pk"))
+            .values("n"),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def recount_profiles(apps, schema_editor):
+    """
+    Fill the profile counts from the follow and post rows, as
+    ``recount_profiles`` does; celebrity detection for the home timeline
+    reads ``followers_count``.
+    """
+    Follow = apps.get_model("posts", "Follow")
+    Post = apps.get_model("posts", "Post")
+    UserProfile = apps.get_model("users", "UserProfile")
+    UserProfile.objects.update(
+        followers_count=_count(Follow.objects.all(), "following"),
+        following_count=_count(Follow.objects.all(), "follower"),
+        posts_count=_count(Post.objects.filter(is_deleted=False), "user"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0010_posthashtag_created_at_is_deleted"),
+        ("users", "0011_userprofile_followers_count_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(recount_profiles, migrations.RunPython.noop),
+    ]
@@ -41,6 +41,12 @@ class UserProfile(models.Model):
     email_verification_attempts = models.IntegerField(default=0)
     last_verification_attempt_at = models.DateTimeField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # Fan-out-on-read threshold lookups (posts.timeline)
+            models.Index(fields=["followers_count"]),
+        ]
+
     def __str__(self):
         return f"Profile for {self.user.username}"
 
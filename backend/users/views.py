@@ -1,12 +1,13 @@
 from django.contrib.auth.models import User
 from rest_framework import generics, permissions
 from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
 
 from .serializers import PublicUserSerializer
 
 
 class UserListView(generics.ListAPIView):
-    queryset = User.objects.all()
+    queryset = User.objects.select_related("profile")
     serializer_class = PublicUserSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -19,6 +20,16 @@ class UserDetailByUsernameView(generics.RetrieveAPIView):
     def get_queryset(self):
         return User.objects.all()
 
+    def retrieve(self, request, *args, **kwargs):
+        """Serve the public profile from the object cache"""
+        from caching.objects import user_cache
+
+        username = self.kwargs.get("username")
+        data = user_cache.get_or_load(username)
+        if data is None:
+            raise NotFound(f"User with username '{username}' not found")
+        return Response(data)
+
     def get_object(self):
         username = self.kwargs.get("username")
         try: